@@ -0,0 +1,278 @@
+"""
+Vectorized backtest of the alert policy.
+
+Replays every asset's pre-computed risk history through the alerting logic
+of the API and reports, per configuration, what the policy would have done:
+
+    alert       a reading at or above the threshold, at least the cooldown
+                after the asset's previous alert (the email path)
+    follow-up   a Telegram call per reading at or above the threshold (the
+                live path calls even when the email is in cooldown), spaced
+                per destination by the follow-up client
+    caught      a failure reading (label 1) with an alert on the same asset
+                at most `lead` readings before it
+    cost        false alerts x cost_fp + missed failures x cost_fn
+
+Readings of one asset are `interval` seconds apart. The cooldown chain is
+resolved with array operations (pointer doubling over the above-threshold
+readings), so one configuration costs a handful of passes over the risk
+array and a threshold x cooldown grid is swept on a process pool.
+
+Usage:
+    python alert_backtest.py
+    python alert_backtest.py --thresholds 40,50,60,70,80,90 --cooldowns 0,300,900,3600
+    python alert_backtest.py --asset product --cost-fp 500 --cost-fn 5000,20000 --lead 20
+"""
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from asset_registry import AssetRegistry
+from chunked_precompute import ASSET_KEYS
+from features import FEATURES, INPUTS, feature_matrix
+from model_registry import load_bundle, load_precomputed_risks
+from parallel_scoring import available_cores, pool_context, score_datasets
+from train_pipeline import ASSET_SPECS, GENERATOR_SOURCE_COLUMNS, read_table, serving_paths
+
+READING_INTERVAL_SECONDS = 60   # time between two readings of one asset
+LEAD_READINGS = 10              # an alert counts for a failure up to this many readings later
+FOLLOWUP_MIN_INTERVAL = 60.0    # follow-up client: seconds between calls to one destination
+FOLLOWUP_MAX_WAIT = None        # follow-up client: calls queued longer than this are dropped (None: never)
+MIN_PARALLEL_WORK = 5_000_000   # configurations x readings below which the grid is swept inline
+
+
+class AlertHistory:
+    """One asset type's risk history (%) in registry order, laid out for replay."""
+
+    def __init__(self, risks_pct, offsets, labels=None):
+        self.risk = np.asarray(risks_pct, dtype=np.float64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        n = len(self.risk)
+        asset = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        # Position = asset * stride + reading index, with stride larger than
+        # any asset's history plus any cooldown or lead window, so gaps
+        # between positions never span two assets
+        self.stride = 2 * (n + 1)
+        self.pos = asset * self.stride + (np.arange(n) - offsets[:-1][asset])
+        self.n_assets = len(offsets) - 1
+        self.failures = None if labels is None else self.pos[np.asarray(labels) == 1]
+
+    def __len__(self):
+        return len(self.risk)
+
+
+def select_alerts(candidates, gap):
+    """
+    The positions a per-asset cooldown keeps from sorted `candidates`: the
+    first one, then the first at least `gap` later, and so on. Each
+    candidate points at its successor on that chain; doubling the pointers
+    marks the whole chain in O(log m) array passes.
+    """
+    m = len(candidates)
+    if m == 0 or gap <= 1:
+        return candidates
+    jump = np.append(np.searchsorted(candidates, candidates + gap), m)  # m = past the end
+    on_chain = np.zeros(m + 1, dtype=bool)
+    on_chain[0] = True
+    while jump[0] != m:
+        # on_chain holds the first 2^k chain members and jump the 2^k-th successor
+        on_chain[jump[on_chain]] = True
+        jump = jump[jump]
+    return candidates[on_chain[:m]]
+
+
+def backtest(history, threshold, cooldown_seconds, costs=((500.0, 5000.0),), interval=READING_INTERVAL_SECONDS,
+             lead=LEAD_READINGS, followup_seconds=0, followup_interval=FOLLOWUP_MIN_INTERVAL, followup_max_wait=FOLLOWUP_MAX_WAIT):
+    """
+    Replay one threshold (%) / cooldown (seconds) policy. Returns one result
+    dict per (cost_fp, cost_fn) pair in `costs`; failure and cost figures are
+    None when the history has no labels.
+    """
+    above = history.pos[history.risk >= threshold]
+    gap = min(max(1, math.ceil(cooldown_seconds / interval)), history.stride // 2)
+    alerts = select_alerts(above, gap)
+    result = {
+        "threshold": threshold,
+        "cooldown_seconds": cooldown_seconds,
+        "alerts": int(len(alerts)),
+        "alerted_assets": int(len(np.unique(alerts // history.stride))),
+        "assets": history.n_assets,
+        "readings": len(history),
+    }
+
+    if followup_seconds is not None and followup_seconds >= 0:
+        # One call per above-threshold reading, queued per destination
+        t = np.sort((above % history.stride) * float(interval) + followup_seconds)
+        delay = np.zeros(len(t))
+        if followup_interval > 0 and len(t):
+            k = np.arange(len(t)) * float(followup_interval)
+            delay = k + np.maximum.accumulate(t - k) - t
+        result["followup_calls"] = int(len(t))
+        result["followup_max_delay_seconds"] = float(delay.max()) if len(t) else 0.0
+        result["followup_over_max_wait"] = (int((delay > followup_max_wait).sum())
+                                            if followup_max_wait is not None else 0)
+
+    caught = missed = false_alerts = None
+    if history.failures is not None:
+        failures = history.failures
+        lead = min(lead, len(history))
+        # Latest alert at or before each failure, earliest failure at or after each alert
+        hit = np.zeros(len(failures), dtype=bool)
+        useful = np.zeros(len(alerts), dtype=bool)
+        if len(alerts) and len(failures):
+            before = np.searchsorted(alerts, failures, side="right") - 1
+            hit = (before >= 0) & (failures - alerts[np.maximum(before, 0)] <= lead)
+            after = np.searchsorted(failures, alerts, side="left")
+            useful = (after < len(failures)) & (failures[np.minimum(after, len(failures) - 1)] - alerts <= lead)
+        caught, missed, false_alerts = int(hit.sum()), int((~hit).sum()), int((~useful).sum())
+        result["failures"] = int(len(failures))
+    result.update(caught=caught, missed=missed, false_alerts=false_alerts)
+
+    return [
+        {**result, "cost_fp": cost_fp, "cost_fn": cost_fn,
+         "cost": None if caught is None else false_alerts * cost_fp + missed * cost_fn}
+        for cost_fp, cost_fn in costs
+    ]
+
+
+_worker_histories = {}
+
+
+def _init_worker(histories):
+    _worker_histories.update(histories)
+
+
+def _run(task, costs, options):
+    asset_type, threshold, cooldown = task
+    return [{"asset_type": asset_type, **r}
+            for r in backtest(_worker_histories[asset_type], threshold, cooldown, costs, **options)]
+
+
+def sweep(histories, thresholds, cooldowns, costs=((500.0, 5000.0),), workers=None,
+          min_parallel_work=MIN_PARALLEL_WORK, **options):
+    """
+    Backtest every asset type x threshold x cooldown x cost configuration.
+    Grids with enough work are spread over a process pool (`workers`
+    defaults to the available cores). Returns a flat list of result dicts.
+    """
+    tasks = [(asset_type, float(th), float(cd)) for asset_type in histories for th in thresholds for cd in cooldowns]
+    run = partial(_run, costs=[tuple(map(float, c)) for c in costs], options=options)
+    work = sum(len(histories[asset_type]) for asset_type, _, _ in tasks)
+    workers = workers or available_cores()
+
+    context = pool_context() if workers > 1 and work >= min_parallel_work else None
+    if context is not None:
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=_init_worker, initargs=(histories,)) as pool:
+                parts = list(pool.map(run, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+            return [r for part in parts for r in part]
+        except Exception as e:
+            print(f"⚠️ Parallel backtest failed ({e}); running inline.")
+
+    _init_worker(histories)
+    return [r for task in tasks for r in run(task)]
+
+
+def best(results):
+    """Lowest-cost configuration per asset type and cost pair (labelled histories only)."""
+    winners = {}
+    for r in results:
+        if r["cost"] is None:
+            continue
+        key = (r["asset_type"], r["cost_fp"], r["cost_fn"])
+        if key not in winners or (r["cost"], r["alerts"]) < (winners[key]["cost"], winners[key]["alerts"]):
+            winners[key] = r
+    return list(winners.values())
+
+
+def load_history(asset_type, fleet_size=None):
+    """
+    (AlertHistory inputs, bundle, data path) for an asset type's serving data,
+    or the labelled training source when the serving data has no labels.
+    """
+    spec = ASSET_SPECS[asset_type]
+    data_path = spec["serving_data"]
+    target = spec["target"]
+    if target not in pd.read_csv(data_path, nrows=0).columns and os.path.exists(spec["source"]):
+        print(f"ℹ️ {data_path} has no '{target}' labels; backtesting {asset_type} on {spec['source']}.")
+        data_path = spec["source"]
+    df = read_table(data_path)
+    if not set(INPUTS[asset_type]).issubset(df.columns):
+        df = df.rename(columns=GENERATOR_SOURCE_COLUMNS)
+    bundle = load_bundle(asset_type, *serving_paths(asset_type), features=FEATURES[asset_type])
+    id_column, prefix, seq_column = ASSET_KEYS[asset_type]
+    size = fleet_size or int(os.getenv(f"{asset_type.upper()}_FLEET_SIZE", "10"))
+    registry = AssetRegistry.for_dataset(df, id_column, size, prefix, sort_column=seq_column)
+    labels = df[target].to_numpy()[registry.order] if target in df.columns else None
+    return df, registry, labels, bundle, data_path
+
+
+def _floats(text):
+    return [float(v) for v in text.split(",") if v.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vectorized alert policy backtest.")
+    parser.add_argument("--asset", choices=sorted(ASSET_SPECS), action="append",
+                        help="Asset type(s) to replay (default: all)")
+    parser.add_argument("--thresholds", type=_floats, default=_floats("30,40,50,60,70,80,90"), help="Risk %% thresholds")
+    parser.add_argument("--cooldowns", type=_floats, default=_floats("0,300,900,3600"), help="Cooldowns in seconds")
+    parser.add_argument("--cost-fp", type=_floats, default=[500.0], help="Cost(s) of a false alert")
+    parser.add_argument("--cost-fn", type=_floats, default=[5000.0], help="Cost(s) of a missed failure")
+    parser.add_argument("--interval", type=float, default=READING_INTERVAL_SECONDS, help="Seconds between readings")
+    parser.add_argument("--lead", type=int, default=LEAD_READINGS, help="Readings an alert may precede a failure")
+    parser.add_argument("--followup-seconds", type=float, default=float(os.getenv("FOLLOWUP_SECONDS", "300")))
+    parser.add_argument("--followup-interval", type=float, default=float(os.getenv("FOLLOWUP_MIN_INTERVAL", str(FOLLOWUP_MIN_INTERVAL))))
+    parser.add_argument("--followup-max-wait", type=float,
+                        default=float(os.environ["FOLLOWUP_MAX_WAIT"]) if os.getenv("FOLLOWUP_MAX_WAIT") else None)
+    parser.add_argument("--fleet-size", type=int, help="Assets to split the rows into when there is no id column")
+    parser.add_argument("--workers", type=int, help="Processes for the grid (default: available cores)")
+    args = parser.parse_args(argv)
+
+    loaded = {asset_type: load_history(asset_type, args.fleet_size) for asset_type in args.asset or ASSET_SPECS}
+    risks = {}
+    jobs = {}
+    for asset_type, (df, _, _, bundle, data_path) in loaded.items():
+        spec = ASSET_SPECS[asset_type]
+        risks[asset_type] = load_precomputed_risks(bundle, spec["risks_path"], data_path)
+        if risks[asset_type] is None:
+            jobs[asset_type] = (bundle.model, feature_matrix(asset_type, df))
+    risks.update(score_datasets(jobs, workers=args.workers))
+    histories = {
+        asset_type: AlertHistory(risks[asset_type][registry.order] * 100, registry.offsets, labels)
+        for asset_type, (_, registry, labels, _, _) in loaded.items()
+    }
+
+    costs = [(fp, fn) for fp in args.cost_fp for fn in args.cost_fn]
+    started = time.perf_counter()
+    results = sweep(histories, args.thresholds, args.cooldowns, costs, workers=args.workers,
+                    interval=args.interval, lead=args.lead, followup_seconds=args.followup_seconds,
+                    followup_interval=args.followup_interval, followup_max_wait=args.followup_max_wait)
+    elapsed = time.perf_counter() - started
+
+    print("=" * 96)
+    print(f"ALERT POLICY BACKTEST ({len(results)} configurations in {elapsed:.2f}s)")
+    print("=" * 96)
+    print(f"   {'asset':<10}{'thresh':>7}{'cooldown':>9}{'alerts':>8}{'calls':>8}{'failures':>9}"
+          f"{'caught':>8}{'missed':>8}{'false':>8}{'cost':>12}")
+    fmt = lambda v: "-" if v is None else f"{v:,.0f}"
+    for r in results:
+        print(f"   {r['asset_type']:<10}{r['threshold']:>7.0f}{r['cooldown_seconds']:>9.0f}{r['alerts']:>8,}"
+              f"{r.get('followup_calls', 0):>8,}{fmt(r.get('failures')):>9}{fmt(r['caught']):>8}"
+              f"{fmt(r['missed']):>8}{fmt(r['false_alerts']):>8}{fmt(r['cost']):>12}")
+    print("-" * 96)
+    for r in best(results):
+        print(f"   💡 {r['asset_type']}: threshold {r['threshold']:.0f}%, cooldown {r['cooldown_seconds']:.0f}s "
+              f"-> cost {r['cost']:,.0f} (fp {r['cost_fp']:,.0f} / fn {r['cost_fn']:,.0f})")
+    print("=" * 96)
+
+
+if __name__ == "__main__":
+    main()
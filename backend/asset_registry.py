@@ -0,0 +1,165 @@
+"""
+Asset registry: maps asset ids to the dataset rows that hold their readings.
+
+The index is built once at load time in CSR form (a row order array plus
+per-asset offsets), so history lookups, fleet pagination and per-asset risk
+aggregation never scan or group the full dataset on a request.
+"""
+import hashlib
+import re
+
+import numpy as np
+import pandas as pd
+
+
+def natural_key(asset_id):
+    """Sort key that orders 'Turbine_2' before 'Turbine_10'."""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", str(asset_id))]
+
+
+class AssetRegistry:
+    def __init__(self, ids, order, offsets):
+        self.ids = list(ids)
+        self.order = np.asarray(order, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self._positions = {asset_id: i for i, asset_id in enumerate(self.ids)}
+
+    @classmethod
+    def from_column(cls, df, id_column, sort_column=None):
+        """Index a dataset that carries an asset id column (e.g. 'Product ID')."""
+        codes, uniques = pd.factorize(df[id_column], sort=False)
+        ids = sorted(uniques, key=natural_key)
+
+        # Renumber codes so asset positions follow the natural id order
+        rank = {asset_id: i for i, asset_id in enumerate(ids)}
+        remap = np.array([rank[u] for u in uniques], dtype=np.int64)
+        codes = remap[codes]
+
+        if sort_column is not None and sort_column in df.columns:
+            order = np.lexsort((df[sort_column].to_numpy(), codes))
+        else:
+            order = np.argsort(codes, kind="stable")
+
+        counts = np.bincount(codes, minlength=len(ids))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        return cls(ids, order, offsets)
+
+    @classmethod
+    def from_ranges(cls, n_rows, n_assets, prefix):
+        """
+        Split a dataset without an id column into `n_assets` contiguous row
+        ranges named '<prefix>_1'..'<prefix>_N'; the last asset takes the remainder.
+        """
+        if n_assets <= 0 or n_rows < n_assets:
+            raise ValueError(f"Cannot split {n_rows} rows into {n_assets} assets")
+        chunk = n_rows // n_assets
+        offsets = np.append(np.arange(n_assets, dtype=np.int64) * chunk, n_rows)
+        ids = [f"{prefix}_{i}" for i in range(1, n_assets + 1)]
+        return cls(ids, np.arange(n_rows, dtype=np.int64), offsets)
+
+    @classmethod
+    def for_dataset(cls, df, id_column, fleet_size, prefix, sort_column=None):
+        """
+        Index by `id_column` when the dataset has one, otherwise split it into
+        `fleet_size` contiguous row ranges (the layout of the demo CSVs).
+        """
+        if id_column in df.columns:
+            return cls.from_column(df, id_column, sort_column=sort_column)
+        return cls.from_ranges(len(df), fleet_size, prefix)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, asset_id):
+        return asset_id in self._positions
+
+    def position(self, asset_id):
+        """Index of an asset in registry order. Raises KeyError for unknown ids."""
+        return self._positions[asset_id]
+
+    def positions(self, asset_ids):
+        """Registry positions for the given ids, skipping unknown ones."""
+        return np.array(
+            [self._positions[a] for a in asset_ids if a in self._positions], dtype=np.int64
+        )
+
+    def rows(self, asset_id):
+        """Dataset row positions of one asset, in reading order."""
+        i = self._positions[asset_id]
+        return self.order[self.offsets[i]:self.offsets[i + 1]]
+
+    def counts(self):
+        return np.diff(self.offsets)
+
+    def layout_version(self):
+        """Hash of which dataset rows belong to which asset, in which order."""
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update("\x00".join(map(str, self.ids)).encode())
+        digest.update(self.order.tobytes())
+        digest.update(self.offsets.tobytes())
+        return digest.hexdigest()
+
+    def aggregate(self, values, how="mean", window=None):
+        """
+        Per-asset aggregate of a per-row array (e.g. failure probabilities).
+
+        how: "mean", "max" or "latest". With `window`, only each asset's last
+        `window` readings are used. Assets without readings get NaN.
+        """
+        ordered = np.asarray(values, dtype=np.float64)[self.order]
+        starts, ends = self.offsets[:-1], self.offsets[1:]
+        if window is not None:
+            starts = np.maximum(starts, ends - int(window))
+        counts = ends - starts
+        result = np.full(len(self.ids), np.nan)
+        has_rows = counts > 0
+
+        if how == "mean":
+            cumulative = np.concatenate([[0.0], np.cumsum(ordered)])
+            result[has_rows] = (cumulative[ends] - cumulative[starts])[has_rows] / counts[has_rows]
+        elif how == "max":
+            if has_rows.any():
+                # Interleave [start, end) bounds so reduceat yields one max per
+                # segment; the padding keeps the final end index in range.
+                bounds = np.empty(2 * has_rows.sum(), dtype=np.int64)
+                bounds[0::2] = starts[has_rows]
+                bounds[1::2] = ends[has_rows]
+                padded = np.append(ordered, -np.inf)
+                result[has_rows] = np.maximum.reduceat(padded, bounds)[0::2]
+        elif how == "latest":
+            result[has_rows] = ordered[ends[has_rows] - 1]
+        else:
+            raise ValueError(f"Unknown aggregate: {how}")
+        return result
+
+    def top_k(self, scores, k, positions=None):
+        """
+        Positions of the `k` highest scores (descending), using a partial sort
+        so the cost is O(N + k log k) instead of sorting the whole fleet.
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        candidates = np.arange(len(scores)) if positions is None else np.asarray(positions, dtype=np.int64)
+        candidate_scores = np.nan_to_num(scores[candidates], nan=-np.inf)
+        k = max(0, min(int(k), len(candidates)))
+        if k == 0:
+            return candidates[:0]
+        if k < len(candidates):
+            part = np.argpartition(-candidate_scores, k - 1)[:k]
+        else:
+            part = np.arange(len(candidates))
+        part = part[np.argsort(-candidate_scores[part], kind="stable")]
+        return candidates[part]
+
+    def select(self, scores=None, positions=None, offset=0, limit=None, top=None):
+        """
+        Positions for a fleet query: the `top` riskiest assets when `top` is
+        given, otherwise a page of `limit` assets starting at `offset`.
+        """
+        if positions is None:
+            positions = np.arange(len(self.ids), dtype=np.int64)
+        if top is not None and scores is not None:
+            positions = self.top_k(scores, top, positions)
+        offset = max(0, int(offset or 0))
+        end = None if limit is None else offset + max(0, int(limit))
+        return positions[offset:end]
+
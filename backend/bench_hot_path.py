@@ -0,0 +1,97 @@
+"""
+Benchmark the per-request prediction path: the old pandas path (1-row
+DataFrame from a feature dict, reindexed to the model columns, model with
+feature-name validation) vs the array path the API uses now (reading written
+into a preallocated buffer, model switched to array input at load).
+
+Reports median microseconds per reading for building the input and end to
+end, and the median per-reading saving from paired, interleaved runs (the
+forest call itself is the same work on both paths and dominates the noise).
+
+Usage:
+    python bench_hot_path.py [readings_per_asset]
+"""
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from features import FEATURES, INPUTS, RowBuffers, feature_row
+from model_registry import array_model
+from train_pipeline import ASSET_SPECS, GENERATOR_SOURCE_COLUMNS
+
+N_READINGS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+
+def pandas_input(asset_type, reading):
+    """What the endpoints did before: a dict of named features -> DataFrame -> column order."""
+    values = feature_row(asset_type, *reading)[0].tolist()
+    features = pd.DataFrame([dict(zip(FEATURES[asset_type], values))])
+    return features[FEATURES[asset_type]]
+
+
+def paired_us(old, new, readings):
+    """
+    Time both paths back to back on every reading (alternating which goes
+    first) so scheduler noise hits both alike. Returns the median of each
+    and the median of the per-reading difference.
+    """
+    old(readings[0]), new(readings[0])
+    t_old, t_new = [], []
+    for i, reading in enumerate(readings):
+        for fn, timings in ((old, t_old), (new, t_new))[::1 if i % 2 else -1]:
+            t = time.perf_counter()
+            fn(reading)
+            timings.append(time.perf_counter() - t)
+    t_old, t_new = np.array(t_old) * 1e6, np.array(t_new) * 1e6
+    return float(np.median(t_old)), float(np.median(t_new)), float(np.median(t_old - t_new))
+
+
+print("=" * 72)
+print("REQUEST HOT PATH BENCHMARK (median µs per reading)")
+print("=" * 72)
+print(f"   {'asset':<11}{'input pandas':>14}{'input array':>13}{'total pandas':>14}{'total array':>13}{'saved':>9}")
+
+buffers = RowBuffers()
+for asset_type, spec in ASSET_SPECS.items():
+    data_path = spec["serving_data"] if os.path.exists(spec["serving_data"]) else spec["source"]
+    if not os.path.exists(spec["model_path"]) or not os.path.exists(data_path):
+        print(f"   {asset_type:<11}⚠️ model or data not found, skipped")
+        continue
+    df = pd.read_csv(data_path)
+    if not set(INPUTS[asset_type]).issubset(df.columns):
+        df = df.rename(columns=GENERATOR_SOURCE_COLUMNS)
+    sample = df[INPUTS[asset_type]].sample(n=min(N_READINGS, len(df)), random_state=0)
+    readings = list(sample.itertuples(index=False, name=None))
+
+    named_model = joblib.load(spec["model_path"])
+    fast_model = array_model(joblib.load(spec["model_path"]), FEATURES[asset_type])
+    for model in (named_model, fast_model):
+        if "n_jobs" in model.get_params():
+            model.set_params(n_jobs=None)
+    buffer = buffers.get(asset_type)
+
+    # Same probabilities on both paths
+    for reading in readings[:50]:
+        old = named_model.predict_proba(pandas_input(asset_type, reading))[0][1]
+        new = fast_model.predict_proba(feature_row(asset_type, *reading, out=buffer))[0, 1]
+        assert old == new, (asset_type, reading, old, new)
+
+    input_old, input_new, _ = paired_us(
+        lambda r: pandas_input(asset_type, r),
+        lambda r: feature_row(asset_type, *r, out=buffer),
+        readings,
+    )
+    total_old, total_new, saved = paired_us(
+        lambda r: float(named_model.predict_proba(pandas_input(asset_type, r))[0][1]),
+        lambda r: float(fast_model.predict_proba(feature_row(asset_type, *r, out=buffer))[0, 1]),
+        readings,
+    )
+    print(f"   {asset_type:<11}{input_old:>14.1f}{input_new:>13.1f}{total_old:>14.1f}{total_new:>13.1f}{saved:>9.1f}")
+
+print("=" * 72)
+print("   input = building the model input; total = input + predict_proba;")
+print("   saved = median per-reading difference of the totals (paired runs)")
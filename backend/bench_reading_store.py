@@ -0,0 +1,77 @@
+"""
+Benchmark the reading store: bulk inserts, per-asset range queries and
+latest-N queries on a synthetic fleet in a temporary database.
+
+Reports rows/s for inserts and queries (and queries/s), for a fresh
+insert and for re-writing the same rows (the startup re-sync after a
+model change).
+
+Usage:
+    python bench_reading_store.py [assets] [readings_per_asset]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from reading_store import ReadingStore
+
+N_ASSETS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+N_PER_ASSET = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+BATCH_ROWS = 50_000
+N_QUERIES = 2_000
+COLUMNS = ["AT", "V", "AP", "RH"]
+
+rng = np.random.default_rng(0)
+n = N_ASSETS * N_PER_ASSET
+asset_ids = np.repeat([f"Turbine_{i}" for i in range(1, N_ASSETS + 1)], N_PER_ASSET)
+seqs = np.tile(np.arange(N_PER_ASSET), N_ASSETS)
+values = {c: rng.normal(size=n) for c in COLUMNS + ["risk"]}
+
+
+def insert_all(store):
+    started = time.perf_counter()
+    for start in range(0, n, BATCH_ROWS):
+        stop = start + BATCH_ROWS
+        store.insert("turbine", asset_ids[start:stop], seqs[start:stop],
+                     {c: v[start:stop] for c, v in values.items()})
+    return time.perf_counter() - started
+
+
+def query_rate(query):
+    """(queries/s, rows/s) over N_QUERIES random assets."""
+    targets = rng.integers(1, N_ASSETS + 1, size=N_QUERIES)
+    rows = 0
+    started = time.perf_counter()
+    for i in targets:
+        rows += len(query(f"Turbine_{i}")["seq"])
+    elapsed = time.perf_counter() - started
+    return N_QUERIES / elapsed, rows / elapsed
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    store = ReadingStore(os.path.join(tmp, "readings.db"), {"turbine": COLUMNS})
+
+    print("=" * 72)
+    print(f"READING STORE BENCHMARK ({N_ASSETS:,} assets x {N_PER_ASSET:,} readings = {n:,} rows)")
+    print("=" * 72)
+    elapsed = insert_all(store)
+    print(f"   insert (fresh)         {n / elapsed:>12,.0f} rows/s   ({elapsed:.2f}s)")
+    elapsed = insert_all(store)
+    print(f"   insert (re-write)      {n / elapsed:>12,.0f} rows/s   ({elapsed:.2f}s)")
+    assert store.count("turbine") == n
+
+    half = N_PER_ASSET // 2
+    for label, query in (
+        ("range (whole history)", lambda a: store.range("turbine", a)),
+        (f"range (seq {half // 2}..{half})", lambda a: store.range("turbine", a, half // 2, half)),
+        ("latest 100", lambda a: store.latest("turbine", a, 100)),
+        ("latest 1", lambda a: store.latest("turbine", a, 1)),
+    ):
+        qps, rps = query_rate(query)
+        print(f"   {label:<22} {rps:>12,.0f} rows/s   ({qps:,.0f} queries/s)")
+
+    print(f"   database size          {os.path.getsize(os.path.join(tmp, 'readings.db')) / 1e6:>12,.1f} MB")
+    print("=" * 72)
@@ -2,26 +2,13 @@ import joblib
 import pandas as pd
 import numpy as np
 
+from features import PRODUCT_FEATURES, feature_matrix
+
 model = joblib.load('model.pkl')
 df = pd.read_csv('generalized_dff.csv')
 
-# Rename columns
-df.columns = ['UDI','Product ID','Type','Air temperature','Process temperature',
-              'Rotational speed','Torque','Tool wear','Machine failure',
-              'TWF','HDF','PWF','OSF','RNF','Mechanical_Power','Temp_Diff','Tool_Stress']
-
-# Feature engineering
-df['Power'] = df['Torque'] * df['Rotational speed']
-df_enc = pd.get_dummies(df, columns=['Type'])
-
-for c in ['Type_H','Type_L','Type_M']:
-    if c not in df_enc.columns:
-        df_enc[c] = 0
-
-cols = ['Air temperature','Process temperature','Rotational speed','Torque',
-        'Tool wear','Type_H','Type_L','Type_M','Temp_Diff','Power','Tool_Stress']
-
-X = df_enc[cols]
+# Same feature pipeline as training and the API
+X = pd.DataFrame(feature_matrix('product', df), columns=PRODUCT_FEATURES)
 probs = model.predict_proba(X)[:,1]
 
 print('=== Probability Distribution ===')
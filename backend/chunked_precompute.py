@@ -0,0 +1,304 @@
+"""
+Out-of-core fleet risk precomputation.
+
+Streams a reading archive (CSV or Parquet) in fixed-size chunks, scores each
+chunk with the serving model and appends the results to an on-disk columnar
+cache, so peak memory is bounded by the chunk size rather than the archive:
+
+    <out-dir>/probability.f8   failure probability per row (float64, file order)
+    <out-dir>/asset.i4         asset code per row (index into aggregates ids)
+    <out-dir>/seq.i8           sequence number per row (seq column or row number)
+    <out-dir>/aggregates.npz   per-asset count, mean, min, max, high-risk share, latest
+    <out-dir>/meta.json        row count, dtypes, model and data versions (written last)
+
+The columns are raw little-endian arrays that load_cache() memory-maps, and
+the API reuses the probabilities at startup (cached_risks) when they were
+computed by the active model version for the same dataset file.
+
+Usage:
+    python chunked_precompute.py --data generalized_dff.csv
+    python chunked_precompute.py --data fleet_products.parquet --chunk-rows 200000 --out-dir fleet_cache
+    python chunked_precompute.py --asset turbine --data fleet_turbines.csv --fleet-size 5000
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURES, INPUTS, feature_matrix
+from model_registry import file_version, load_bundle
+from train_pipeline import ASSET_SPECS, GENERATOR_SOURCE_COLUMNS, serving_paths
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Asset id column, id prefix for datasets without one, and sequence column
+ASSET_KEYS = {
+    "product": ("Product ID", "Product", "UDI"),
+    "turbine": ("Turbine ID", "Turbine", None),
+    "generator": ("Generator ID", "Generator", None),
+}
+HIGH_RISK = 0.7
+COLUMN_FILES = {"probability": "<f8", "asset": "<i4", "seq": "<i8"}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("❌ Parquet input requires pyarrow (pip install pyarrow).")
+    return pq
+
+
+def table_columns(path):
+    if path.endswith(".parquet"):
+        return _require_pyarrow().ParquetFile(path).schema_arrow.names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def row_count(path):
+    """Data rows in the file without loading it (Parquet metadata or a newline count)."""
+    if path.endswith(".parquet"):
+        return _require_pyarrow().ParquetFile(path).metadata.num_rows
+    lines = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            lines += 1
+    return lines - 1  # header
+
+
+def iter_chunks(path, chunk_rows, columns):
+    """DataFrames of at most `chunk_rows` rows holding only `columns`."""
+    if path.endswith(".parquet"):
+        for batch in _require_pyarrow().ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows)
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+class FleetAggregates:
+    """Running per-asset statistics over streamed chunks (O(assets) memory)."""
+
+    def __init__(self):
+        self.ids = []
+        self._codes = {}
+        size = 1024
+        self.count = np.zeros(size, dtype=np.int64)
+        self.total = np.zeros(size)
+        self.min = np.full(size, np.inf)
+        self.max = np.full(size, -np.inf)
+        self.high = np.zeros(size, dtype=np.int64)
+        self.last_seq = np.full(size, np.iinfo(np.int64).min)
+        self.last = np.zeros(size)
+
+    def codes(self, asset_ids):
+        """Asset code per row; new ids are registered in first-seen order."""
+        uniq, first, inverse = np.unique(np.asarray(asset_ids), return_index=True, return_inverse=True)
+        mapped = np.empty(len(uniq), dtype=np.int32)
+        values = uniq.tolist()
+        for i in np.argsort(first, kind="stable"):
+            asset_id = values[i]
+            code = self._codes.get(asset_id)
+            if code is None:
+                code = self._codes[asset_id] = len(self.ids)
+                self.ids.append(asset_id)
+            mapped[i] = code
+        self._grow(len(self.ids))
+        return mapped[inverse]
+
+    def _grow(self, n):
+        size = len(self.count)
+        if n <= size:
+            return
+        extra = max(n, size * 2) - size
+        self.count = np.append(self.count, np.zeros(extra, dtype=np.int64))
+        self.total = np.append(self.total, np.zeros(extra))
+        self.min = np.append(self.min, np.full(extra, np.inf))
+        self.max = np.append(self.max, np.full(extra, -np.inf))
+        self.high = np.append(self.high, np.zeros(extra, dtype=np.int64))
+        self.last_seq = np.append(self.last_seq, np.full(extra, np.iinfo(np.int64).min))
+        self.last = np.append(self.last, np.zeros(extra))
+
+    def update(self, codes, seq, probs):
+        n = len(self.count)
+        self.count += np.bincount(codes, minlength=n)
+        self.total += np.bincount(codes, weights=probs, minlength=n)
+        self.high += np.bincount(codes, weights=probs >= HIGH_RISK, minlength=n).astype(np.int64)
+        np.minimum.at(self.min, codes, probs)
+        np.maximum.at(self.max, codes, probs)
+        # Latest reading per asset in this chunk: last row of each code after sorting by (code, seq)
+        order = np.lexsort((seq, codes))
+        sorted_codes = codes[order]
+        ends = np.flatnonzero(np.append(sorted_codes[1:] != sorted_codes[:-1], True))
+        chunk_codes, rows = sorted_codes[ends], order[ends]
+        newer = seq[rows] >= self.last_seq[chunk_codes]
+        self.last_seq[chunk_codes[newer]] = seq[rows[newer]]
+        self.last[chunk_codes[newer]] = probs[rows[newer]]
+
+    def arrays(self):
+        n = len(self.ids)
+        count = self.count[:n]
+        return {
+            "ids": np.array(self.ids, dtype=str),
+            "count": count,
+            "mean": self.total[:n] / np.maximum(count, 1),
+            "min": self.min[:n],
+            "max": self.max[:n],
+            "high_share": self.high[:n] / np.maximum(count, 1),
+            "latest": self.last[:n],
+            "latest_seq": self.last_seq[:n],
+        }
+
+
+def precompute(asset_type, data_path, out_dir, chunk_rows=100_000, model_path=None, fleet_size=None):
+    """
+    Score `data_path` chunk by chunk into the columnar cache in `out_dir`.
+    Returns the metadata dict written to meta.json.
+    """
+    id_column, id_prefix, seq_column = ASSET_KEYS[asset_type]
+    # Same files (and so the same version) as the API loads for this model
+    bundle = load_bundle(asset_type, *serving_paths(asset_type, model_path), features=FEATURES[asset_type])
+
+    available = table_columns(data_path)
+    rename = {}
+    if not set(INPUTS[asset_type]).issubset(available):
+        rename = {k: v for k, v in GENERATOR_SOURCE_COLUMNS.items() if k in available}
+    wanted = [c for c in available if c in rename or c in INPUTS[asset_type] or c in (id_column, seq_column)]
+
+    # Without an id column rows map to `fleet_size` contiguous ranges (AssetRegistry.from_ranges)
+    range_size = None
+    if id_column not in available:
+        if not fleet_size:
+            raise SystemExit(f"❌ {data_path} has no '{id_column}' column; pass --fleet-size.")
+        n_rows = row_count(data_path)
+        if n_rows < fleet_size:
+            raise SystemExit(f"❌ Cannot split {n_rows} rows into {fleet_size} assets")
+        range_size = n_rows // fleet_size
+
+    os.makedirs(out_dir, exist_ok=True)
+    meta_path = os.path.join(out_dir, "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)  # the cache is unreadable until this run finishes
+    files = {name: open(os.path.join(out_dir, f"{name}.{dtype[1:]}"), "wb") for name, dtype in COLUMN_FILES.items()}
+
+    print(f"⚙️ Scoring {data_path} in chunks of {chunk_rows:,} rows with {asset_type} model {bundle.version}")
+    aggregates = FleetAggregates()
+    rows = 0
+    started = time.perf_counter()
+    try:
+        for chunk in iter_chunks(data_path, chunk_rows, wanted):
+            t = time.perf_counter()
+            if rename:
+                chunk = chunk.rename(columns=rename)
+            probs = bundle.model.predict_proba(feature_matrix(asset_type, chunk))[:, 1]
+
+            row_numbers = np.arange(rows, rows + len(chunk), dtype=np.int64)
+            seq = chunk[seq_column].to_numpy(dtype=np.int64) if seq_column in chunk else row_numbers
+            if range_size is None:
+                codes = aggregates.codes(chunk[id_column].to_numpy())
+            else:
+                positions = np.minimum(row_numbers // range_size, fleet_size - 1)
+                codes = aggregates.codes([f"{id_prefix}_{p + 1}" for p in range(positions[0], positions[-1] + 1)])
+                codes = codes[positions - positions[0]]
+            aggregates.update(codes, seq, probs)
+
+            probs.astype(COLUMN_FILES["probability"]).tofile(files["probability"])
+            codes.astype(COLUMN_FILES["asset"]).tofile(files["asset"])
+            seq.astype(COLUMN_FILES["seq"]).tofile(files["seq"])
+
+            rows += len(chunk)
+            elapsed = time.perf_counter() - started
+            rss = peak_rss_mb()
+            print(f"   {rows:,} rows scored ({len(chunk) / max(time.perf_counter() - t, 1e-9):,.0f} rows/s chunk, "
+                  f"{rows / max(elapsed, 1e-9):,.0f} rows/s overall"
+                  + (f", peak RSS {rss:,.0f} MB)" if rss is not None else ")"))
+    finally:
+        for f in files.values():
+            f.close()
+
+    np.savez(os.path.join(out_dir, "aggregates.npz"), **aggregates.arrays())
+    meta = {
+        "asset_type": asset_type,
+        "rows": rows,
+        "assets": len(aggregates.ids),
+        "columns": COLUMN_FILES,
+        "model_version": bundle.version,
+        "data_version": file_version(data_path),
+        "data_path": os.path.abspath(data_path),
+        "chunk_rows": chunk_rows,
+        "seconds": round(time.perf_counter() - started, 2),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    print(f"✅ {rows:,} rows, {len(aggregates.ids):,} assets cached in {out_dir} ({meta['seconds']}s)")
+    return meta
+
+
+def load_cache(out_dir):
+    """
+    {"meta", "columns" (memory-mapped), "aggregates"} of a finished cache,
+    or None if there is no complete cache in `out_dir`.
+    """
+    meta_path = os.path.join(out_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    columns = {}
+    for name, dtype in meta["columns"].items():
+        path = os.path.join(out_dir, f"{name}.{dtype[1:]}")
+        columns[name] = np.memmap(path, dtype=dtype, mode="r", shape=(meta["rows"],)) if meta["rows"] else np.empty(0, dtype)
+    with np.load(os.path.join(out_dir, "aggregates.npz")) as saved:
+        aggregates = {key: saved[key] for key in saved.files}
+    return {"meta": meta, "columns": columns, "aggregates": aggregates}
+
+
+def cached_risks(out_dir, model_version, data_path):
+    """
+    Per-row probabilities from the cache (zero-copy view of the file), or None
+    unless they were computed by this model version for the current data file.
+    A cache for another version is reported, since it is never used.
+    """
+    cache = load_cache(out_dir)
+    if cache is None:
+        return None
+    meta = cache["meta"]
+    if meta["model_version"] != model_version:
+        print(f"⚠️ Ignoring the risk cache in {out_dir}: built for model version {meta['model_version']}, "
+              f"serving {model_version}. Rebuild it with chunked_precompute.py --model <served model>.")
+        return None
+    if meta["data_version"] != file_version(data_path):
+        print(f"⚠️ Ignoring the risk cache in {out_dir}: built for another version of {data_path}.")
+        return None
+    return np.asarray(cache["columns"]["probability"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chunked, out-of-core fleet risk precomputation.")
+    parser.add_argument("--asset", choices=sorted(ASSET_SPECS), default="product")
+    parser.add_argument("--data", required=True, help="Reading archive (.csv or .parquet)")
+    parser.add_argument("--out-dir", default="fleet_cache", help="Columnar cache directory")
+    parser.add_argument("--chunk-rows", type=int, default=100_000, help="Rows scored per chunk (bounds memory)")
+    parser.add_argument("--model", help="Model file (default: the asset's serving model, e.g. MODEL_PATH)")
+    parser.add_argument("--fleet-size", type=int, help="Assets to split the rows into when there is no id column")
+    args = parser.parse_args(argv)
+    precompute(args.asset, args.data, args.out_dir, args.chunk_rows, args.model, args.fleet_size)
+
+
+if __name__ == "__main__":
+    main()
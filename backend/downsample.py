@@ -0,0 +1,71 @@
+"""
+Server-side downsampling of risk histories for trend graphs.
+
+Both methods return indices into the original series, so every column of a
+history (sensor values as well as risk) can be gathered for the same points
+and the shape of the risk curve drives which readings are kept.
+"""
+import numpy as np
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+MIN_POINTS = 3  # first, last and at least one bucket in between
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: keeps the first and last points and, from
+    each bucket in between, the point forming the largest triangle with the
+    previously kept point and the average of the next bucket.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # n_out - 2 buckets over the interior points; n_out < n keeps every bucket non-empty
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    edges = np.append(edges, n)
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        start, end = edges[b], edges[b + 1]
+        next_start, next_end = edges[b + 1], edges[b + 2]
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        indices[b + 1] = a
+    return indices
+
+
+def minmax_indices(y, n_out):
+    """
+    Min/max bucketing: splits the series into n_out // 2 buckets and keeps the
+    lowest and highest point of each, so spikes always survive. Vectorized.
+    """
+    n = len(y)
+    buckets = n_out // 2
+    if n_out >= n or buckets < 1:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    bucket = np.repeat(np.arange(buckets), np.diff(edges))
+    # After sorting by (bucket, value) each bucket's first/last entries are its min/max
+    by_value = np.lexsort((y, bucket))
+    lowest = by_value[edges[:-1]]
+    highest = by_value[edges[1:] - 1]
+    return np.unique(np.concatenate([lowest, highest]))
+
+
+def downsample_indices(x, y, n_out, method="lttb"):
+    if method == "lttb":
+        return lttb_indices(x, y, n_out)
+    if method == "minmax":
+        return minmax_indices(y, n_out)
+    raise ValueError(f"Unknown downsampling method '{method}'. Use one of {list(DOWNSAMPLE_METHODS)}.")
@@ -0,0 +1,121 @@
+"""
+Streaming data- and prediction-drift monitor.
+
+Each model feature and the output probability gets a fixed-bin histogram
+whose edges are the training data's quantiles, so the baseline (training)
+distribution is roughly uniform over the bins. Live readings scored by the
+API are counted into the same bins: constant memory per asset type and one
+vectorized comparison + bincount per scored batch. Readings whose
+probability is only an estimate (answered by the pre-screen) count towards
+the features but not the probability column.
+
+Drift scores compare the live histogram to the baseline one:
+
+    PSI = sum((live - base) * ln(live / base))   over bin proportions
+    KS  = max |cdf_live - cdf_base|              at the bin edges
+
+PSI below 0.1 is read as stable, 0.1-0.25 as moderate and above 0.25 as
+significant drift. KS is evaluated at the bin edges only, so it is a lower
+bound of the exact two-sample statistic.
+"""
+import threading
+
+import numpy as np
+
+DRIFT_BINS = 20
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+MIN_PROPORTION = 1e-4  # empty bins, so PSI stays finite
+
+
+def drift_status(psi):
+    if psi >= PSI_SIGNIFICANT:
+        return "significant"
+    if psi >= PSI_MODERATE:
+        return "moderate"
+    return "stable"
+
+
+def psi_ks(live, base):
+    """PSI and binned KS of two count vectors over the same bins."""
+    live = live / max(live.sum(), 1)
+    base = base / max(base.sum(), 1)
+    ks = float(np.abs(np.cumsum(live) - np.cumsum(base)).max())
+    live, base = np.maximum(live, MIN_PROPORTION), np.maximum(base, MIN_PROPORTION)
+    return float(((live - base) * np.log(live / base)).sum()), ks
+
+
+class DriftMonitor:
+    def __init__(self, names, edges, baseline):
+        self.names = list(names)
+        self.edges = edges          # (columns, max_edges) ascending, padded with +inf
+        self.n_bins = (edges < np.inf).sum(axis=1) + 1  # bins used per column
+        self.width = edges.shape[1] + 1
+        self.baseline = baseline    # (columns, width) training counts
+        self.live = np.zeros_like(baseline)
+        self._columns = np.arange(len(self.names))
+        self._offsets = self._columns * self.width
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fit(cls, names, X, bins=DRIFT_BINS):
+        """Quantile bin edges and baseline counts of the (rows, columns) training matrix."""
+        X = np.asarray(X, dtype=np.float64)
+        quantiles = np.quantile(X, np.linspace(0, 1, bins + 1)[1:-1], axis=0).T
+        edges = np.full((X.shape[1], bins - 1), np.inf)
+        for j, column in enumerate(quantiles):
+            unique = np.unique(column)  # constant or discrete features have fewer bins
+            edges[j, :len(unique)] = unique
+        monitor = cls(names, edges, np.zeros((X.shape[1], bins), dtype=np.int64))
+        monitor.baseline = monitor._counts(X)
+        return monitor
+
+    def _counts(self, X, chunk=65536):
+        flat = np.zeros(len(self.names) * self.width, dtype=np.int64)
+        for start in range(0, len(X), chunk):
+            # Bin = number of edges <= value (bin 0 below the first edge)
+            bins = (X[start:start + chunk, :, None] >= self.edges[None]).sum(axis=2)
+            flat += np.bincount((bins + self._offsets).ravel(), minlength=len(flat))
+        return flat.reshape(len(self.names), self.width)
+
+    def update(self, features, probabilities=None):
+        """
+        Count scored readings: (n, features) matrix and their n failure
+        probabilities (None counts the features only, for readings whose
+        probability did not come from the model).
+        """
+        features = np.asarray(features, dtype=np.float64)
+        if len(features) == 1:  # scoring path: one reading, index the bins directly
+            x = features[0] if probabilities is None else np.append(features[0], probabilities[0])
+            bins = (x[:, None] >= self.edges[:len(x)]).sum(axis=1)
+            with self._lock:
+                self.live[self._columns[:len(x)], bins] += 1
+            return
+        if probabilities is None:
+            counts = self._counts(np.column_stack((features, np.full(len(features), np.nan))))
+            counts[-1] = 0
+        else:
+            counts = self._counts(np.column_stack((features, np.asarray(probabilities, dtype=np.float64))))
+        with self._lock:
+            self.live += counts
+
+    def reset(self):
+        with self._lock:
+            self.live[:] = 0
+
+    def report(self, min_samples=0):
+        """
+        Per column PSI, KS and status of the live readings against the
+        baseline; status is "insufficient_data" below `min_samples` readings.
+        """
+        with self._lock:
+            live = self.live.copy()
+        samples = int(live[0].sum())
+        columns = {}
+        for j, name in enumerate(self.names):
+            used = self.n_bins[j]
+            counted = int(live[j].sum())  # the output column may count fewer readings
+            psi, ks = psi_ks(live[j, :used], self.baseline[j, :used])
+            status = drift_status(psi) if counted >= max(min_samples, 1) else "insufficient_data"
+            columns[name] = {"psi": round(psi, 4), "ks": round(ks, 4), "status": status, "samples": counted}
+        return {"samples": samples, "baseline_samples": int(self.baseline[0].sum()), "columns": columns}
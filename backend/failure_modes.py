@@ -0,0 +1,92 @@
+"""
+Per-failure-mode scoring with one multi-output forest.
+
+The AI4I product readings carry a label per failure mode (TWF, HDF, PWF,
+OSF, RNF). Instead of one model per mode, a single RandomForestClassifier is
+fitted on all five labels: every tree stores the class distribution of each
+mode in its leaves, so one traversal per reading yields all mode
+probabilities. Per-mode thresholds are cost-optimized on out-of-fold
+probabilities written by the training pipeline, like the main model's.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+
+from model_registry import array_model, file_version
+
+FAILURE_MODES = ["TWF", "HDF", "PWF", "OSF", "RNF"]
+FAILURE_MODE_NAMES = {
+    "TWF": "Tool Wear Failure",
+    "HDF": "Heat Dissipation Failure",
+    "PWF": "Power Failure",
+    "OSF": "Overstrain Failure",
+    "RNF": "Random Failure",
+}
+THRESHOLD_CACHE_SIZE = 64  # cost pairs per model version
+DEFAULT_THRESHOLD = 0.5    # for modes without positives in the calibration sample
+
+
+def mode_probabilities(model, X):
+    """(n, n_modes) failure probability of each mode (0 where a mode never failed in training)."""
+    probs, classes = model.predict_proba(X), model.classes_
+    if not isinstance(probs, list):  # single-output model
+        probs, classes = [probs], [classes]
+    result = np.zeros((len(probs[0]), len(probs)))
+    for k, (mode_classes, p) in enumerate(zip(classes, probs)):
+        mode_classes = list(mode_classes)
+        if 1 in mode_classes:
+            result[:, k] = p[:, mode_classes.index(1)]
+    return result
+
+
+class FailureModeModel:
+    """A loaded multi-output model version plus its calibration and dataset risks."""
+
+    def __init__(self, model, modes, version, calibration=None):
+        self.model = model
+        self.modes = list(modes)
+        self.version = version
+        self.calibration = calibration  # {"y_true": (n, modes), "y_probs": (n, modes)} out-of-fold
+        self.risks = None               # (rows, modes) probabilities of the serving dataset
+        self._thresholds = OrderedDict()
+        self._lock = threading.Lock()
+
+    def predict(self, X):
+        return mode_probabilities(self.model, X)
+
+    def thresholds(self, cost_fp, cost_fn, optimize):
+        """
+        Cost-optimized threshold per mode (list in mode order), computed once
+        per cost pair with `optimize(y_true, y_probs, cost_fp, cost_fn)`.
+        """
+        key = (float(cost_fp), float(cost_fn))
+        with self._lock:
+            if key in self._thresholds:
+                self._thresholds.move_to_end(key)
+                return self._thresholds[key]
+        result = [DEFAULT_THRESHOLD] * len(self.modes)
+        if self.calibration is not None:
+            y_true, y_probs = self.calibration["y_true"], self.calibration["y_probs"]
+            for k in range(len(self.modes)):
+                if 0 < y_true[:, k].sum() < len(y_true):
+                    result[k] = float(optimize(y_true[:, k], y_probs[:, k], cost_fp, cost_fn)["optimal_threshold"])
+        with self._lock:
+            self._thresholds[key] = result
+            while len(self._thresholds) > THRESHOLD_CACHE_SIZE:
+                self._thresholds.popitem(last=False)
+        return result
+
+
+def load_failure_modes(model_path, calibration_path=None, features=None):
+    """The failure-mode model at `model_path`, or None if it has not been trained."""
+    if not os.path.exists(model_path):
+        return None
+    saved = joblib.load(model_path)
+    model = saved["model"]
+    if features is not None:
+        array_model(model, features)
+    calibration = joblib.load(calibration_path) if calibration_path and os.path.exists(calibration_path) else None
+    return FailureModeModel(model, saved["modes"], file_version(model_path, calibration_path), calibration)
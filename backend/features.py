@@ -0,0 +1,157 @@
+"""
+Feature pipelines shared by training, serving and the scripts.
+
+One builder per asset type turns raw sensor columns (NumPy arrays, or
+anything np.asarray accepts such as DataFrame columns) into the model input
+matrix in training column order, without per-row Python. A matching
+single-row builder serves request readings from plain floats without pandas,
+optionally into a reused per-thread buffer (RowBuffers); it applies the same
+float64 operations in the same order, so a reading gets bit-identical
+features on either path (checked by verify_features.py).
+"""
+import threading
+
+import numpy as np
+
+PRODUCT_TYPES = ("H", "L", "M")
+PRODUCT_SENSORS = ["Air temperature", "Process temperature", "Rotational speed", "Torque", "Tool wear"]
+PRODUCT_FEATURES = PRODUCT_SENSORS + ["Type_H", "Type_L", "Type_M", "Temp_Diff", "Power", "Tool_Stress"]
+
+TURBINE_SENSORS = ["AT", "V", "AP", "RH"]
+TURBINE_FEATURES = TURBINE_SENSORS + ["Temp_Press_Ratio", "Voltage_Temp", "Humidity_Factor", "Power_Est"]
+
+# The generator model uses its raw sensors only
+GENERATOR_SENSORS = ["air_temp", "core_temp", "rpm", "torque", "wear"]
+GENERATOR_FEATURES = list(GENERATOR_SENSORS)
+
+
+def _float_columns(*columns):
+    return [np.asarray(c, dtype=np.float64).reshape(-1) for c in columns]
+
+
+# --- Product (AI4I machines) ---
+def product_features(product_type, air_temp, proc_temp, rpm, torque, tool_wear):
+    """(n, 11) matrix in PRODUCT_FEATURES order."""
+    air_temp, proc_temp, rpm, torque, tool_wear = _float_columns(air_temp, proc_temp, rpm, torque, tool_wear)
+    product_type = np.asarray(product_type).reshape(-1)
+    X = np.empty((len(air_temp), len(PRODUCT_FEATURES)), dtype=np.float64)
+    X[:, 0] = air_temp
+    X[:, 1] = proc_temp
+    X[:, 2] = rpm
+    X[:, 3] = torque
+    X[:, 4] = tool_wear
+    for i, t in enumerate(PRODUCT_TYPES):
+        X[:, 5 + i] = product_type == t
+    X[:, 8] = proc_temp - air_temp       # Temp_Diff
+    X[:, 9] = torque * rpm               # Power
+    X[:, 10] = tool_wear * torque        # Tool_Stress
+    return X
+
+
+def product_row(product_type, air_temp, proc_temp, rpm, torque, tool_wear, out=None):
+    """(1, 11) matrix for one reading, written into `out` if given."""
+    air_temp, proc_temp, rpm, torque, tool_wear = float(air_temp), float(proc_temp), float(rpm), float(torque), float(tool_wear)
+    row = np.empty((1, len(PRODUCT_FEATURES)), dtype=np.float64) if out is None else out
+    row[0] = (
+        air_temp, proc_temp, rpm, torque, tool_wear,
+        product_type == "H", product_type == "L", product_type == "M",
+        proc_temp - air_temp,
+        torque * rpm,
+        tool_wear * torque,
+    )
+    return row
+
+
+# --- Turbine ---
+def turbine_features(AT, V, AP, RH):
+    """(n, 8) matrix in TURBINE_FEATURES order."""
+    AT, V, AP, RH = _float_columns(AT, V, AP, RH)
+    X = np.empty((len(AT), len(TURBINE_FEATURES)), dtype=np.float64)
+    X[:, 0] = AT
+    X[:, 1] = V
+    X[:, 2] = AP
+    X[:, 3] = RH
+    X[:, 4] = AT / (AP / 1000)           # Temp_Press_Ratio
+    X[:, 5] = V * AT                     # Voltage_Temp
+    X[:, 6] = (RH / 100) * V             # Humidity_Factor
+    X[:, 7] = V * AT * (AP / 1000)       # Power_Est
+    return X
+
+
+def turbine_row(AT, V, AP, RH, out=None):
+    """(1, 8) matrix for one reading, written into `out` if given."""
+    AT, V, AP, RH = float(AT), float(V), float(AP), float(RH)
+    row = np.empty((1, len(TURBINE_FEATURES)), dtype=np.float64) if out is None else out
+    row[0] = (
+        AT, V, AP, RH,
+        AT / (AP / 1000),
+        V * AT,
+        (RH / 100) * V,
+        V * AT * (AP / 1000),
+    )
+    return row
+
+
+# --- Generator ---
+def generator_features(air_temp, core_temp, rpm, torque, wear):
+    """(n, 5) matrix in GENERATOR_FEATURES order."""
+    return np.column_stack(_float_columns(air_temp, core_temp, rpm, torque, wear))
+
+
+def generator_row(air_temp, core_temp, rpm, torque, wear, out=None):
+    """(1, 5) matrix for one reading, written into `out` if given."""
+    row = np.empty((1, len(GENERATOR_FEATURES)), dtype=np.float64) if out is None else out
+    row[0] = (air_temp, core_temp, rpm, torque, wear)
+    return row
+
+
+# Raw inputs (argument order of the builders), model columns and builders per asset type
+INPUTS = {
+    "product": ["Type"] + PRODUCT_SENSORS,
+    "turbine": TURBINE_SENSORS,
+    "generator": GENERATOR_SENSORS,
+}
+FEATURES = {
+    "product": PRODUCT_FEATURES,
+    "turbine": TURBINE_FEATURES,
+    "generator": GENERATOR_FEATURES,
+}
+BUILDERS = {
+    "product": product_features,
+    "turbine": turbine_features,
+    "generator": generator_features,
+}
+ROW_BUILDERS = {
+    "product": product_row,
+    "turbine": turbine_row,
+    "generator": generator_row,
+}
+
+
+def feature_matrix(asset_type, columns):
+    """Model input matrix from a mapping of raw input name -> column (a DataFrame works)."""
+    if asset_type not in BUILDERS:
+        raise ValueError(f"Unknown asset type: {asset_type}")
+    return BUILDERS[asset_type](*(columns[name] for name in INPUTS[asset_type]))
+
+
+def feature_row(asset_type, *values, out=None):
+    """Model input matrix for one reading, values in INPUTS[asset_type] order."""
+    if asset_type not in ROW_BUILDERS:
+        raise ValueError(f"Unknown asset type: {asset_type}")
+    return ROW_BUILDERS[asset_type](*values, out=out)
+
+
+class RowBuffers(threading.local):
+    """
+    One preallocated (1, n) input row per asset type and thread, reused by
+    every request the thread serves. A buffer is only valid until the same
+    thread builds its next reading of that asset type.
+    """
+
+    def __init__(self):
+        self.buffers = {asset_type: np.empty((1, len(columns)), dtype=np.float64)
+                        for asset_type, columns in FEATURES.items()}
+
+    def get(self, asset_type):
+        return self.buffers[asset_type]
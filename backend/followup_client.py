@@ -0,0 +1,155 @@
+"""
+Asynchronous client for the Telegram follow-up calls (CallMeBot).
+
+All follow-up calls go through one httpx.AsyncClient running on a dedicated
+asyncio loop thread, so sockets are kept alive and reused across alerts and
+waiting calls cost a timer instead of a sleeping thread. Concurrency is
+bounded by a semaphore, failed calls (network errors, 429 and 5xx) are
+retried with exponential backoff and jitter. Calls to the same destination
+are spaced at least `min_interval` seconds apart (default 60, one call per
+minute per user; 0 disables spacing); with `max_wait` set, calls that would
+have to wait longer than that for their slot are dropped and counted.
+
+`schedule()` is thread-safe and returns a concurrent.futures.Future.
+"""
+import asyncio
+import random
+import threading
+import time
+
+import httpx
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class FollowupClient:
+    def __init__(self, url, max_connections=10, max_concurrency=4, retries=3, backoff=1.0,
+                 max_backoff=30.0, min_interval=60.0, max_wait=None, timeout=30.0):
+        self.url = url
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.min_interval = min_interval
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self._next_slot = {}  # destination -> earliest start time of its next call (monotonic)
+        self._start_lock = threading.Lock()
+        self._counts_lock = threading.Lock()  # counters are written on the loop thread, read by requests
+        self.counts = {"scheduled": 0, "sent": 0, "failed": 0, "retries": 0, "rate_limited": 0}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _start(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(max_connections=self.max_connections,
+                                        max_keepalive_connections=self.max_connections),
+                )
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                ready.set()
+                loop.run_forever()
+
+            threading.Thread(target=run, name="followup-client", daemon=True).start()
+            ready.wait()
+            self._loop = loop
+
+    def schedule(self, params, delay=0.0, destination=None):
+        """
+        Queue one GET of `url` with query `params` after `delay` seconds.
+        Calls sharing a `destination` are rate limited together. The future
+        resolves to True once the call succeeded, False if it was dropped or
+        failed after all retries.
+        """
+        self._start()
+        return asyncio.run_coroutine_threadsafe(self._call(params, delay, destination), self._loop)
+
+    def _reserve(self, destination):
+        """Seconds to wait for the destination's next slot, or None if beyond max_wait (if set)."""
+        if destination is None or self.min_interval <= 0:
+            return 0.0
+        now = time.monotonic()
+        start = max(now, self._next_slot.get(destination, now))
+        if self.max_wait is not None and start - now > self.max_wait:
+            return None
+        self._next_slot[destination] = start + self.min_interval
+        return start - now
+
+    async def _call(self, params, delay, destination):
+        self._count("scheduled")
+        if delay > 0:
+            await asyncio.sleep(delay)
+        wait = self._reserve(destination)
+        if wait is None:
+            self._count("rate_limited")
+            print(f"⚠️ Follow-up call to {destination} dropped: next slot is more than {self.max_wait:.0f}s away (rate limit)")
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        async with self._semaphore:
+            with self._counts_lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                for attempt in range(self.retries + 1):
+                    retry_after = None
+                    try:
+                        response = await self._client.get(self.url, params=params)
+                        if response.status_code < 400:
+                            self._count("sent")
+                            return True
+                        error = f"HTTP {response.status_code}"
+                        if response.status_code not in RETRY_STATUS:
+                            break
+                        retry_after = response.headers.get("Retry-After")
+                    except httpx.HTTPError as e:
+                        error = f"{type(e).__name__}: {e}"
+                    if attempt == self.retries:
+                        break
+                    self._count("retries")
+                    pause = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                    if retry_after is not None and retry_after.isdigit():
+                        pause = max(pause, min(float(retry_after), self.max_backoff))
+                    await asyncio.sleep(pause)
+                self._count("failed")
+                print(f"❌ Follow-up call failed: {error}")
+                return False
+            finally:
+                with self._counts_lock:
+                    self.in_flight -= 1
+
+    def _count(self, name):
+        with self._counts_lock:
+            self.counts[name] += 1
+
+    def close(self):
+        """Close pooled connections and stop the loop thread."""
+        with self._start_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    def metrics(self):
+        with self._counts_lock:
+            counts = {**self.counts, "in_flight": self.in_flight, "max_in_flight": self.max_in_flight}
+        return {
+            **counts,
+            "max_concurrency": self.max_concurrency,
+            "min_interval_seconds": self.min_interval,
+            "max_wait_seconds": self.max_wait,
+        }
@@ -0,0 +1,304 @@
+"""
+Synthetic fleet generator for scale and soak testing.
+
+Creates large datasets for each asset type that follow the column schemas and
+value distributions of the demo CSVs (generalized_dff.csv, Turbine_test_data.csv
+and generator_test_data.csv) and streams them to disk in chunks, so the fleet
+endpoints can be exercised with thousands of assets without holding the whole
+dataset in memory.
+
+Usage:
+    python generate_fleet_data.py --asset product --assets 10000 --history 100 --out fleet_products.csv
+    python generate_fleet_data.py --asset turbine --assets 5000 --history 500 --asset-id-column --out fleet_turbines.csv
+    python generate_fleet_data.py --asset generator --assets 5000 --history 500 --out fleet_generators.parquet
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Source CSV and sensor columns for each asset type. Rows are written asset by
+# asset, so datasets without an ID column can still be split into equal
+# contiguous row ranges (one per asset) by the serving side.
+ASSET_SCHEMAS = {
+    "product": {
+        "source": "generalized_dff.csv",
+        "id_column": "Product ID",
+        "id_prefix": "Product",
+        "sensors": ["Air temperature", "Process temperature", "Rotational speed", "Torque", "Tool wear"],
+        "wear": "Tool wear",
+        "decimals": {"Air temperature": 1, "Process temperature": 1, "Rotational speed": 0, "Torque": 1, "Tool wear": 0},
+    },
+    "turbine": {
+        "source": "Turbine_test_data.csv",
+        "id_column": "Turbine ID",
+        "id_prefix": "Turbine",
+        "sensors": ["AT", "V", "AP", "RH"],
+        "wear": None,
+        "decimals": {"AT": 2, "V": 2, "AP": 2, "RH": 2},
+    },
+    "generator": {
+        "source": "generator_test_data.csv",
+        "id_column": "Generator ID",
+        "id_prefix": "Generator",
+        "sensors": ["air_temp", "core_temp", "rpm", "torque", "wear"],
+        "wear": "wear",
+        "decimals": {"air_temp": 1, "core_temp": 1, "rpm": 0, "torque": 1, "wear": 0},
+    },
+}
+
+# Fallback statistics (mean, std, min, max) taken from the demo CSVs, used when
+# the source file is not available next to this script.
+FALLBACK_STATS = {
+    "product": {
+        "Air temperature": (300.0, 2.0, 295.3, 304.4),
+        "Process temperature": (310.0, 1.5, 305.8, 313.6),
+        "Rotational speed": (1536.5, 172.4, 1202.0, 2825.0),
+        "Torque": (39.9, 9.8, 5.8, 72.0),
+        "Tool wear": (109.0, 63.8, 0.0, 246.0),
+    },
+    "turbine": {
+        "AT": (19.76, 7.52, 2.34, 37.11),
+        "V": (54.48, 12.70, 25.36, 79.74),
+        "AP": (1013.28, 5.91, 993.11, 1033.25),
+        "RH": (73.17, 14.51, 25.56, 100.15),
+    },
+    "generator": {
+        "air_temp": (300.0, 2.0, 295.4, 304.4),
+        "core_temp": (310.0, 1.5, 305.8, 313.8),
+        "rpm": (1509.3, 129.3, 1181.0, 1895.0),
+        "torque": (41.1, 9.0, 21.3, 66.4),
+        "wear": (107.9, 63.0, 0.0, 253.0),
+    },
+}
+
+# Product type mix and tool wear added per reading (as in the AI4I dataset)
+PRODUCT_TYPE_SHARES = {"L": 0.585, "M": 0.308, "H": 0.107}
+WEAR_INCREMENT = {"L": 2, "M": 3, "H": 5}
+OSF_LIMITS = {"L": 11000, "M": 12000, "H": 13000}
+
+# AR(1) dynamics of each reading around the asset's operating point. DRIFT_SHARE
+# is the fraction of each sensor's variance that comes from within-asset drift;
+# the rest is spread between assets, so the marginal distribution matches the source.
+DRIFT_PHI = 0.9
+DRIFT_SHARE = 0.1
+
+
+def load_profile(asset_type, source_dir="."):
+    """
+    Build the sampling profile for an asset type: per-sensor mean/std/min/max
+    and the correlation matrix of the sensors, taken from the source CSV when
+    it exists, otherwise from the built-in fallback statistics.
+    """
+    schema = ASSET_SCHEMAS[asset_type]
+    sensors = schema["sensors"]
+    source_path = os.path.join(source_dir, schema["source"])
+
+    profile = {"sensors": sensors, "type_shares": dict(PRODUCT_TYPE_SHARES)}
+    if os.path.exists(source_path):
+        df = pd.read_csv(source_path, usecols=lambda c: c in sensors or c == "Type")
+        values = df[sensors].to_numpy(dtype=np.float64)
+        profile["mean"] = values.mean(axis=0)
+        profile["std"] = values.std(axis=0)
+        profile["min"] = values.min(axis=0)
+        profile["max"] = values.max(axis=0)
+        profile["corr"] = np.corrcoef(values, rowvar=False)
+        if "Type" in df.columns:
+            profile["type_shares"] = df["Type"].value_counts(normalize=True).to_dict()
+    else:
+        stats = np.array([FALLBACK_STATS[asset_type][c] for c in sensors], dtype=np.float64)
+        profile["mean"], profile["std"], profile["min"], profile["max"] = stats.T
+        profile["corr"] = np.eye(len(sensors))
+    return profile
+
+
+def _correlated_normal(rng, profile, shape):
+    """Standard normal draws with the sensors' correlation structure."""
+    corr = profile["corr"]
+    # Small ridge keeps the Cholesky factorisation stable for near-singular data
+    chol = np.linalg.cholesky(corr + np.eye(len(corr)) * 1e-6)
+    return rng.standard_normal(shape + (len(corr),)) @ chol.T
+
+
+def _operating_points(rng, profile, n_assets):
+    """Draw one correlated operating point per asset."""
+    z = _correlated_normal(rng, profile, (n_assets,))
+    return profile["mean"] + z * profile["std"] * np.sqrt(1 - DRIFT_SHARE)
+
+
+def _readings(rng, profile, base, history):
+    """
+    Generate (n_assets, history, n_sensors) readings as a stationary AR(1)
+    walk around each asset's operating point, clipped to the observed range.
+    """
+    n_assets, n_sensors = base.shape
+    innovation_std = profile["std"] * np.sqrt(DRIFT_SHARE * (1 - DRIFT_PHI ** 2))
+    noise = _correlated_normal(rng, profile, (n_assets, history)) * innovation_std
+    drift = np.empty_like(noise)
+    drift[:, 0] = noise[:, 0] / np.sqrt(1 - DRIFT_PHI ** 2)
+    for t in range(1, history):
+        drift[:, t] = DRIFT_PHI * drift[:, t - 1] + noise[:, t]
+    readings = base[:, None, :] + drift
+    return np.clip(readings, profile["min"], profile["max"])
+
+
+def _wear_series(start, increment, limit, history):
+    """Monotonic wear counters that reset to zero after a replacement at `limit`."""
+    steps = np.arange(history)
+    raw = start[:, None] + increment[:, None] * steps[None, :]
+    return np.mod(raw, limit + 1)
+
+
+def _product_labels(rng, frame, types):
+    """Failure mode labels following the AI4I failure definitions."""
+    air = frame["Air temperature"].to_numpy()
+    proc = frame["Process temperature"].to_numpy()
+    rpm = frame["Rotational speed"].to_numpy()
+    torque = frame["Torque"].to_numpy()
+    wear = frame["Tool wear"].to_numpy()
+    power_w = torque * rpm * (2 * np.pi / 60)
+    osf_limit = np.vectorize(OSF_LIMITS.get)(types)
+
+    labels = {
+        "TWF": (wear >= 200) & (wear <= 240) & (rng.random(len(frame)) < 0.03),
+        "HDF": ((proc - air) < 8.6) & (rpm < 1380),
+        "PWF": (power_w < 3500) | (power_w > 9000),
+        "OSF": (wear * torque) > osf_limit,
+        "RNF": rng.random(len(frame)) < 0.001,
+    }
+    failure = np.zeros(len(frame), dtype=bool)
+    for flag in labels.values():
+        failure |= flag
+    out = {"Machine failure": failure.astype(int)}
+    out.update({mode: flag.astype(int) for mode, flag in labels.items()})
+    return out
+
+
+def generate_chunks(asset_type, n_assets, history, chunk_rows=250_000, seed=42,
+                    asset_id_column=False, source_dir="."):
+    """
+    Yield DataFrames of synthetic readings, asset by asset, with roughly
+    `chunk_rows` rows each. Memory use is bounded by the chunk size regardless
+    of the total fleet size.
+    """
+    schema = ASSET_SCHEMAS[asset_type]
+    sensors = schema["sensors"]
+    profile = load_profile(asset_type, source_dir)
+    rng = np.random.default_rng(seed)
+
+    assets_per_chunk = max(1, chunk_rows // max(history, 1))
+    type_names = list(profile["type_shares"].keys())
+    type_probs = np.array(list(profile["type_shares"].values()), dtype=np.float64)
+    type_probs /= type_probs.sum()
+    udi = 1
+
+    for first in range(0, n_assets, assets_per_chunk):
+        count = min(assets_per_chunk, n_assets - first)
+        base = _operating_points(rng, profile, count)
+        readings = _readings(rng, profile, base, history)
+
+        types = None
+        if asset_type == "product":
+            types = rng.choice(type_names, size=count, p=type_probs)
+
+        wear_col = schema["wear"]
+        if wear_col:
+            w_idx = sensors.index(wear_col)
+            limit = int(profile["max"][w_idx])
+            start = rng.integers(0, limit + 1, size=count)
+            if types is not None:
+                increment = np.vectorize(WEAR_INCREMENT.get)(types)
+            else:
+                increment = rng.integers(2, 6, size=count)
+            readings[:, :, w_idx] = _wear_series(start, increment, limit, history)
+
+        flat = readings.reshape(count * history, len(sensors))
+        frame = pd.DataFrame(
+            {c: np.round(flat[:, i], schema["decimals"][c]) for i, c in enumerate(sensors)}
+        )
+        for c, d in schema["decimals"].items():
+            if d == 0:
+                frame[c] = frame[c].astype(np.int64)
+
+        ids = np.repeat([f"{schema['id_prefix']}_{first + i + 1}" for i in range(count)], history)
+
+        if asset_type == "product":
+            row_types = np.repeat(types, history)
+            frame.insert(0, "UDI", np.arange(udi, udi + len(frame)))
+            frame.insert(1, "Product ID", ids)
+            frame.insert(2, "Type", row_types)
+            labels = _product_labels(rng, frame, row_types)
+            for name, values in labels.items():
+                frame[name] = values
+            frame["Mechanical_Power"] = np.round(frame["Torque"] * frame["Rotational speed"], 1)
+            frame["Temp_Diff"] = np.round(frame["Process temperature"] - frame["Air temperature"], 1)
+            frame["Tool_Stress"] = np.round(frame["Tool wear"] * frame["Torque"], 1)
+        elif asset_id_column:
+            frame.insert(0, schema["id_column"], ids)
+
+        udi += len(frame)
+        yield frame
+
+
+def write_dataset(path, chunks):
+    """Stream chunks to CSV (appending) or Parquet (row groups). Returns the row count."""
+    total = 0
+    started = time.perf_counter()
+    writer = None
+    if os.path.exists(path):
+        os.remove(path)
+
+    try:
+        for frame in chunks:
+            if path.endswith(".parquet"):
+                try:
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                except ImportError:
+                    raise SystemExit("❌ Parquet output requires pyarrow (pip install pyarrow).")
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+            else:
+                frame.to_csv(path, mode="a", header=(total == 0), index=False)
+
+            total += len(frame)
+            elapsed = time.perf_counter() - started
+            print(f"   {total:,} rows written ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic fleet datasets for scale testing.")
+    parser.add_argument("--asset", choices=sorted(ASSET_SCHEMAS), required=True)
+    parser.add_argument("--assets", type=int, default=1000, help="Number of assets in the fleet")
+    parser.add_argument("--history", type=int, default=100, help="Readings per asset")
+    parser.add_argument("--chunk-rows", type=int, default=250_000, help="Rows generated per chunk")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--asset-id-column", action="store_true",
+                        help="Add a 'Turbine ID'/'Generator ID' column (product data always has 'Product ID')")
+    parser.add_argument("--source-dir", default=".", help="Directory holding the demo CSVs to profile")
+    parser.add_argument("--out", required=True, help="Output path (.csv or .parquet)")
+    args = parser.parse_args()
+
+    print(f"⚙️ Generating {args.assets:,} {args.asset} assets x {args.history:,} readings -> {args.out}")
+    started = time.perf_counter()
+    total = write_dataset(
+        args.out,
+        generate_chunks(
+            args.asset, args.assets, args.history,
+            chunk_rows=args.chunk_rows, seed=args.seed,
+            asset_id_column=args.asset_id_column, source_dir=args.source_dir,
+        ),
+    )
+    print(f"✅ {total:,} rows written in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
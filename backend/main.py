@@ -1,19 +1,37 @@
 import pandas as pd
 import numpy as np
-import joblib
 import smtplib
 import time
-import urllib.parse
-import urllib.request
 import threading
+import json
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Body, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import os
 from dotenv import load_dotenv
+from asset_registry import AssetRegistry
+from risk_index import RiskIndex
+from rolling_stats import RollingStats
+from downsample import downsample_indices, DOWNSAMPLE_METHODS, MIN_POINTS
+from response_cache import ResponseCache
+from single_flight import SingleFlight
+from model_registry import ModelRegistry, file_version, load_bundle, load_precomputed_risks, paired_path
+from prescreen import PreScreen
+from prediction_cache import PredictionCache
+from chunked_precompute import cached_risks
+from parallel_scoring import MIN_PARALLEL_ROWS, score_datasets
+from risk_tables import SharedRiskTables, default_table_dir
+from reading_store import ReadingStore
+from followup_client import FollowupClient
+from alert_backtest import AlertHistory, best, sweep
+from tree_attribution import tree_explainer
+from failure_modes import FAILURE_MODE_NAMES, load_failure_modes
+from outcome_calibration import OutcomeCalibration, OutcomeFile
+from drift_monitor import DriftMonitor
+from features import FEATURES, GENERATOR_SENSORS, INPUTS, PRODUCT_FEATURES, PRODUCT_TYPES, TURBINE_SENSORS, RowBuffers, feature_matrix, generator_row, product_row, turbine_row
 
 # Load environment variables
 load_dotenv()
@@ -28,21 +46,189 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# Pre-encoded responses for polling endpoints, versioned per asset type by a
+# data generation counter that is bumped whenever that asset type's risks change
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+data_generation = {"product": 0, "turbine": 0, "generator": 0}
+# Coalesces identical in-flight cost-optimization requests
+cost_flight = SingleFlight()
+
+def bump_generation(asset_type):
+    data_generation[asset_type] += 1
+
+def cached_json_response(request: Request, asset_type, key, build):
+    """
+    Serve `build()`'s JSON payload from the response cache: 304 when the
+    client's If-None-Match matches, pre-gzipped bytes when accepted.
+    """
+    entry = response_cache.get_or_build(key, data_generation[asset_type], build)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    if entry.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    if entry.gzipped is not None and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(entry.gzipped, media_type="application/json", headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+# Versioned models per asset type; endpoints read the active bundle once per
+# request so a reload never switches models halfway through a request
+model_registry = ModelRegistry()
+
+# Dataset scoring at startup fans out over a process pool partitioned by asset
+# type and row chunk (0 = all available cores); reloads run next to request
+# threads and score inline (see parallel_scoring.py)
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", "0"))
+SCORING_MIN_PARALLEL_ROWS = int(os.getenv("SCORING_MIN_PARALLEL_ROWS", str(MIN_PARALLEL_ROWS)))
+
+def score_risks(asset_type, model, X):
+    """Failure probability per row of feature matrix `X` (process pool for large datasets)."""
+    return score_datasets({asset_type: (model, X)}, SCORING_WORKERS,
+                          min_parallel_rows=SCORING_MIN_PARALLEL_ROWS)[asset_type]
+
+# Dataset risks are published once into memory-mapped tables that all worker
+# processes on the host map read-only (RISK_TABLE_DIR= disables sharing).
+# Statistics derived from them are per worker: see ingest_readings.
+risk_tables = SharedRiskTables(os.getenv("RISK_TABLE_DIR", default_table_dir()))
+
+def shared_risks(bundle, data_path, X):
+    """
+    Dataset risks of a model version: the shared table when a worker already
+    published them, otherwise scored here (as the elected producer) and published.
+    """
+    return risk_tables.get_or_publish(
+        bundle.asset_type, bundle.version, file_version(data_path),
+        lambda: score_risks(bundle.asset_type, bundle.model, X)
+    )
+
+# Two-tier scoring (opt-in): readings a pre-screen tree is confident about skip
+# the forest and are answered with its leaf estimate, not the forest probability
+PRESCREEN_ENABLED = os.getenv("PRESCREEN_ENABLED", "false").lower() in ("1", "true", "yes")
+PRESCREEN_MARGIN = float(os.getenv("PRESCREEN_MARGIN", "0.02"))  # probability margin around thresholds
+PRESCREEN_DEPTH = int(os.getenv("PRESCREEN_DEPTH", "8"))
+
+def warm_prescreen(bundle, features):
+    """Fit the version's pre-screen to its forest probabilities on the dataset readings."""
+    if PRESCREEN_ENABLED and bundle.risks is not None:
+        bundle.prescreen = PreScreen.fit(features, bundle.risks, max_depth=PRESCREEN_DEPTH, margin=PRESCREEN_MARGIN)
+
+# Drift monitor: live features and probabilities against the dataset baseline
+DRIFT_ENABLED = os.getenv("DRIFT_ENABLED", "true").lower() in ("1", "true", "yes")
+DRIFT_BINS = int(os.getenv("DRIFT_BINS", "20"))
+DRIFT_MIN_SAMPLES = int(os.getenv("DRIFT_MIN_SAMPLES", "100"))  # live readings before a status is given
+
+def warm_drift(bundle, features):
+    """Baseline histograms of the version's dataset features and probabilities (drift_monitor.py)."""
+    if DRIFT_ENABLED and bundle.risks is not None:
+        bundle.drift = DriftMonitor.fit(FEATURES[bundle.asset_type] + ["probability"],
+                                        np.column_stack((features, bundle.risks)), bins=DRIFT_BINS)
+
+def track_drift(bundle, features, probabilities=None):
+    """Count scored readings; probabilities=None for pre-screened ones (features only)."""
+    if bundle.drift is not None:
+        bundle.drift.update(features, probabilities)
+
+def warm_explainer(bundle):
+    """Precompute the version's per-leaf feature contributions (tree_attribution.py)."""
+    try:
+        bundle.explainer = tree_explainer(bundle.model, FEATURES[bundle.asset_type])
+    except ValueError as e:
+        print(f"⚠️ No feature attributions for the {bundle.asset_type} model: {e}")
+
+def explanation(bundle, features, top=None):
+    """Why the forest scored one reading as it did: base risk plus per-feature contributions (% points)."""
+    if bundle.explainer is None:
+        return None
+    contributions = bundle.explainer.contributions(features)[0] * 100
+    return {
+        "base": round(bundle.explainer.bias * 100, 2),
+        "features": [{**c, "contribution": round(c["contribution"], 2)}
+                     for c in bundle.explainer.explain(contributions, top)],
+    }
+
+# Memo cache of forest probabilities per (asset type, model version, reading).
+# With PREDICTION_CACHE_QUANTIZE (off by default) readings are snapped to the
+# PLCs' native resolution (order of the raw request values) before lookup, so a
+# reading can be answered with the cached probability of a neighbouring reading
+# in the same resolution step rather than its own.
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+PREDICTION_CACHE_QUANTIZE = os.getenv("PREDICTION_CACHE_QUANTIZE", "false").lower() in ("1", "true", "yes")
+NATIVE_RESOLUTION = {
+    "product": (None, 0.1, 0.1, 1, 0.1, 1),     # Type, air K, process K, rpm, Nm, min
+    "turbine": (0.01, 0.01, 0.01, 0.01),        # AT, V, AP, RH
+    "generator": (0.1, 0.1, 1, 0.1, 1),         # air K, core K, rpm, Nm, wear
+}
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, NATIVE_RESOLUTION if PREDICTION_CACHE_QUANTIZE else None)
+
+# Request readings are built into per-thread (1, n) buffers in model column
+# order; models take them as arrays (feature names are checked once at load)
+row_buffers = RowBuffers()
+
+def two_tier_probability(bundle, features, thresholds, reading=None):
+    """
+    (probability, source) of one reading (a 1-row feature matrix from
+    features.py): a cached forest probability for the same raw `reading`
+    ("cache"), the pre-screen's leaf estimate when no threshold is in doubt
+    ("prescreen"), otherwise the forest's ("forest"). Pre-screen estimates
+    are left out of the prediction-drift counts.
+    """
+    probability, source = cached_or_screened_probability(bundle, features, thresholds, reading)
+    track_drift(bundle, features, None if source == "prescreen" else (probability,))
+    return probability, source
+
+def cached_or_screened_probability(bundle, features, thresholds, reading):
+    key = None
+    if reading is not None and PREDICTION_CACHE_SIZE > 0:
+        key = prediction_cache.key(bundle.asset_type, bundle.version, reading)
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            return cached, "cache"
+
+    def forest():
+        probability = float(bundle.model.predict_proba(features)[0, 1])
+        if key is not None:
+            prediction_cache.put(key, probability)
+        return probability
+
+    screen = bundle.prescreen
+    if screen is None:
+        return forest(), "forest"
+    probability, audit = screen.score(features[0], thresholds)
+    if probability is None:
+        return forest(), "forest"
+    if audit:
+        screen.record_audit(probability, forest(), thresholds)
+    return probability, "prescreen"
+
 # Load Model
-MODEL_PATH = "model.pkl"
+MODEL_PATH = os.getenv("MODEL_PATH", "model.pkl")  # e.g. model_compact.pkl from train_pipeline.py --compress
+MODEL_COLUMNS_PATH = "model_columns.pkl"
+# Calibration data (y_true, y_probs) of the served model: calibration_data_compact.pkl for model_compact.pkl
+CALIBRATION_PATH = paired_path(MODEL_PATH, "model.pkl", "calibration_data.pkl")
+PRODUCT_RISKS_PATH = "product_fleet_risks.npz"  # Written by train_pipeline.py
+FLEET_CACHE_DIR = os.getenv("FLEET_CACHE_DIR", "fleet_cache")  # Written by chunked_precompute.py
+# Multi-output failure-mode model (TWF/HDF/PWF/OSF/RNF), written by train_pipeline.py
+FAILURE_MODE_MODEL_PATH = os.getenv("FAILURE_MODE_MODEL_PATH", "failure_mode_model.pkl")
+FAILURE_MODE_CALIBRATION_PATH = "failure_mode_calibration.pkl"
+FAILURE_MODE_RISKS_PATH = "failure_mode_risks.npz"
+
+def load_product_bundle():
+    bundle = load_bundle("product", MODEL_PATH, MODEL_COLUMNS_PATH, CALIBRATION_PATH, features=FEATURES["product"])
+    bundle.failure_modes = load_failure_modes(FAILURE_MODE_MODEL_PATH, FAILURE_MODE_CALIBRATION_PATH,
+                                              features=FEATURES["product"])
+    return bundle
 
 try:
-    if os.path.exists(MODEL_PATH):
-        model = joblib.load(MODEL_PATH)
-        print("✅ Model loaded successfully.")
-    else:
-        print("⚠️ Warning: model.pkl not found. API will fail on prediction.")
-        model = None
+    model_registry.activate(load_product_bundle())
+    print("✅ Model loaded successfully.")
+except FileNotFoundError:
+    print(f"⚠️ Warning: {MODEL_PATH} not found. API will fail on prediction.")
 except Exception as e:
     print(f"❌ Error loading model: {e}")
-    model = None
 
 # Input Schema
 class SensorInput(BaseModel):
@@ -55,21 +241,9 @@ class SensorInput(BaseModel):
     cost_fp: float = 500.0  # Default Cost of False Positive
     cost_fn: float = 5000.0 # Default Cost of False Negative
 
-# Columns expected by the trained model (must match training exactly)
-# Updated to match generalized_diff.csv features (No Units!)
-EXPECTED_COLUMNS = [
-    "Air temperature", 
-    "Process temperature", 
-    "Rotational speed", 
-    "Torque", 
-    "Tool wear", 
-    "Type_H", 
-    "Type_L", 
-    "Type_M",
-    "Temp_Diff",
-    "Power",
-    "Tool_Stress"
-]
+# Columns expected by the trained model (must match training exactly;
+# built by the shared pipeline in features.py)
+EXPECTED_COLUMNS = PRODUCT_FEATURES
 
 # ============== EMAIL ALERT SYSTEM ==============
 # Email Configuration from environment
@@ -82,6 +256,18 @@ RECEIVER_EMAILS = [e.strip() for e in RECEIVER_EMAILS_RAW.split(",") if e.strip(
 ALERT_THRESHOLD = float(os.getenv("ALERT_THRESHOLD", "70"))
 FOLLOWUP_SECONDS = int(os.getenv("FOLLOWUP_SECONDS", "300"))
 
+# Telegram follow-up calls share one pooled async client (see followup_client.py)
+CALLMEBOT_URL = os.getenv("CALLMEBOT_URL", "http://api.callmebot.com/start.php")
+CALLMEBOT_USER = os.getenv("CALLMEBOT_USER", "@JayRajankar")
+followup_client = FollowupClient(
+    CALLMEBOT_URL,
+    max_concurrency=int(os.getenv("FOLLOWUP_MAX_CONCURRENCY", "4")),
+    retries=int(os.getenv("FOLLOWUP_RETRIES", "3")),
+    min_interval=float(os.getenv("FOLLOWUP_MIN_INTERVAL", "60")),  # seconds between calls to one user (0: no spacing)
+    # Calls that would wait longer than this for their slot are dropped; unset never drops
+    max_wait=float(os.environ["FOLLOWUP_MAX_WAIT"]) if os.getenv("FOLLOWUP_MAX_WAIT") else None,
+)
+
 # Track last alert time per product to avoid spam
 last_alert_time = {}
 ALERT_COOLDOWN_SECONDS = 300  # 5 minutes between alerts per product
@@ -233,26 +419,19 @@ def send_alert_with_followup(product_id: str, metric_name: str, value: float, th
         print(f"⚠️ Email alert failed for {product_id}, attempting Telegram call anyway.")
 
     if FOLLOWUP_SECONDS >= 0:
-        def followup_call():
-            if FOLLOWUP_SECONDS > 0:
-                print(f"⏳ Waiting {FOLLOWUP_SECONDS} seconds before Telegram call...")
-                time.sleep(FOLLOWUP_SECONDS)
-            try:
-                params = {
-                    "source": "web",
-                    "user": "@JayRajankar",
-                    "text": f"Critical alert for {product_id}. Risk level at {value:.1f} percent. Immediate maintenance required.",
-                    "lang": "en-US-Standard-B",
-                }
-                url = "http://api.callmebot.com/start.php?" + urllib.parse.urlencode(params)
-                with urllib.request.urlopen(url, timeout=30) as response:
-                    response.read()
+        if FOLLOWUP_SECONDS > 0:
+            print(f"⏳ Telegram call for {product_id} scheduled in {FOLLOWUP_SECONDS} seconds...")
+        params = {
+            "source": "web",
+            "user": CALLMEBOT_USER,
+            "text": f"Critical alert for {product_id}. Risk level at {value:.1f} percent. Immediate maintenance required.",
+            "lang": "en-US-Standard-B",
+        }
+        def report(call):
+            if not call.cancelled() and call.exception() is None and call.result():
                 print(f"📞 Telegram call initiated for {product_id}")
-            except Exception as e:
-                print(f"❌ Telegram call failed: {e}")
-        
-        # Run followup in background thread
-        threading.Thread(target=followup_call, daemon=True).start()
+
+        followup_client.schedule(params, delay=FOLLOWUP_SECONDS, destination=CALLMEBOT_USER).add_done_callback(report)
 
 
 # Alert Request Schema
@@ -316,20 +495,15 @@ def get_alert_config():
 
 # ============== END EMAIL ALERT SYSTEM ==============
 
-# Load Calibration Data (y_true, y_probs)
-CALIBRATION_PATH = "calibration_data.pkl"
-calibration_data = None
-try:
-    if os.path.exists(CALIBRATION_PATH):
-        calibration_data = joblib.load(CALIBRATION_PATH)
+# Calibration data is loaded with the product model version
+if model_registry.get("product") is not None:
+    if model_registry.get("product").calibration:
         print("✅ Calibration data loaded for threshold optimization.")
     else:
-        print("⚠️ Warning: calibration_data.pkl not found. Dynamic optimization disabled.")
-except Exception as e:
-     print(f"❌ Error loading calibration data: {e}")
+        print(f"⚠️ Warning: {CALIBRATION_PATH} not found. Dynamic optimization disabled.")
 
 # Load Dataset for Product Stats
-DATASET_PATH = "generalized_dff.csv"
+DATASET_PATH = os.getenv("DATASET_PATH", "generalized_dff.csv")
 product_df = None
 try:
     if os.path.exists(DATASET_PATH):
@@ -356,6 +530,187 @@ try:
 except Exception as e:
     print(f"❌ Error loading dataset: {e}")
 
+# Index product rows by Product ID (in UDI order) once at load time
+product_registry = None
+if product_df is not None:
+    product_registry = AssetRegistry.from_column(product_df, "Product ID", sort_column="UDI")
+    print(f"✅ Product registry built for {len(product_registry)} products.")
+
+# --- History Arrays for Trend Queries ---
+# Each column is stored in registry order, so one asset's history is a
+# contiguous slice. "seq" is the reading's sequence number used by
+# since/until (UDI for products, reading index for turbines/generators).
+PRODUCT_HISTORY_COLUMNS = ["Air temperature", "Process temperature", "Rotational speed", "Torque", "Tool wear"]
+history_arrays = {}  # asset type -> {column: np.ndarray}
+
+def build_history_arrays(asset_type, registry, df, columns, risks_pct, seq_column=None):
+    arrays = {col: df[col].to_numpy(dtype=np.float64)[registry.order] for col in columns}
+    arrays["risk"] = np.asarray(risks_pct, dtype=np.float64)[registry.order]
+    if seq_column is not None and seq_column in df.columns:
+        arrays["seq"] = df[seq_column].to_numpy(dtype=np.int64)[registry.order]
+    else:
+        arrays["seq"] = np.arange(len(registry.order)) - np.repeat(registry.offsets[:-1], registry.counts())
+    history_arrays[asset_type] = arrays
+    bump_generation(asset_type)
+
+# --- Reading Store ---
+# Embedded SQLite store (WAL) of every asset's readings and scored risks,
+# indexed on (asset_id, seq). It holds the dataset readings plus readings
+# posted to /readings, and backs the history queries when enabled. Every
+# model input is stored (product Type as its PRODUCT_TYPES index) so posted
+# readings can be re-scored when the model changes.
+READING_STORE_PATH = os.getenv("READING_STORE_PATH", "readings.db")  # empty disables the store
+HISTORY_COLUMNS = {
+    "product": PRODUCT_HISTORY_COLUMNS + ["Type"],
+    "turbine": TURBINE_SENSORS,
+    "generator": GENERATOR_SENSORS,
+}
+PRODUCT_TYPE_CODES = {t: float(i) for i, t in enumerate(PRODUCT_TYPES)}
+reading_store = None
+if READING_STORE_PATH:
+    try:
+        reading_store = ReadingStore(READING_STORE_PATH, HISTORY_COLUMNS)
+        print(f"✅ Reading store opened at {READING_STORE_PATH}.")
+    except Exception as e:
+        print(f"⚠️ Reading store disabled ({e}); history served from memory.")
+
+ingest_lock = threading.Lock()  # seq assignment + insert + rolling stats, per process
+
+def store_columns(asset_type, columns):
+    """Reading store values of raw input columns (product Type encoded as a number)."""
+    values = {}
+    for name in HISTORY_COLUMNS[asset_type]:
+        if name == "Type":
+            values[name] = np.array([PRODUCT_TYPE_CODES.get(t, np.nan) for t in columns[name]], dtype=np.float64)
+        else:
+            values[name] = np.asarray(columns[name], dtype=np.float64)
+    return values
+
+def input_columns(asset_type, stored):
+    """Raw model inputs of readings read back from the store."""
+    columns = {name: stored[name] for name in INPUTS[asset_type] if name != "Type"}
+    if "Type" in INPUTS[asset_type]:
+        columns["Type"] = np.array(PRODUCT_TYPES)[stored["Type"].astype(np.int64)]
+    return columns
+
+def sync_reading_store(asset_type, registry, bundle, data_path, df):
+    """
+    Replace the dataset readings and their risks (from history_arrays) in
+    the reading store, once per model and data version. Posted readings are
+    kept and follow the new dataset readings.
+    """
+    if reading_store is None:
+        return
+    # The asset layout (fleet size, id column) and column list are part of the
+    # tag, so rows synced for another layout or schema are rewritten
+    key = f"dataset:{asset_type}"
+    tag = (f"{bundle.version}:{file_version(data_path)}:{registry.layout_version()}:"
+           f"{','.join(HISTORY_COLUMNS[asset_type])}")
+    try:
+        if reading_store.get_meta(key) == tag:
+            return
+        arrays = history_arrays[asset_type]
+        values = store_columns(asset_type, {name: df[name].to_numpy()[registry.order] for name in HISTORY_COLUMNS[asset_type]})
+        started = time.perf_counter()
+        n = reading_store.replace_dataset(asset_type, np.repeat(registry.ids, registry.counts()), arrays["seq"],
+                                          {**values, "risk": arrays["risk"]}, key, tag)
+        elapsed = time.perf_counter() - started
+        print(f"✅ Stored {n:,} {asset_type} readings in {elapsed:.2f}s ({n / max(elapsed, 1e-9):,.0f} rows/s).")
+    except Exception as e:
+        print(f"⚠️ Could not sync {asset_type} readings to the store: {e}")
+
+def replay_ingested_readings(asset_type, registry, bundle):
+    """
+    Readings posted to /readings (stored with source "posted"): re-scored
+    in the store when another model version scored them, then pushed into
+    the freshly seeded rolling statistics and risk indexes. Call with
+    ingest_lock held, after the store sync and the rolling stats are rebuilt
+    from the dataset.
+    """
+    if reading_store is None:
+        return 0
+    key = f"ingested:{asset_type}"
+    batches = [(asset_id, reading_store.range(asset_type, asset_id, source="posted")) for asset_id in registry.ids]
+    batches = [(asset_id, h) for asset_id, h in batches if len(h["seq"])]
+    if batches and reading_store.get_meta(key) != bundle.version:
+        stored = {name: np.concatenate([h[name] for _, h in batches]) for name in batches[0][1]}
+        risks = stored["risk"].copy()
+        scorable = ~np.any([np.isnan(stored[name]) for name in HISTORY_COLUMNS[asset_type]], axis=0)
+        if scorable.any():
+            X = feature_matrix(asset_type, input_columns(asset_type, {k: v[scorable] for k, v in stored.items()}))
+            risks[scorable] = bundle.model.predict_proba(X)[:, 1] * 100
+        ids = np.repeat([asset_id for asset_id, _ in batches], [len(h["seq"]) for _, h in batches])
+        reading_store.insert(asset_type, ids, stored["seq"], {**stored, "risk": risks})
+        splits = np.cumsum([len(h["seq"]) for _, h in batches])[:-1]
+        batches = [(asset_id, {**h, "risk": r}) for (asset_id, h), r in zip(batches, np.split(risks, splits))]
+    reading_store.set_meta(key, bundle.version)
+    if not batches:
+        return 0
+
+    stats = rolling_stats[asset_type]
+    for asset_id, h in batches:
+        for risk in h["risk"]:
+            stats.push(asset_id, risk)
+    publish_risk_index(asset_type, registry, {
+        "mean": stats.fleet("mean", FLEET_RISK_WINDOW[asset_type]),
+        "latest": stats.fleet("latest")
+    })
+    bump_generation(asset_type)
+    n = sum(len(h["seq"]) for _, h in batches)
+    print(f"✅ Replayed {n:,} posted {asset_type} readings into the rolling statistics.")
+    return n
+
+def publish_fleet_risk_stats(asset_type, registry, bundle, risks_pct):
+    """Rolling stats and risk indexes from the dataset risks plus the readings posted since."""
+    with ingest_lock:
+        seed_fleet_risk_stats(asset_type, registry, risks_pct)
+        try:
+            replay_ingested_readings(asset_type, registry, bundle)
+        except Exception as e:
+            print(f"⚠️ Could not replay posted {asset_type} readings: {e}")
+
+def query_history(asset_type, registry, asset_id, since=None, until=None, limit=None, points=None, method="lttb"):
+    """
+    Slice one asset's history to the [since, until] sequence range, keep the
+    latest `limit` readings and optionally downsample to `points` readings
+    following the risk curve. Returns {column: np.ndarray}.
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown method '{method}'. Use one of {list(DOWNSAMPLE_METHODS)}.")
+    if points is not None and points < MIN_POINTS:
+        raise HTTPException(status_code=400, detail=f"points must be at least {MIN_POINTS} (omit it for the full history).")
+
+    if reading_store is not None:
+        history = reading_store.range(asset_type, asset_id, since, until, limit)
+        if points is None:
+            return history
+        selected = downsample_indices(history["seq"], history["risk"], points, method)
+        return {col: values[selected] for col, values in history.items()}
+
+    arrays = history_arrays[asset_type]
+    i = registry.position(asset_id)
+    start, end = registry.offsets[i], registry.offsets[i + 1]
+    seq = arrays["seq"][start:end]
+
+    lo = 0 if since is None else int(np.searchsorted(seq, since, side="left"))
+    hi = len(seq) if until is None else int(np.searchsorted(seq, until, side="right"))
+    if limit is not None:
+        lo = max(lo, hi - max(0, limit))
+    lo = min(lo, hi)
+
+    if points is None:
+        return {col: values[start + lo:start + hi] for col, values in arrays.items()}
+
+    selected = downsample_indices(
+        arrays["seq"][start + lo:start + hi], arrays["risk"][start + lo:start + hi], points, method
+    ) + start + lo
+    return {col: values[selected] for col, values in arrays.items()}
+
+if product_registry is not None:
+    # Risks are filled in once fleet risks are pre-computed
+    build_history_arrays("product", product_registry, product_df, PRODUCT_HISTORY_COLUMNS,
+                         np.zeros(len(product_df)), seq_column="UDI")
+
 def optimize_threshold(y_true, y_probs, cost_fp, cost_fn, method="ensemble"):
     """
     Robust threshold optimization using multiple methods and ensemble approach.
@@ -608,113 +963,229 @@ def get_simple_threshold(y_true, y_probs, cost_fp, cost_fn):
     result = optimize_threshold(y_true, y_probs, cost_fp, cost_fn, method="ensemble")
     return result["optimal_threshold"]
 
-@app.get("/product/{product_id}")
-def get_product_stats(product_id: int):
-    # Use pre-computed cache if available, else fallback to raw df
-    source_df = fleet_risk_cache if not fleet_risk_cache.empty else product_df
-    
-    if source_df is None or source_df.empty:
+def product_history_payload(product_id, since=None, until=None, limit=None, points=None, method="lttb"):
+    if "product" not in history_arrays:
         raise HTTPException(status_code=503, detail="Dataset not ready/loaded.")
     
-    # Filter for Product_ID (dataset uses 'Product_1', 'Product_2' etc)
+    # Look up Product_ID rows (dataset uses 'Product_1', 'Product_2' etc)
     prod_str = f"Product_{product_id}"
-    subset = source_df[source_df['Product ID'] == prod_str]
-    
-    if subset.empty:
+    if prod_str not in product_registry:
         raise HTTPException(status_code=404, detail=f"Product {product_id} not found.")
 
-    # Sort by UDI for correct time-series playback
-    if 'UDI' in subset.columns:
-        subset = subset.sort_values(by='UDI')
+    h = query_history("product", product_registry, prod_str, since, until, limit, points, method)
 
     # Convert to list of dicts
-    history = []
-    for _, row in subset.iterrows():
-        # Handle missing Probability if falling back to raw df
-        prob = row.get('Probability', 0.0) 
-        
-        history.append({
-            "udi": int(row['UDI']),
-            "airTemp": float(row['Air temperature']),
-            "processTemp": float(row['Process temperature']),
-            "rpm": float(row['Rotational speed']),
-            "torque": float(row['Torque']),
-            "toolWear": float(row['Tool wear']),
-            "risk": round(prob * 100, 1), # Send as percentage 0-100
-            "prediction": 1 if prob > 0.5 else 0 
-        })
-        
+    history = [
+        {
+            "udi": udi,
+            "airTemp": air,
+            "processTemp": proc,
+            "rpm": rpm,
+            "torque": torque,
+            "toolWear": wear,
+            "risk": round(risk, 1), # Send as percentage 0-100
+            "prediction": 1 if risk > 50 else 0
+        }
+        for udi, air, proc, rpm, torque, wear, risk in zip(
+            h["seq"].tolist(),
+            h["Air temperature"].tolist(),
+            h["Process temperature"].tolist(),
+            h["Rotational speed"].tolist(),
+            h["Torque"].tolist(),
+            h["Tool wear"].tolist(),
+            h["risk"].tolist()
+        )
+    ]
+
     return history
 
+@app.get("/product/{product_id}")
+def get_product_stats(
+    request: Request,
+    product_id: int,
+    since: int = None,
+    until: int = None,
+    limit: int = None,
+    points: int = None,
+    method: str = "lttb"
+):
+    """
+    Product history in UDI order. since/until filter by UDI, limit keeps the
+    latest readings and points downsamples (lttb or minmax) for trend graphs.
+    """
+    return cached_json_response(
+        request, "product", ("product", product_id, since, until, limit, points, method),
+        lambda: product_history_payload(product_id, since, until, limit, points, method)
+    )
+
+# --- Per-asset Risk Index (top-K / threshold / percentile queries) ---
+RISK_INDEX_METRICS = ("mean", "latest")
+risk_indexes = {}  # asset type -> {metric: RiskIndex of per-asset risk %}
+
+def publish_risk_index(asset_type, registry, metric_scores):
+    """Load freshly pre-computed per-asset risks (%) into the asset type's risk indexes."""
+    indexes = risk_indexes.setdefault(asset_type, {})
+    for metric, scores in metric_scores.items():
+        indexes.setdefault(metric, RiskIndex()).rebuild(registry.ids, scores)
+
+# --- Rolling per-asset Risk Statistics (mean / max / EWMA / slope) ---
+ROLLING_WINDOWS = [int(w) for w in os.getenv("ROLLING_WINDOWS", "10,50,200").split(",") if w.strip()]
+# Window behind each asset type's default fleet risk (None = whole history)
+FLEET_RISK_WINDOW = {"product": None, "turbine": 10, "generator": None}
+rolling_stats = {}  # asset type -> RollingStats of per-reading risk %
+
+def seed_fleet_risk_stats(asset_type, registry, risks_pct):
+    """
+    Load each asset's pre-computed risk history (%) into rolling statistics
+    and publish the per-asset figures to the risk index.
+    """
+    windows = set(ROLLING_WINDOWS)
+    if FLEET_RISK_WINDOW[asset_type]:
+        windows.add(FLEET_RISK_WINDOW[asset_type])
+    stats = RollingStats(registry.ids, windows)
+    for asset_id in registry.ids:
+        stats.seed(asset_id, risks_pct[registry.rows(asset_id)])
+    rolling_stats[asset_type] = stats
+    bump_generation(asset_type)
+
+    publish_risk_index(asset_type, registry, {
+        "mean": stats.fleet("mean", FLEET_RISK_WINDOW[asset_type]),
+        "latest": stats.fleet("latest")
+    })
+
+def read_fleet_risk(asset_type, window=None, stat="mean"):
+    """Per-asset risk figure (registry order) for a fleet query, read from the rolling stats."""
+    try:
+        return rolling_stats[asset_type].fleet(stat, window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # --- Pre-calculate Fleet Risks (Batch Prediction) ---
 fleet_risk_cache = pd.DataFrame()
 
-def precompute_fleet_risks():
+def product_feature_frame():
+    """Model input matrix for every row of product_df (shared feature pipeline)."""
+    return feature_matrix("product", product_df)
+
+def stored_product_risks(bundle):
+    """Risks saved for this model version and dataset by train_pipeline.py or chunked_precompute.py."""
+    risks = load_precomputed_risks(bundle, PRODUCT_RISKS_PATH, DATASET_PATH)
+    if risks is None:
+        risks = cached_risks(FLEET_CACHE_DIR, bundle.version, DATASET_PATH)
+    return risks
+
+def warm_product_bundle(bundle):
+    """Pre-compute a product model version's fleet risks and default threshold before it serves."""
+    if product_df is not None:
+        X_full = product_feature_frame()
+        if bundle.risks is None:  # not already scored by score_startup_risks
+            bundle.risks = stored_product_risks(bundle)
+        if bundle.risks is None:
+            bundle.risks = shared_risks(bundle, DATASET_PATH, X_full) # Probability of Class 1
+        warm_prescreen(bundle, X_full)
+        warm_drift(bundle, X_full)
+        if bundle.failure_modes is not None:
+            modes = bundle.failure_modes
+            modes.risks = load_precomputed_risks(modes, FAILURE_MODE_RISKS_PATH, DATASET_PATH)
+            if modes.risks is None:
+                modes.risks = modes.predict(X_full)
+    warm_explainer(bundle)
+    if bundle.calibration:
+        bundle.threshold_sample = (bundle.calibration['y_true'], bundle.calibration['y_probs'])
+        bundle.threshold(SensorInput.model_fields['cost_fp'].default,
+                         SensorInput.model_fields['cost_fn'].default, optimize_threshold)
+    if bundle.failure_modes is not None:
+        bundle.failure_modes.thresholds(SensorInput.model_fields['cost_fp'].default,
+                                        SensorInput.model_fields['cost_fn'].default, optimize_threshold)
+    bundle.warmed = True
+
+product_failure_modes = None  # (products, modes) mean mode probability in registry order
+
+def publish_failure_mode_risks(bundle):
+    """Per-product mean failure-mode probabilities from the version's dataset risks."""
+    global product_failure_modes
+    modes = bundle.failure_modes
+    if modes is None or modes.risks is None:
+        product_failure_modes = None
+        return
+    counts = np.maximum(product_registry.counts(), 1)
+    sums = np.add.reduceat(modes.risks[product_registry.order], product_registry.offsets[:-1], axis=0)
+    product_failure_modes = sums / counts[:, None]
+
+def failure_mode_payload(modes, probabilities, thresholds=None):
+    """{mode: {name, probability, threshold, flagged}} plus the most likely mode."""
+    result = {}
+    for k, mode in enumerate(modes.modes):
+        entry = {"name": FAILURE_MODE_NAMES.get(mode, mode), "probability": round(float(probabilities[k]), 4)}
+        if thresholds is not None:
+            entry["threshold"] = round(thresholds[k], 4)
+            entry["flagged"] = bool(probabilities[k] >= thresholds[k])
+        result[mode] = entry
+    return {"most_likely": modes.modes[int(np.argmax(probabilities))], "modes": result}
+
+def precompute_fleet_risks(bundle=None):
     global fleet_risk_cache
-    if product_df is None or model is None:
+    bundle = bundle or model_registry.get("product")
+    if product_df is None or bundle is None:
         return
 
     print("⚙️ Pre-computing fleet risks...")
     try:
-        # Create a working copy
-        df_full = product_df.copy()
-
-        # Apply Feature Engineering (Must match training!)
-        df_full['Temp_Diff'] = df_full['Process temperature'] - df_full['Air temperature']
-        df_full['Power'] = df_full['Torque'] * df_full['Rotational speed']
-        df_full['Tool_Stress'] = df_full['Tool wear'] * df_full['Torque']
+        if not bundle.warmed:
+            warm_product_bundle(bundle)
+        probs = bundle.risks
 
-        # One-Hot Encoding
-        df_encoded = pd.get_dummies(df_full, columns=['Type'], drop_first=False)
-        
-        # Ensure all encoded cols exist
-        for col in ["Type_H", "Type_L", "Type_M"]:
-             if col not in df_encoded.columns:
-                 df_encoded[col] = 0
-        
-        # Select features in order
-        X_full = df_encoded[EXPECTED_COLUMNS]
-        
-        # Batch Predict
-        probs = model.predict_proba(X_full)[:, 1] # Probability of Class 1
-        
-        # Store results
-        fleet_risk_cache = product_df.copy()
-        fleet_risk_cache['Probability'] = probs
+        # Store results (per row, aligned with product_df; no copy of the readings)
+        fleet_risk_cache = pd.DataFrame({'Probability': probs})
         fleet_risk_cache['Risk_Category'] = pd.cut(
             fleet_risk_cache['Probability'], 
             bins=[-0.1, 0.3933, 0.7, 1.1], 
             labels=["Low Risk", "Medium Risk", "High Risk"]
         )
+        publish_failure_mode_risks(bundle)
+        build_history_arrays("product", product_registry, product_df, PRODUCT_HISTORY_COLUMNS,
+                             probs * 100, seq_column="UDI")
+        sync_reading_store("product", product_registry, bundle, DATASET_PATH, product_df)
+        publish_fleet_risk_stats("product", product_registry, bundle, probs * 100)
         print("✅ Fleet risks pre-computed.")
         
     except Exception as e:
         print(f"❌ Error pre-computing fleet risks: {e}")
 
-# Call on startup (or when needed)
-precompute_fleet_risks()
-
 class FleetRequest(BaseModel):
-    product_ids: list[int]
-
-@app.post("/fleet/status")
-def get_fleet_status(req: FleetRequest):
-    if fleet_risk_cache.empty:
+    product_ids: list[int] = None  # None = whole fleet
+    offset: int = 0
+    limit: int = None
+    top: int = None  # Only the N riskiest products
+    window: int = None  # Rolling window (readings); None = whole history
+    stat: str = "mean"  # mean, max, ewma, slope or latest
+
+def product_fleet_payload(req: FleetRequest):
+    if fleet_risk_cache.empty or "product" not in rolling_stats:
          raise HTTPException(status_code=503, detail="Fleet risks not computed.")
     
-    # Map valid Products (e.g. 1 -> "Product_1")
-    target_products = [f"Product_{pid}" for pid in req.product_ids]
-    
-    # Filter
-    subset = fleet_risk_cache[fleet_risk_cache['Product ID'].isin(target_products)]
+    # Per-product risk probability from the rolling statistics
+    product_risk = read_fleet_risk("product", req.window, req.stat) / 100
     
-    if subset.empty:
+    # Map valid Products (e.g. 1 -> "Product_1")
+    positions = None
+    if req.product_ids is not None:
+        positions = product_registry.positions([f"Product_{pid}" for pid in req.product_ids])
+
+    # Page or top-K over the per-product risk
+    positions = product_registry.select(product_risk, positions, req.offset, req.limit, req.top)
+
+    if len(positions) == 0:
         return []
 
-    # Aggregate by Product ID - calculate average risk probability per product
-    product_risks = subset.groupby('Product ID').agg({
-        'Probability': 'mean'
-    }).reset_index()
+    product_risks = pd.DataFrame({
+        'Product ID': [product_registry.ids[p] for p in positions],
+        'Probability': product_risk[positions]
+    })
+    mode_risks = product_failure_modes
+    modes = model_registry.get("product").failure_modes if mode_risks is not None else None
+    if modes is not None:
+        product_risks['Failure_Mode'] = [modes.modes[k] for k in np.argmax(mode_risks[positions], axis=1)]
     
     # Assign risk category based on average probability
     def get_risk_category(prob):
@@ -735,11 +1206,14 @@ def get_fleet_status(req: FleetRequest):
         if not cat_subset.empty:
             children = []
             for _, row in cat_subset.iterrows():
-                children.append({
+                child = {
                     "name": row['Product ID'],
                     "size": round(float(row['Probability']) * 100, 1),  # Size by risk percentage
                     "prob": round(float(row['Probability']) * 100, 1)   # Risk probability as percentage
-                })
+                }
+                if modes is not None:
+                    child["failure_mode"] = row['Failure_Mode']  # Most likely mode (mean probability)
+                children.append(child)
             
             tree_data.append({
                 "name": category,
@@ -748,69 +1222,62 @@ def get_fleet_status(req: FleetRequest):
             
     return tree_data
 
+@app.post("/fleet/status")
+def get_fleet_status(request: Request, req: FleetRequest):
+    return cached_json_response(
+        request, "product", ("fleet", json.dumps(vars(req), sort_keys=True)),
+        lambda: product_fleet_payload(req)
+    )
+
+def score_failure_modes(modes, features, reading, cost_fp, cost_fn):
+    """All mode probabilities of one reading (one traversal of the multi-output forest, memoized)."""
+    key = None
+    if PREDICTION_CACHE_SIZE > 0:
+        key = prediction_cache.key("product", modes.version, reading)
+        probabilities = prediction_cache.get(key)
+    if key is None or probabilities is None:
+        probabilities = tuple(modes.predict(features)[0].tolist())
+        if key is not None:
+            prediction_cache.put(key, probabilities)
+    return failure_mode_payload(modes, probabilities, modes.thresholds(cost_fp, cost_fn, optimize_threshold))
+
 @app.post("/predict")
-def predict_failure(data: SensorInput):
-    if not model:
+def predict_failure(data: SensorInput, explain: bool = False):
+    bundle = model_registry.get("product")
+    if bundle is None:
         raise HTTPException(status_code=503, detail="Model is not loaded.")
+    model = bundle.model
 
     try:
-        # 1. Feature Engineering
-        # Temp_Diff = Process - Air
-        temp_diff = data.proc_temp - data.air_temp
-        
-        # Power = Torque * RPM
-        power = data.torque * data.rpm
-
-        # Tool_Stress = Tool Wear * Torque
-        tool_stress = data.tool_wear * data.torque
-
-        # One-Hot Encoding for Type
-        type_h = 1 if data.Type == 'H' else 0
-        type_l = 1 if data.Type == 'L' else 0
-        type_m = 1 if data.Type == 'M' else 0
-
-        # 2. Create Feature Vector in exact order
-        features_dict = {
-            'Air temperature': data.air_temp,
-            'Process temperature': data.proc_temp,
-            'Rotational speed': data.rpm,
-            'Torque': data.torque,
-            'Tool wear': data.tool_wear,
-            'Type_H': type_h,
-            'Type_L': type_l,
-            'Type_M': type_m,
-            'Temp_Diff': temp_diff,
-            'Power': power,
-            'Tool_Stress': tool_stress
-        }
-        
-        features = pd.DataFrame([features_dict])
-        
-        # Ensure correct column order
-        features = features[EXPECTED_COLUMNS]
-
-        # 3. Prediction with Cost-Optimized Threshold
-        try:
-            # Get probability of class 1 (Failure)
-            probability_class_1 = model.predict_proba(features)[0][1]
-        except:
-             # Fallback if model doesn't support proba (unlikely for RandomForest)
-            probability_class_1 = float(model.predict(features)[0])
+        # 1. Features in model column order (Temp_Diff, Power, Tool_Stress, Type one-hot)
+        reading = (data.Type, data.air_temp, data.proc_temp, data.rpm, data.torque, data.tool_wear)
+        features = product_row(*reading, out=row_buffers.get("product"))
 
+        # 2. Prediction with Cost-Optimized Threshold
         # COST OPTIMIZATION LOGIC - Using robust ensemble algorithm
         threshold_result = None
-        if calibration_data:
+        if bundle.threshold_sample is not None:
              # Calculate optimal threshold dynamically based on user input costs
-             threshold_result = optimize_threshold(
-                 calibration_data['y_true'], 
-                 calibration_data['y_probs'], 
-                 data.cost_fp, 
-                 data.cost_fn,
-                 method="ensemble"
-             )
+             # (cached per cost pair for the active model version)
+             threshold_result = bundle.threshold(data.cost_fp, data.cost_fn, optimize_threshold)
              THRESHOLD = threshold_result["optimal_threshold"]
         else:
              THRESHOLD = 0.3933 # Default fallback
+        # Confirmed outcomes take over once enough were recorded
+        outcomes = outcome_threshold("product", bundle, data.cost_fp, data.cost_fn)
+        if outcomes:
+            THRESHOLD = outcomes["threshold"]
+
+        try:
+            # Get probability of class 1 (Failure); the pre-screen answers
+            # readings that are clearly on one side of the threshold
+            probability_class_1, probability_source = two_tier_probability(
+                bundle, features, (THRESHOLD,), reading=reading
+            )
+        except:
+             # Fallback if model doesn't support proba (unlikely for RandomForest)
+            probability_class_1 = float(model.predict(features)[0])
+            probability_source = "forest"
         
         if probability_class_1 >= THRESHOLD:
             prediction = 1
@@ -824,6 +1291,7 @@ def predict_failure(data: SensorInput):
         response = {
             "prediction": int(prediction),
             "probability": round(float(probability_class_1), 4),
+            "probability_source": probability_source,
             "threshold": round(float(THRESHOLD), 4),
             "status": status_msg,
             "recommendation": recommendation
@@ -836,6 +1304,14 @@ def predict_failure(data: SensorInput):
                 "confidence_interval": threshold_result["confidence_interval"],
                 "annual_savings_estimate": threshold_result["annual_savings_estimate"]
             }
+        response["threshold_source"] = "outcomes" if outcomes else "calibration"
+        if outcomes:
+            response["outcomes"] = threshold_details(outcomes)
+        if bundle.failure_modes is not None:
+            response["failure_modes"] = score_failure_modes(bundle.failure_modes, features, reading,
+                                                            data.cost_fp, data.cost_fn)
+        if explain:
+            response["explanation"] = explanation(bundle, features)
         
         return response
 
@@ -846,26 +1322,29 @@ def predict_failure(data: SensorInput):
 # ============== TURBINE SYSTEM ==============
 
 # Load Turbine Model and Data
-TURBINE_MODEL_PATH = "turbine_model.pkl"
+TURBINE_MODEL_PATH = os.getenv("TURBINE_MODEL_PATH", "turbine_model.pkl")
 TURBINE_COLUMNS_PATH = "turbine_model_columns.pkl"
-TURBINE_DATA_PATH = "Turbine_test_data.csv"
+TURBINE_CALIBRATION_PATH = paired_path(TURBINE_MODEL_PATH, "turbine_model.pkl", "turbine_calibration_data.pkl")
+TURBINE_RISKS_PATH = "turbine_fleet_risks.npz"
+TURBINE_DATA_PATH = os.getenv("TURBINE_DATA_PATH", "Turbine_test_data.csv")
+TURBINE_FLEET_SIZE = int(os.getenv("TURBINE_FLEET_SIZE", "10"))  # Used when the data has no 'Turbine ID' column
+
+def load_turbine_bundle():
+    if not os.path.exists(TURBINE_COLUMNS_PATH):
+        raise FileNotFoundError(f"{TURBINE_COLUMNS_PATH} not found")
+    return load_bundle("turbine", TURBINE_MODEL_PATH, TURBINE_COLUMNS_PATH, TURBINE_CALIBRATION_PATH, features=FEATURES["turbine"])
 
 try:
     if os.path.exists(TURBINE_MODEL_PATH) and os.path.exists(TURBINE_COLUMNS_PATH):
-        turbine_model = joblib.load(TURBINE_MODEL_PATH)
-        turbine_columns = joblib.load(TURBINE_COLUMNS_PATH)
+        model_registry.activate(load_turbine_bundle())
         turbine_data = pd.read_csv(TURBINE_DATA_PATH)
-        print(f"✅ Turbine model loaded. Columns: {turbine_columns}")
+        print(f"✅ Turbine model loaded. Columns: {model_registry.get('turbine').columns}")
         print(f"✅ Turbine test data loaded. Shape: {turbine_data.shape}")
     else:
         print("⚠️ Warning: turbine model files not found.")
-        turbine_model = None
-        turbine_columns = None
         turbine_data = None
 except Exception as e:
     print(f"❌ Error loading turbine model: {e}")
-    turbine_model = None
-    turbine_columns = None
     turbine_data = None
 
 # Turbine Input Schema
@@ -875,67 +1354,86 @@ class TurbineInput(BaseModel):
     AP: float  # Air Pressure
     RH: float  # Relative Humidity
 
-def create_turbine_features(AT, V, AP, RH):
-    """
-    Create engineered features for turbine model prediction
-    Must match the features used during training
-    """
-    # Create engineered features
-    temp_press_ratio = AT / (AP / 1000)
-    voltage_temp = V * AT
-    humidity_factor = (RH / 100) * V
-    power_est = V * AT * (AP / 1000)
-    
-    # Return DataFrame with all features in correct order
-    features_dict = {
-        'AT': AT,
-        'V': V,
-        'AP': AP,
-        'RH': RH,
-        'Temp_Press_Ratio': temp_press_ratio,
-        'Voltage_Temp': voltage_temp,
-        'Humidity_Factor': humidity_factor,
-        'Power_Est': power_est
-    }
-    
-    return pd.DataFrame([features_dict])
+# --- Pre-calculate Turbine Risks (Batch Prediction) ---
+turbine_registry = None
+THRESHOLD_SAMPLE_SIZE = 500  # Readings behind the turbine/generator cost-optimized thresholds
+DEFAULT_COSTS = (500, 5000)  # (cost_fp, cost_fn) defaults of the cost endpoints
 
-@app.get("/turbine/{turbine_id}")
-def get_turbine_data(turbine_id: str):
-    """
-    Get historical data for a specific turbine with predicted risk
-    """
-    if turbine_data is None or turbine_model is None:
+def threshold_sample_rows(df):
+    """Row positions of the fixed random sample used for threshold optimization."""
+    sample = df.sample(n=min(THRESHOLD_SAMPLE_SIZE, len(df)), random_state=42)
+    return df.index.get_indexer(sample.index)
+
+def warm_threshold_sample(bundle, rows):
+    if bundle.calibration:
+        # Out-of-fold labels and probabilities from train_pipeline.py
+        bundle.threshold_sample = (bundle.calibration['y_true'], bundle.calibration['y_probs'])
+    else:
+        y_probs = bundle.risks[rows]
+        # Create synthetic ground truth based on high probability threshold
+        bundle.threshold_sample = ((y_probs > 0.5).astype(int), y_probs)
+    bundle.threshold(*DEFAULT_COSTS, optimize_threshold)
+
+def warm_turbine_bundle(bundle):
+    """Score turbine_data and the threshold sample with a turbine model version before it serves."""
+    if turbine_data is None:
+        return
+    features = feature_matrix("turbine", turbine_data)
+    if bundle.risks is None:  # not already scored by score_startup_risks
+        bundle.risks = load_precomputed_risks(bundle, TURBINE_RISKS_PATH, TURBINE_DATA_PATH)
+    if bundle.risks is None:
+        bundle.risks = shared_risks(bundle, TURBINE_DATA_PATH, features)
+    warm_prescreen(bundle, features)
+    warm_drift(bundle, features)
+    warm_explainer(bundle)
+    warm_threshold_sample(bundle, threshold_sample_rows(turbine_data))
+    bundle.warmed = True
+
+def precompute_turbine_risks(bundle=None):
+    global turbine_registry
+    bundle = bundle or model_registry.get("turbine")
+    if turbine_data is None or bundle is None:
+        return
+
+    print("⚙️ Pre-computing turbine risks...")
+    try:
+        if not bundle.warmed:
+            warm_turbine_bundle(bundle)
+        turbine_risks = bundle.risks  # Failure probability per row of turbine_data
+        turbine_registry = AssetRegistry.for_dataset(turbine_data, "Turbine ID", TURBINE_FLEET_SIZE, "Turbine")
+        build_history_arrays("turbine", turbine_registry, turbine_data, ['AT', 'V', 'AP', 'RH'], turbine_risks * 100)
+        sync_reading_store("turbine", turbine_registry, bundle, TURBINE_DATA_PATH, turbine_data)
+        publish_fleet_risk_stats("turbine", turbine_registry, bundle, turbine_risks * 100)
+        print(f"✅ Turbine risks pre-computed for {len(turbine_registry)} turbines.")
+    except Exception as e:
+        print(f"❌ Error pre-computing turbine risks: {e}")
+
+def turbine_history_payload(turbine_id, since=None, until=None, limit=None, points=None, method="lttb"):
+    if "turbine" not in history_arrays:
         raise HTTPException(status_code=503, detail="Turbine system not loaded")
+    if turbine_id not in turbine_registry:
+        raise HTTPException(status_code=404, detail=f"Turbine {turbine_id} not found")
+    
+    if any(v is not None for v in (since, until, limit, points)):
+        h = query_history("turbine", turbine_registry, turbine_id, since, until, limit, points, method)
+    else:
+        # Playback window: every 3rd of the latest 300 readings for 100 points
+        # total, ending at the newest reading and wrapping around within this
+        # turbine's own readings when it has fewer
+        SAMPLE_INTERVAL, PLAYBACK_POINTS = 3, 100
+        h = query_history("turbine", turbine_registry, turbine_id, limit=PLAYBACK_POINTS * SAMPLE_INTERVAL)
+        n = max(len(h["seq"]), 1)
+        sample_indices = (n - 1 - np.arange(PLAYBACK_POINTS - 1, -1, -1) * SAMPLE_INTERVAL) % n
+        h = {col: values[sample_indices] for col, values in h.items()} if len(h["seq"]) else h
     
     try:
-        # Extract turbine number for deterministic sampling
-        turbine_num = int(turbine_id.split('_')[-1]) if '_' in turbine_id else 1
-        start_idx = (turbine_num * 19) % len(turbine_data)
-        
-        # Get a window of data (sample every 3rd point for 100 points total)
-        SAMPLE_INTERVAL = 3
-        sample_indices = range(start_idx, start_idx + (100 * SAMPLE_INTERVAL), SAMPLE_INTERVAL)
-        
-        history = []
-        for idx in sample_indices:
-            actual_idx = idx % len(turbine_data)  # Wrap around
-            row = turbine_data.iloc[actual_idx]
-            
-            # Create features with engineering
-            input_df = create_turbine_features(row['AT'], row['V'], row['AP'], row['RH'])
-            
-            # Predict risk
-            probabilities = turbine_model.predict_proba(input_df)[0]
-            risk = float(probabilities[1] * 100)  # Failure probability percentage
-            
-            history.append({
-                "AT": float(row['AT']),
-                "V": float(row['V']),
-                "AP": float(row['AP']),
-                "RH": float(row['RH']),
-                "risk": risk
-            })
+        # Failure probability percentage comes from the pre-computed risks
+        history = [
+            {"AT": at, "V": v, "AP": ap, "RH": rh, "risk": risk}
+            for at, v, ap, rh, risk in zip(
+                h["AT"].tolist(), h["V"].tolist(), h["AP"].tolist(), h["RH"].tolist(), h["risk"].tolist()
+            )
+        ]
         
         return {
             "turbine_id": turbine_id,
@@ -947,26 +1445,50 @@ def get_turbine_data(turbine_id: str):
         print(f"Turbine data error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/turbine/{turbine_id}")
+def get_turbine_data(
+    request: Request,
+    turbine_id: str,
+    since: int = None,
+    until: int = None,
+    limit: int = None,
+    points: int = None,
+    method: str = "lttb"
+):
+    """
+    Get historical data for a specific turbine with predicted risk
+    since/until select reading numbers, limit keeps the latest readings and
+    points downsamples (lttb or minmax); without them a 100-point playback
+    window is returned
+    """
+    return cached_json_response(
+        request, "turbine", ("turbine", turbine_id, since, until, limit, points, method),
+        lambda: turbine_history_payload(turbine_id, since, until, limit, points, method)
+    )
+
 @app.post("/turbine/predict")
-def predict_turbine(data: TurbineInput):
+def predict_turbine(data: TurbineInput, explain: bool = False):
     """
     Predict turbine failure risk based on sensor readings
     """
-    if turbine_model is None:
+    bundle = model_registry.get("turbine")
+    if bundle is None:
         raise HTTPException(status_code=503, detail="Turbine model not loaded")
     
     try:
         # Create features with engineering
-        input_df = create_turbine_features(data.AT, data.V, data.AP, data.RH)
+        reading = (data.AT, data.V, data.AP, data.RH)
+        features = turbine_row(*reading, out=row_buffers.get("turbine"))
         
-        # Get prediction and probability
-        prediction = turbine_model.predict(input_df)[0]
-        probabilities = turbine_model.predict_proba(input_df)[0]
-        risk_probability = float(probabilities[1] * 100)
+        # Get probability (pre-screen or forest) and the forest's class decision
+        probability, probability_source = two_tier_probability(bundle, features, (0.5,), reading=reading)
+        prediction = 1 if probability > 0.5 else 0
+        risk_probability = float(probability * 100)
         
-        return {
+        response = {
             "prediction": int(prediction),
             "risk_probability": risk_probability,
+            "probability_source": probability_source,
             "status": "High Risk" if prediction == 1 else "Normal",
             "sensor_data": {
                 "AT": data.AT,
@@ -975,44 +1497,31 @@ def predict_turbine(data: TurbineInput):
                 "RH": data.RH
             }
         }
+        if explain:
+            response["explanation"] = explanation(bundle, features)
+        return response
     
     except Exception as e:
         print(f"Turbine prediction error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/turbine/fleet/status")
-def get_turbine_fleet_status():
-    """
-    Get aggregated risk status for all turbines in the fleet
-    """
-    if turbine_data is None or turbine_model is None:
+def turbine_fleet_payload(offset=0, limit=None, top=None, window=FLEET_RISK_WINDOW["turbine"], stat="mean"):
+    if turbine_registry is None or "turbine" not in rolling_stats:
         raise HTTPException(status_code=503, detail="Turbine system not loaded")
     
+    turbine_fleet_risk = read_fleet_risk("turbine", window, stat)
+    
     try:
-        fleet_status = []
+        positions = turbine_registry.select(turbine_fleet_risk, None, offset, limit, top)
         
-        for i in range(1, 11):  # Turbine_1 to Turbine_10
-            turbine_id = f"Turbine_{i}"
-            start_idx = (i * 19) % len(turbine_data)
-            
-            # Get recent window (last 10 points for averaging)
-            indices = [(start_idx + j) % len(turbine_data) for j in range(10)]
-            risks = []
-            
-            for idx in indices:
-                row = turbine_data.iloc[idx]
-                # Create features with engineering
-                input_df = create_turbine_features(row['AT'], row['V'], row['AP'], row['RH'])
-                probabilities = turbine_model.predict_proba(input_df)[0]
-                risks.append(probabilities[1] * 100)
-            
-            avg_risk = float(np.mean(risks))
-            
-            fleet_status.append({
-                "turbine_id": turbine_id,
-                "risk": avg_risk,
-                "name": turbine_id
-            })
+        fleet_status = [
+            {
+                "turbine_id": turbine_registry.ids[p],
+                "risk": float(turbine_fleet_risk[p]),
+                "name": turbine_registry.ids[p]
+            }
+            for p in positions
+        ]
         
         return {"fleet": fleet_status}
     
@@ -1020,29 +1529,52 @@ def get_turbine_fleet_status():
         print(f"Fleet status error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/turbine/fleet/status")
+def get_turbine_fleet_status(
+    request: Request,
+    offset: int = 0,
+    limit: int = None,
+    top: int = None,
+    window: int = FLEET_RISK_WINDOW["turbine"],
+    stat: str = "mean"
+):
+    """
+    Get aggregated risk status for the turbine fleet
+    Supports pagination (offset/limit), the N riskiest turbines (top) and
+    rolling statistics (stat) over a selectable window of recent readings
+    """
+    return cached_json_response(
+        request, "turbine", ("turbine_fleet", offset, limit, top, window, stat),
+        lambda: turbine_fleet_payload(offset, limit, top, window, stat)
+    )
+
 # ============== GENERATOR SYSTEM ==============
 
 # Load Generator Model and Data
-GENERATOR_MODEL_PATH = "generator_model.pkl"
+GENERATOR_MODEL_PATH = os.getenv("GENERATOR_MODEL_PATH", "generator_model.pkl")
 GENERATOR_COLUMNS_PATH = "generator_model_columns.pkl"
-GENERATOR_DATA_PATH = "generator_test_data.csv"
+GENERATOR_CALIBRATION_PATH = paired_path(GENERATOR_MODEL_PATH, "generator_model.pkl", "generator_calibration_data.pkl")
+GENERATOR_RISKS_PATH = "generator_fleet_risks.npz"
+GENERATOR_DATA_PATH = os.getenv("GENERATOR_DATA_PATH", "generator_test_data.csv")
+GENERATOR_FLEET_SIZE = int(os.getenv("GENERATOR_FLEET_SIZE", "10"))  # Used when the data has no 'Generator ID' column
+GENERATOR_FEATURES = GENERATOR_SENSORS
+
+def load_generator_bundle():
+    if not os.path.exists(GENERATOR_COLUMNS_PATH):
+        raise FileNotFoundError(f"{GENERATOR_COLUMNS_PATH} not found")
+    return load_bundle("generator", GENERATOR_MODEL_PATH, GENERATOR_COLUMNS_PATH, GENERATOR_CALIBRATION_PATH, features=FEATURES["generator"])
 
 try:
     if os.path.exists(GENERATOR_MODEL_PATH) and os.path.exists(GENERATOR_COLUMNS_PATH):
-        generator_model = joblib.load(GENERATOR_MODEL_PATH)
-        generator_columns = joblib.load(GENERATOR_COLUMNS_PATH)
+        model_registry.activate(load_generator_bundle())
         generator_data = pd.read_csv(GENERATOR_DATA_PATH)
-        print(f"✅ Generator model loaded. Columns: {generator_columns}")
+        print(f"✅ Generator model loaded. Columns: {model_registry.get('generator').columns}")
         print(f"✅ Generator test data loaded. Shape: {generator_data.shape}")
     else:
         print("⚠️ Warning: generator model files not found.")
-        generator_model = None
-        generator_columns = None
         generator_data = None
 except Exception as e:
     print(f"❌ Error loading generator model: {e}")
-    generator_model = None
-    generator_columns = None
     generator_data = None
 
 # Generator Input Schema
@@ -1053,61 +1585,123 @@ class GeneratorInput(BaseModel):
     torque: float
     wear: float
 
-def create_generator_features(air_temp, core_temp, rpm, torque, wear):
-    """
-    Create feature DataFrame for generator model prediction
-    Uses only raw features as model was trained on them
-    """
-    # Return DataFrame with raw features only
-    features_dict = {
-        'air_temp': air_temp,
-        'core_temp': core_temp,
-        'rpm': rpm,
-        'torque': torque,
-        'wear': wear
-    }
-    
-    return pd.DataFrame([features_dict])
+def normalize_generator_id(generator_id):
+    """Accept both 'Generator_3' and '3'."""
+    return generator_id if '_' in generator_id else f"Generator_{int(generator_id)}"
 
-@app.get("/generator/{generator_id}")
-def get_generator_data(generator_id: str):
+# --- Pre-calculate Generator Risks (Batch Prediction) ---
+generator_registry = None
+
+def warm_generator_bundle(bundle):
+    """Score generator_data and the threshold sample with a generator model version before it serves."""
+    if generator_data is None:
+        return
+    features = feature_matrix("generator", generator_data)
+    if bundle.risks is None:  # not already scored by score_startup_risks
+        bundle.risks = load_precomputed_risks(bundle, GENERATOR_RISKS_PATH, GENERATOR_DATA_PATH)
+    if bundle.risks is None:
+        bundle.risks = shared_risks(bundle, GENERATOR_DATA_PATH, features)
+    warm_prescreen(bundle, features)
+    warm_drift(bundle, features)
+    warm_explainer(bundle)
+    warm_threshold_sample(bundle, threshold_sample_rows(generator_data))
+    bundle.warmed = True
+
+def precompute_generator_risks(bundle=None):
+    global generator_registry
+    bundle = bundle or model_registry.get("generator")
+    if generator_data is None or bundle is None:
+        return
+
+    print("⚙️ Pre-computing generator risks...")
+    try:
+        if not bundle.warmed:
+            warm_generator_bundle(bundle)
+        generator_risks = bundle.risks  # Failure probability per row of generator_data
+        generator_registry = AssetRegistry.for_dataset(generator_data, "Generator ID", GENERATOR_FLEET_SIZE, "Generator")
+        build_history_arrays("generator", generator_registry, generator_data, GENERATOR_FEATURES, generator_risks * 100)
+        sync_reading_store("generator", generator_registry, bundle, GENERATOR_DATA_PATH, generator_data)
+        publish_fleet_risk_stats("generator", generator_registry, bundle, generator_risks * 100)
+        print(f"✅ Generator risks pre-computed for {len(generator_registry)} generators.")
+    except Exception as e:
+        print(f"❌ Error pre-computing generator risks: {e}")
+
+# --- Startup Scoring ---
+def score_startup_risks():
     """
-    Get historical data and predictions for a specific generator
+    Score the datasets of all loaded models that have neither stored risks
+    nor a shared table in one process pool (partitioned by asset type and
+    row chunk) before the per-asset warm-up and caches are built. Asset types
+    another worker is already producing are mapped once it has published.
     """
-    if generator_model is None or generator_data is None:
+    jobs, claims, waiting = {}, {}, []
+    for asset_type, data, data_path, stored in (
+        ("product", product_df, DATASET_PATH, stored_product_risks),
+        ("turbine", turbine_data, TURBINE_DATA_PATH, lambda b: load_precomputed_risks(b, TURBINE_RISKS_PATH, TURBINE_DATA_PATH)),
+        ("generator", generator_data, GENERATOR_DATA_PATH, lambda b: load_precomputed_risks(b, GENERATOR_RISKS_PATH, GENERATOR_DATA_PATH)),
+    ):
+        bundle = model_registry.get(asset_type)
+        if bundle is None or data is None or bundle.risks is not None:
+            continue
+        data_version = file_version(data_path)
+        bundle.risks = stored(bundle)
+        if bundle.risks is None:
+            bundle.risks = risk_tables.load(asset_type, bundle.version, data_version)
+        if bundle.risks is not None:
+            continue
+        claim = risk_tables.claim(asset_type)
+        if claim is None and risk_tables.enabled:
+            waiting.append((bundle, data_version))  # another worker is the producer
+            continue
+        claims[asset_type] = (claim, data_version)
+        jobs[asset_type] = (bundle.model, feature_matrix(asset_type, data))
+
+    try:
+        if jobs:
+            for asset_type, risks in score_datasets(jobs, SCORING_WORKERS,
+                                                    min_parallel_rows=SCORING_MIN_PARALLEL_ROWS).items():
+                bundle = model_registry.get(asset_type)
+                claim, data_version = claims[asset_type]
+                if claim is not None:
+                    risk_tables.publish(asset_type, bundle.version, data_version, risks)
+                    shared = risk_tables.load(asset_type, bundle.version, data_version)
+                    risks = shared if shared is not None else risks
+                bundle.risks = risks
+    except Exception as e:
+        print(f"❌ Error scoring startup risks: {e}")
+    finally:
+        for claim, _ in claims.values():
+            if claim is not None:
+                claim.close()
+
+    for bundle, data_version in waiting:
+        risk_tables.wait(bundle.asset_type)
+        # None if the producer failed: the warm-up then scores it here
+        bundle.risks = risk_tables.load(bundle.asset_type, bundle.version, data_version)
+        if bundle.risks is not None:
+            print(f"✅ {bundle.asset_type.capitalize()} risks mapped from the shared table.")
+
+score_startup_risks()
+precompute_fleet_risks()
+precompute_turbine_risks()
+precompute_generator_risks()
+
+def generator_history_payload(generator_id, since=None, until=None, limit=None, points=None, method="lttb"):
+    if "generator" not in history_arrays:
         raise HTTPException(status_code=503, detail="Generator model not available")
+    if generator_id not in generator_registry:
+        raise HTTPException(status_code=404, detail=f"Generator {generator_id} not found")
+    
+    h = query_history("generator", generator_registry, generator_id, since, until, limit, points, method)
     
     try:
-        # Extract generator number from ID (e.g., "Generator_1" -> 1)
-        gen_num = int(generator_id.split('_')[1])
-        
-        # Calculate chunk size for each generator
-        chunk_size = len(generator_data) // 10
-        start_idx = (gen_num - 1) * chunk_size
-        end_idx = start_idx + chunk_size if gen_num < 10 else len(generator_data)
-        
-        # Get data chunk for this generator
-        generator_chunk = generator_data.iloc[start_idx:end_idx]
-        
-        results = []
-        for _, row in generator_chunk.iterrows():
-            # Create features with engineering
-            input_df = create_generator_features(
-                row['air_temp'], row['core_temp'], row['rpm'], 
-                row['torque'], row['wear']
+        results = [
+            {"air_temp": air, "core_temp": core, "rpm": rpm, "torque": torque, "wear": wear, "risk": risk}
+            for air, core, rpm, torque, wear, risk in zip(
+                h["air_temp"].tolist(), h["core_temp"].tolist(), h["rpm"].tolist(),
+                h["torque"].tolist(), h["wear"].tolist(), h["risk"].tolist()
             )
-            
-            # Predict
-            probabilities = generator_model.predict_proba(input_df)[0]
-            
-            results.append({
-                "air_temp": float(row['air_temp']),
-                "core_temp": float(row['core_temp']),
-                "rpm": float(row['rpm']),
-                "torque": float(row['torque']),
-                "wear": float(row['wear']),
-                "risk": float(probabilities[1] * 100)
-            })
+        ]
         
         return {"generator_id": generator_id, "history": results}
     
@@ -1115,70 +1709,79 @@ def get_generator_data(generator_id: str):
         print(f"Generator data error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/generator/{generator_id}")
+def get_generator_data(
+    request: Request,
+    generator_id: str,
+    since: int = None,
+    until: int = None,
+    limit: int = None,
+    points: int = None,
+    method: str = "lttb"
+):
+    """
+    Get historical data and predictions for a specific generator
+    since/until select reading numbers, limit keeps the latest readings and
+    points downsamples (lttb or minmax)
+    """
+    return cached_json_response(
+        request, "generator", ("generator", generator_id, since, until, limit, points, method),
+        lambda: generator_history_payload(generator_id, since, until, limit, points, method)
+    )
+
 @app.post("/generator/predict")
-def predict_generator(input_data: GeneratorInput):
+def predict_generator(input_data: GeneratorInput, explain: bool = False):
     """
     Real-time prediction for generator data
     """
-    if generator_model is None:
+    bundle = model_registry.get("generator")
+    if bundle is None:
         raise HTTPException(status_code=503, detail="Generator model not available")
     
     try:
         # Create features with engineering
-        input_df = create_generator_features(
-            input_data.air_temp, input_data.core_temp, input_data.rpm,
-            input_data.torque, input_data.wear
-        )
+        reading = (input_data.air_temp, input_data.core_temp, input_data.rpm, input_data.torque, input_data.wear)
+        features = generator_row(*reading, out=row_buffers.get("generator"))
         
-        # Predict
-        probabilities = generator_model.predict_proba(input_df)[0]
-        risk = probabilities[1] * 100
+        # Predict (pre-screen or forest), exact around the 40% / 70% status bands
+        probability, probability_source = two_tier_probability(bundle, features, (0.4, 0.7), reading=reading)
+        risk = probability * 100
         
-        return {
+        response = {
             "risk": float(risk),
+            "probability_source": probability_source,
             "status": "High Risk" if risk >= 70 else "Medium Risk" if risk >= 40 else "Low Risk"
         }
+        if explain:
+            response["explanation"] = explanation(bundle, features)
+        return response
     
     except Exception as e:
         print(f"Generator prediction error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/generator/fleet/status")
-def get_generator_fleet_status(generator_ids: list[str]):
-    """
-    Get fleet status for multiple generators
-    """
-    if generator_model is None or generator_data is None:
+def generator_fleet_payload(generator_ids=None, offset=0, limit=None, top=None,
+                            window=FLEET_RISK_WINDOW["generator"], stat="mean"):
+    if generator_registry is None or "generator" not in rolling_stats:
         raise HTTPException(status_code=503, detail="Generator model not available")
     
+    generator_fleet_risk = read_fleet_risk("generator", window, stat)
+    
     try:
-        fleet_status = []
-        chunk_size = len(generator_data) // 10
+        positions = None
+        if generator_ids is not None:
+            positions = generator_registry.positions([normalize_generator_id(g) for g in generator_ids])
         
-        for generator_id in generator_ids:
-            gen_num = int(generator_id.split('_')[1]) if '_' in generator_id else int(generator_id)
-            start_idx = (gen_num - 1) * chunk_size
-            end_idx = start_idx + chunk_size if gen_num < 10 else len(generator_data)
-            
-            generator_chunk = generator_data.iloc[start_idx:end_idx]
-            
-            # Calculate average risk for this generator
-            risks = []
-            for _, row in generator_chunk.iterrows():
-                input_df = create_generator_features(
-                    row['air_temp'], row['core_temp'], row['rpm'],
-                    row['torque'], row['wear']
-                )
-                probabilities = generator_model.predict_proba(input_df)[0]
-                risks.append(probabilities[1] * 100)
-            
-            avg_risk = float(np.mean(risks))
-            
-            fleet_status.append({
-                "generator_id": f"Generator_{gen_num}",
-                "risk": avg_risk,
-                "name": f"Generator_{gen_num}"
-            })
+        positions = generator_registry.select(generator_fleet_risk, positions, offset, limit, top)
+        
+        fleet_status = [
+            {
+                "generator_id": generator_registry.ids[p],
+                "risk": float(generator_fleet_risk[p]),
+                "name": generator_registry.ids[p]
+            }
+            for p in positions
+        ]
         
         return {"fleet": fleet_status}
     
@@ -1186,6 +1789,565 @@ def get_generator_fleet_status(generator_ids: list[str]):
         print(f"Generator fleet status error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/generator/fleet/status")
+def get_generator_fleet_status(
+    request: Request,
+    generator_ids: list[str] = Body(None),
+    offset: int = 0,
+    limit: int = None,
+    top: int = None,
+    window: int = FLEET_RISK_WINDOW["generator"],
+    stat: str = "mean"
+):
+    """
+    Get fleet status for multiple generators (the whole fleet if no ids are sent)
+    Supports pagination (offset/limit), the N riskiest generators (top) and
+    rolling statistics (stat) over a selectable window of recent readings
+    """
+    ids_key = None if generator_ids is None else tuple(generator_ids)
+    return cached_json_response(
+        request, "generator", ("generator_fleet", ids_key, offset, limit, top, window, stat),
+        lambda: generator_fleet_payload(generator_ids, offset, limit, top, window, stat)
+    )
+
+# ============== FLEET RISK INDEX ==============
+
+def get_risk_index(asset_type: str, metric: str):
+    if metric not in RISK_INDEX_METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown metric '{metric}'. Use one of {list(RISK_INDEX_METRICS)}.")
+    index = risk_indexes.get(asset_type, {}).get(metric)
+    if index is None:
+        raise HTTPException(status_code=404, detail=f"No risk index for asset type '{asset_type}'.")
+    return index
+
+@app.get("/risk/{asset_type}/top")
+def get_top_risks(asset_type: str, k: int = 20, metric: str = "mean"):
+    """
+    The K riskiest assets of a type (product, turbine or generator)
+    metric: "mean" (fleet status average) or "latest" (most recent reading)
+    """
+    index = get_risk_index(asset_type, metric)
+    return {
+        "asset_type": asset_type,
+        "metric": metric,
+        "total_assets": len(index),
+        "assets": [{"asset_id": asset_id, "risk": round(risk, 2)} for asset_id, risk in index.top(k)]
+    }
+
+@app.get("/risk/{asset_type}/above")
+def get_risks_above(asset_type: str, threshold: float = ALERT_THRESHOLD, metric: str = "mean", limit: int = 100):
+    """
+    Assets whose risk (%) is at or above a threshold, riskiest first
+    """
+    index = get_risk_index(asset_type, metric)
+    assets, count = index.above(threshold, limit)
+    return {
+        "asset_type": asset_type,
+        "metric": metric,
+        "threshold": threshold,
+        "count": count,
+        "assets": [{"asset_id": asset_id, "risk": round(risk, 2)} for asset_id, risk in assets]
+    }
+
+@app.get("/risk/{asset_type}/percentile")
+def get_risk_percentile(asset_type: str, p: float = 95, metric: str = "mean"):
+    """
+    Fleet risk (%) at the p-th percentile and the asset at that rank
+    """
+    index = get_risk_index(asset_type, metric)
+    asset_id, risk = index.percentile(p)
+    return {
+        "asset_type": asset_type,
+        "metric": metric,
+        "percentile": p,
+        "asset_id": asset_id,
+        "risk": None if risk is None else round(risk, 2)
+    }
+
+def asset_datasets():
+    return {"product": product_df, "turbine": turbine_data, "generator": generator_data}
+
+def risk_readings(asset_type, registry, asset_id, window):
+    """
+    Model input matrix of the readings behind an asset's risk figure: its
+    latest `window` readings (None = all), posted readings included.
+    """
+    if reading_store is not None:
+        stored = reading_store.range(asset_type, asset_id, limit=window)
+        if not any(np.isnan(stored[name]).any() for name in HISTORY_COLUMNS[asset_type]):
+            return feature_matrix(asset_type, input_columns(asset_type, stored))
+    rows = registry.rows(asset_id)
+    return feature_matrix(asset_type, asset_datasets()[asset_type].iloc[rows if window is None else rows[-window:]])
+
+def asset_attributions(asset_type, bundle, registry, asset_ids, metric):
+    """
+    Per-feature contributions (probability) behind each asset's risk: its
+    latest reading, or the mean over the fleet risk window for "mean".
+    Missing assets are explained in one batch and cached on the bundle until
+    the asset type's data generation changes (e.g. readings are posted).
+    """
+    generation = data_generation[asset_type]
+    if bundle.attributions_generation != generation:
+        bundle.attributions = {}
+        bundle.attributions_generation = generation
+    cache = bundle.attributions
+    missing = [a for a in asset_ids if (a, metric) not in cache]
+    if missing:
+        window = 1 if metric == "latest" else FLEET_RISK_WINDOW[asset_type]
+        matrices = [risk_readings(asset_type, registry, a, window) for a in missing]
+        contributions = bundle.explainer.contributions(np.vstack(matrices))
+        starts = np.cumsum([0] + [len(X) for X in matrices[:-1]])
+        sums = np.add.reduceat(contributions, starts, axis=0)
+        for asset_id, total, X in zip(missing, sums, matrices):
+            cache[(asset_id, metric)] = total / len(X)
+    return [cache[(a, metric)] for a in asset_ids]
+
+@app.get("/risk/{asset_type}/top/explain")
+def explain_top_risks(asset_type: str, k: int = 10, metric: str = "mean", features: int = 5):
+    """
+    The K riskiest assets with the features driving their risk: base risk
+    plus the top per-feature contributions (% points) of the readings behind
+    the risk (latest reading, or mean over the fleet risk window).
+    """
+    index = get_risk_index(asset_type, metric)
+    bundle = model_registry.get(asset_type)
+    registry = asset_registries().get(asset_type)
+    if bundle is None or registry is None:
+        raise HTTPException(status_code=503, detail=f"{asset_type.capitalize()} system not loaded")
+    if bundle.explainer is None:
+        raise HTTPException(status_code=501, detail=f"The {asset_type} model does not support feature attributions.")
+
+    top = index.top(k)
+    contributions = asset_attributions(asset_type, bundle, registry, [a for a, _ in top], metric)
+    return {
+        "asset_type": asset_type,
+        "metric": metric,
+        "base": round(bundle.explainer.bias * 100, 2),
+        "assets": [
+            {
+                "asset_id": asset_id,
+                "risk": round(risk, 2),
+                "features": [{**c, "contribution": round(c["contribution"], 2)}
+                             for c in bundle.explainer.explain(c_row * 100, features)],
+            }
+            for (asset_id, risk), c_row in zip(top, contributions)
+        ]
+    }
+
+# ============== READING INGEST ==============
+
+class ReadingBatch(BaseModel):
+    asset_id: str
+    readings: list[dict[str, float | str]]  # oldest first; the asset type's raw inputs per reading
+
+def asset_registries():
+    return {"product": product_registry, "turbine": turbine_registry, "generator": generator_registry}
+
+@app.post("/readings/{asset_type}")
+def ingest_readings(asset_type: str, batch: ReadingBatch):
+    """
+    Append new readings of one asset: scored in one model call, stored in the
+    reading store after the asset's newest reading and pushed into the rolling
+    statistics and risk index. Fleet and history responses are refreshed.
+
+    The store is shared, but the statistics and index updated here are this
+    worker's: with several uvicorn workers, post readings to a single ingest
+    worker; the others replay them from the store on their next model reload.
+    """
+    registry = asset_registries().get(asset_type)
+    bundle = model_registry.get(asset_type)
+    if registry is None or bundle is None or asset_type not in rolling_stats:
+        raise HTTPException(status_code=503, detail=f"{asset_type.capitalize()} system not loaded")
+    if reading_store is None:
+        raise HTTPException(status_code=503, detail="Reading store disabled (READING_STORE_PATH)")
+    if batch.asset_id not in registry:
+        raise HTTPException(status_code=404, detail=f"{asset_type.capitalize()} {batch.asset_id} not found")
+    if not batch.readings:
+        return {"asset_id": batch.asset_id, "stored": 0}
+
+    try:
+        columns = {name: [reading[name] for reading in batch.readings] for name in INPUTS[asset_type]}
+        X = feature_matrix(asset_type, columns)
+    except KeyError as e:
+        raise HTTPException(status_code=422, detail=f"Reading is missing {e}. Required: {INPUTS[asset_type]}")
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid reading: {e}")
+    risks = bundle.model.predict_proba(X)[:, 1]
+    track_drift(bundle, X, risks)
+    values = store_columns(asset_type, columns)
+
+    with ingest_lock:
+        # A reload may have swapped the model, registry and rolling stats since
+        if model_registry.get(asset_type) is not bundle:
+            bundle = model_registry.get(asset_type)
+            risks = bundle.model.predict_proba(X)[:, 1]
+        risks = risks * 100
+        registry, stats = asset_registries()[asset_type], rolling_stats[asset_type]
+        last = reading_store.last_seq(asset_type, batch.asset_id)
+        first = 0 if last is None else last + 1
+        seqs = np.arange(first, first + len(risks))
+        reading_store.insert(asset_type, [batch.asset_id] * len(risks), seqs, {**values, "risk": risks})
+        for risk in risks:
+            stats.push(batch.asset_id, risk)
+
+        at = [registry.position(batch.asset_id)]
+        indexes = risk_indexes.get(asset_type, {})
+        for metric, window in (("mean", FLEET_RISK_WINDOW[asset_type]), ("latest", None)):
+            if metric in indexes:
+                indexes[metric].update(batch.asset_id, float(stats.fleet(metric, window, at)[0]))
+    bump_generation(asset_type)
+
+    return {
+        "asset_id": batch.asset_id,
+        "stored": len(risks),
+        "seq": [int(seqs[0]), int(seqs[-1])],
+        "risk": [round(float(r), 2) for r in risks],
+    }
+
+# ============== OUTCOME FEEDBACK ==============
+
+# Confirmed failures / non-failures recalibrate the cost-optimal threshold.
+# Counts are kept as probability histograms per asset type and model version
+# (outcome_calibration.py); the cost endpoints switch to the outcome-derived
+# threshold once OUTCOME_MIN_SAMPLES outcomes of both classes are recorded.
+OUTCOME_DIR = os.getenv("OUTCOME_DIR", "outcomes")  # empty keeps outcomes in memory only (per process)
+OUTCOME_MIN_SAMPLES = int(os.getenv("OUTCOME_MIN_SAMPLES", "50"))
+outcome_calibrations = {}  # asset type -> OutcomeCalibration of the active model version
+outcome_files = {}         # asset type -> OutcomeFile merged by all workers (OUTCOME_DIR)
+outcome_discards = {}      # asset type -> outcomes last discarded on a model version change
+outcome_lock = threading.Lock()
+
+class Outcome(BaseModel):
+    failed: bool
+    probability: float = None  # model probability (0-1) when the alert was raised
+    reading: dict[str, float | str] = None  # or the raw inputs, scored with the active model
+
+class OutcomeBatch(BaseModel):
+    outcomes: list[Outcome]
+
+def outcome_file(asset_type):
+    if not OUTCOME_DIR:
+        return None
+    if asset_type not in outcome_files:
+        os.makedirs(OUTCOME_DIR, exist_ok=True)
+        outcome_files[asset_type] = OutcomeFile(os.path.join(OUTCOME_DIR, f"{asset_type}.npz"))
+    return outcome_files[asset_type]
+
+def seeded_outcomes(bundle):
+    """Empty histograms for the bundle's version, seeded from its out-of-fold calibration."""
+    calibration = OutcomeCalibration(bundle.version)
+    if bundle.calibration:
+        # Real out-of-fold labels only; the synthetic (p > 0.5) samples carry no information
+        calibration.seed(bundle.calibration['y_true'], bundle.calibration['y_probs'])
+    return calibration
+
+def discard_outcomes(asset_type, calibration, bundle):
+    """Outcomes of another model version cannot be re-binned: log and report them once."""
+    if calibration is None or calibration.version == bundle.version or not calibration.recorded:
+        return
+    if outcome_discards.get(asset_type, {}).get("version") == calibration.version:
+        return
+    outcome_discards[asset_type] = {
+        "version": calibration.version,
+        "recorded": calibration.recorded,
+        "replaced_by": bundle.version,
+        "at": datetime.now().isoformat(timespec="seconds"),
+    }
+    print(f"⚠️ Discarded {calibration.recorded:,} {asset_type} outcomes recorded for model version "
+          f"{calibration.version}: model {bundle.version} scores on another probability scale.")
+
+def outcome_calibration(asset_type, bundle):
+    """
+    Outcome histograms of the bundle's model version: the shared file when
+    another worker updated it, otherwise seeded from the version's calibration.
+    """
+    with outcome_lock:
+        calibration = outcome_calibrations.get(asset_type)
+        file = outcome_file(asset_type)
+        if file is not None and file.changed():
+            calibration = file.read() or calibration
+        if calibration is None or calibration.version != bundle.version:
+            discard_outcomes(asset_type, calibration, bundle)
+            calibration = seeded_outcomes(bundle)
+        outcome_calibrations[asset_type] = calibration
+        return calibration
+
+def outcome_threshold(asset_type, bundle, cost_fp, cost_fn):
+    """Outcome-derived threshold result, or None until enough outcomes were recorded."""
+    calibration = outcome_calibration(asset_type, bundle)
+    if calibration.recorded < OUTCOME_MIN_SAMPLES:
+        return None
+    result = calibration.optimal_threshold(cost_fp, cost_fn)
+    return result if 0 < result["positives"] < result["samples"] else None
+
+def threshold_details(result):
+    """Response fields of an outcome-derived threshold."""
+    return {key: result[key] for key in ("expected_cost", "samples", "positives", "recorded", "seeded")}
+
+@app.post("/outcomes/{asset_type}")
+def record_outcomes(asset_type: str, batch: OutcomeBatch):
+    """
+    Record confirmed outcomes (failed or not) with the model probability at
+    the time, or the raw reading to score. Updates the per-threshold
+    confusion counts of the asset type; no samples are stored. With OUTCOME_DIR
+    the counts are merged into the asset type's file, which every worker
+    re-reads when it changed, so any worker can take outcomes.
+    """
+    bundle = model_registry.get(asset_type)
+    if bundle is None:
+        raise HTTPException(status_code=503, detail=f"{asset_type.capitalize()} system not loaded")
+    outcomes = batch.outcomes
+    if any(o.probability is None and o.reading is None for o in outcomes):
+        raise HTTPException(status_code=422, detail="Each outcome needs a probability or a reading")
+    if any(o.probability is not None and not 0 <= o.probability <= 1 for o in outcomes):
+        raise HTTPException(status_code=422, detail="Probabilities must be between 0 and 1")
+
+    probabilities = np.array([o.probability if o.probability is not None else np.nan for o in outcomes], dtype=np.float64)
+    to_score = np.flatnonzero(np.isnan(probabilities))
+    if len(to_score):
+        try:
+            columns = {name: [outcomes[i].reading[name] for i in to_score] for name in INPUTS[asset_type]}
+            X = feature_matrix(asset_type, columns)
+        except KeyError as e:
+            raise HTTPException(status_code=422, detail=f"Reading is missing {e}. Required: {INPUTS[asset_type]}")
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid reading: {e}")
+        probabilities[to_score] = bundle.model.predict_proba(X)[:, 1]
+
+    labels = [o.failed for o in outcomes]
+    file = outcome_file(asset_type)
+    if file is None:
+        calibration = outcome_calibration(asset_type, bundle)
+        recorded = calibration.record(probabilities, labels)
+    else:
+        # Merge into the shared file so outcomes posted to other workers are kept
+        with file.locked():
+            calibration = file.read()
+            if calibration is None or calibration.version != bundle.version:
+                discard_outcomes(asset_type, calibration, bundle)
+                calibration = seeded_outcomes(bundle)
+            recorded = calibration.record(probabilities, labels)
+            file.write(calibration)
+        with outcome_lock:
+            outcome_calibrations[asset_type] = calibration
+    result = calibration.optimal_threshold(*DEFAULT_COSTS)
+    return {
+        "recorded": recorded,
+        "model_version": bundle.version,
+        "total_recorded": calibration.recorded,
+        "threshold": result["threshold"],
+        "active": outcome_threshold(asset_type, bundle, *DEFAULT_COSTS) is not None,
+        "discarded": outcome_discards.get(asset_type),
+    }
+
+@app.get("/outcomes/{asset_type}/threshold")
+def get_outcome_threshold(asset_type: str, cost_fp: float = 500, cost_fn: float = 5000):
+    """Cost-optimal threshold and confusion counts from the recorded outcomes (O(bins))."""
+    bundle = model_registry.get(asset_type)
+    if bundle is None:
+        raise HTTPException(status_code=503, detail=f"{asset_type.capitalize()} system not loaded")
+    result = outcome_calibration(asset_type, bundle).optimal_threshold(cost_fp, cost_fn)
+    return {
+        **result,
+        "model_version": bundle.version,
+        "cost_fp": cost_fp,
+        "cost_fn": cost_fn,
+        "min_samples": OUTCOME_MIN_SAMPLES,
+        "active": outcome_threshold(asset_type, bundle, cost_fp, cost_fn) is not None,
+        "discarded": outcome_discards.get(asset_type),
+    }
+
+# ============== DRIFT ==============
+
+def drift_payload(asset_type):
+    bundle = model_registry.get(asset_type)
+    if bundle is None or bundle.drift is None:
+        raise HTTPException(status_code=503, detail=f"No drift monitor for {asset_type} (model not loaded or DRIFT_ENABLED off)")
+    report = bundle.drift.report(DRIFT_MIN_SAMPLES)
+    columns = report["columns"]
+    prediction = columns.pop("probability")
+    worst = max(columns, key=lambda name: columns[name]["psi"], default=None)
+    return {
+        "model_version": bundle.version,
+        "samples": report["samples"],
+        "baseline_samples": report["baseline_samples"],
+        "prediction_drift": prediction,
+        "data_drift": {
+            "features": columns,
+            "worst_feature": worst,
+            "status": columns[worst]["status"] if worst else "insufficient_data",
+        },
+    }
+
+@app.get("/drift")
+def get_drift():
+    """Drift summary of every asset type with a drift monitor."""
+    return {
+        asset_type: drift_payload(asset_type)
+        for asset_type in MODEL_RELOADERS
+        if (bundle := model_registry.get(asset_type)) is not None and bundle.drift is not None
+    }
+
+@app.get("/drift/{asset_type}")
+def get_asset_drift(asset_type: str):
+    """
+    PSI and KS of the live readings scored by this API (per model feature and
+    for the output probability) against the model version's dataset baseline.
+    """
+    return drift_payload(asset_type)
+
+@app.post("/drift/{asset_type}/reset")
+def reset_drift(asset_type: str):
+    """Start a new monitoring window: clear the live histograms, keep the baseline."""
+    bundle = model_registry.get(asset_type)
+    if bundle is None or bundle.drift is None:
+        raise HTTPException(status_code=503, detail=f"No drift monitor for {asset_type}")
+    bundle.drift.reset()
+    return {"asset_type": asset_type, "reset": True}
+
+# ============== ALERT POLICY BACKTEST ==============
+
+# Failure label column per asset type (used when the served dataset has it)
+FAILURE_LABELS = {"product": "Machine failure", "turbine": "Turbine_Failure", "generator": "Machine failure"}
+
+class BacktestRequest(BaseModel):
+    asset_types: list[str] = None  # None = every loaded asset type
+    thresholds: list[float] = None  # risk %; None = [ALERT_THRESHOLD]
+    cooldowns: list[float] = None  # seconds; None = [ALERT_COOLDOWN_SECONDS]
+    cost_fp: list[float] = [500.0]
+    cost_fn: list[float] = [5000.0]
+    interval: float = 60  # seconds between two readings of one asset
+    lead: int = 10  # readings an alert may precede a failure and still count
+    workers: int = None  # processes for large grids (default: available cores)
+
+def alert_history(asset_type):
+    """The served risk history of an asset type, with failure labels when the dataset has them."""
+    registry = asset_registries().get(asset_type)
+    df = asset_datasets()[asset_type]
+    label = FAILURE_LABELS[asset_type]
+    labels = df[label].to_numpy()[registry.order] if label in df.columns else None
+    return AlertHistory(history_arrays[asset_type]["risk"], registry.offsets, labels)
+
+@app.post("/alert/backtest")
+def backtest_alert_policy(req: BacktestRequest = Body(default=None)):
+    """
+    Replay the pre-computed risk histories through the alert policy for a
+    grid of thresholds, cooldowns and costs (see alert_backtest.py): alert
+    and follow-up call counts, caught/missed failures and total cost per
+    configuration, plus the cheapest configuration per asset type.
+    """
+    req = req or BacktestRequest()
+    asset_types = req.asset_types or [a for a in FAILURE_LABELS if a in history_arrays]
+    unknown = [a for a in asset_types if a not in FAILURE_LABELS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown asset types {unknown}. Use {list(FAILURE_LABELS)}.")
+    missing = [a for a in asset_types if a not in history_arrays]
+    if missing:
+        raise HTTPException(status_code=503, detail=f"Risk history not loaded for {missing}")
+    if req.interval <= 0:
+        raise HTTPException(status_code=400, detail="interval must be positive")
+
+    started = time.perf_counter()
+    results = sweep(
+        {asset_type: alert_history(asset_type) for asset_type in asset_types},
+        req.thresholds or [ALERT_THRESHOLD],
+        req.cooldowns if req.cooldowns is not None else [ALERT_COOLDOWN_SECONDS],
+        [(fp, fn) for fp in req.cost_fp for fn in req.cost_fn],
+        workers=req.workers,
+        interval=req.interval,
+        lead=req.lead,
+        followup_seconds=FOLLOWUP_SECONDS,
+        followup_interval=followup_client.min_interval,
+        followup_max_wait=followup_client.max_wait,
+    )
+    return {
+        "configurations": len(results),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "best": best(results),
+        "results": results,
+    }
+
+# ============== WHAT-IF RISK SURFACE ==============
+
+# Reading fields of each asset type's predict endpoint, in INPUTS order
+PREDICT_FIELDS = {
+    "product": ["Type", "air_temp", "proc_temp", "rpm", "torque", "tool_wear"],
+    "turbine": TURBINE_SENSORS,
+    "generator": GENERATOR_SENSORS,
+}
+WHATIF_MAX_STEPS = 200
+WHATIF_MAX_POINTS = 20_000  # grid cells scored per request
+
+class SensorRange(BaseModel):
+    sensor: str  # a numeric field of the predict endpoint (e.g. "torque")
+    start: float
+    stop: float
+    steps: int = 25
+
+class WhatIfRequest(BaseModel):
+    base: dict[str, float | str]  # base reading, fields as in the asset's predict endpoint
+    x: SensorRange
+    y: SensorRange = None  # omit for a 1-D sweep
+    cost_fp: float = 500.0
+    cost_fn: float = 5000.0
+
+@app.post("/whatif/{asset_type}")
+def score_whatif_grid(asset_type: str, req: WhatIfRequest):
+    """
+    Risk surface around a base reading: one or two sensors are swept over
+    their ranges, the full grid is scored in one batched model call and
+    returned as risk % per [y][x] cell (one row for a 1-D sweep).
+    """
+    if asset_type not in PREDICT_FIELDS:
+        raise HTTPException(status_code=404, detail=f"Unknown asset type '{asset_type}'. Use {list(PREDICT_FIELDS)}.")
+    bundle = model_registry.get(asset_type)
+    if bundle is None:
+        raise HTTPException(status_code=503, detail=f"{asset_type.capitalize()} model is not loaded.")
+
+    fields = PREDICT_FIELDS[asset_type]
+    axes = [r for r in (req.x, req.y) if r is not None]
+    numeric = [f for f in fields if f != "Type"]
+    for r in axes:
+        if r.sensor not in numeric:
+            raise HTTPException(status_code=400, detail=f"Cannot sweep '{r.sensor}'. Use one of {numeric}.")
+        if not 2 <= r.steps <= WHATIF_MAX_STEPS:
+            raise HTTPException(status_code=400, detail=f"steps must be between 2 and {WHATIF_MAX_STEPS}")
+    if req.y is not None and req.y.sensor == req.x.sensor:
+        raise HTTPException(status_code=400, detail="x and y must sweep different sensors")
+    missing = [f for f in fields if f not in req.base and f not in (r.sensor for r in axes)]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"Base reading is missing {missing}")
+
+    xs = np.linspace(req.x.start, req.x.stop, req.x.steps)
+    ys = np.linspace(req.y.start, req.y.stop, req.y.steps) if req.y is not None else np.zeros(1)
+    n = len(xs) * len(ys)
+    if n > WHATIF_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"Grid of {n} points exceeds {WHATIF_MAX_POINTS}")
+
+    # Row-major grid: cell (j, i) = (ys[j], xs[i])
+    columns = {field: np.full(n, req.base.get(field)) for field in fields if field not in (r.sensor for r in axes)}
+    columns[req.x.sensor] = np.tile(xs, len(ys))
+    if req.y is not None:
+        columns[req.y.sensor] = np.repeat(ys, len(xs))
+    try:
+        X = feature_matrix(asset_type, dict(zip(INPUTS[asset_type], (columns[f] for f in fields))))
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid base reading: {e}")
+    risk = bundle.model.predict_proba(X)[:, 1].reshape(len(ys), len(xs)) * 100
+
+    threshold = None
+    if bundle.threshold_sample is not None:
+        threshold = bundle.threshold(req.cost_fp, req.cost_fn, optimize_threshold)["optimal_threshold"] * 100
+    return {
+        "asset_type": asset_type,
+        "x": {"sensor": req.x.sensor, "values": np.round(xs, 4).tolist()},
+        "y": None if req.y is None else {"sensor": req.y.sensor, "values": np.round(ys, 4).tolist()},
+        "risk": np.round(risk, 2).tolist(),
+        "threshold": None if threshold is None else round(float(threshold), 2),
+        "min_risk": round(float(risk.min()), 2),
+        "max_risk": round(float(risk.max()), 2),
+    }
+
 # ============== TURBINE COST OPTIMIZATION ==============
 
 class TurbineCostInput(BaseModel):
@@ -1201,35 +2363,32 @@ def predict_turbine_with_cost(data: TurbineCostInput):
     """
     Predict turbine failure risk with robust cost-optimized threshold
     Uses ensemble of methods: cost-sensitive, Youden's J, F-beta, and PR-breakeven
+    Identical concurrent requests share one computation.
     """
-    if turbine_model is None or turbine_data is None:
+    key = ("turbine", tuple(sorted(vars(data).items())))
+    return cost_flight.do(key, lambda: turbine_cost_payload(data))
+
+def turbine_cost_payload(data: TurbineCostInput):
+    bundle = model_registry.get("turbine")
+    if bundle is None or turbine_data is None:
         raise HTTPException(status_code=503, detail="Turbine model not loaded")
     
     try:
         # Create features for input
-        input_df = create_turbine_features(data.AT, data.V, data.AP, data.RH)
-        
-        # Get probability
-        probabilities = turbine_model.predict_proba(input_df)[0]
-        risk_probability = float(probabilities[1])
+        reading = (data.AT, data.V, data.AP, data.RH)
+        features = turbine_row(*reading, out=row_buffers.get("turbine"))
         
-        # Calculate optimal threshold using turbine data (sample for performance)
-        sample_size = min(500, len(turbine_data))
-        sample_df = turbine_data.sample(n=sample_size, random_state=42)
+        # Robust threshold optimization over the turbine data sample scored
+        # when this model version was warmed (cached per cost pair); confirmed
+        # outcomes take over once enough were recorded
+        threshold_result = bundle.threshold(data.cost_fp, data.cost_fn, optimize_threshold)
+        outcomes = outcome_threshold("turbine", bundle, data.cost_fp, data.cost_fn)
+        optimal_threshold = outcomes["threshold"] if outcomes else threshold_result["optimal_threshold"]
         
-        y_probs = []
-        for _, row in sample_df.iterrows():
-            feat_df = create_turbine_features(row['AT'], row['V'], row['AP'], row['RH'])
-            probs = turbine_model.predict_proba(feat_df)[0]
-            y_probs.append(probs[1])
-        
-        y_probs = np.array(y_probs)
-        # Create synthetic ground truth based on high probability threshold
-        y_true = (y_probs > 0.5).astype(int)
-        
-        # Get robust threshold optimization result
-        threshold_result = optimize_threshold(y_true, y_probs, data.cost_fp, data.cost_fn, method="ensemble")
-        optimal_threshold = threshold_result["optimal_threshold"]
+        # Get probability (pre-screen or forest)
+        risk_probability, probability_source = two_tier_probability(
+            bundle, features, (optimal_threshold,), reading=reading
+        )
         
         # Make prediction using optimal threshold
         prediction = 1 if risk_probability >= optimal_threshold else 0
@@ -1247,16 +2406,19 @@ def predict_turbine_with_cost(data: TurbineCostInput):
             "prediction": int(prediction),
             "probability": round(risk_probability, 4),
             "risk_percent": round(risk_probability * 100, 2),
+            "probability_source": probability_source,
             "threshold": round(optimal_threshold, 4),
             "status": "High Risk" if prediction == 1 else "Normal",
             "strategy": strategy,
             "cost_fn": data.cost_fn,
             "cost_fp": data.cost_fp,
+            "threshold_source": "outcomes" if outcomes else "calibration",
             "optimization": {
                 "method_thresholds": threshold_result["methods"],
                 "confidence_interval": threshold_result["confidence_interval"],
                 "annual_savings_estimate": threshold_result["annual_savings_estimate"],
-                "f_beta_used": threshold_result["metrics"]["beta_used"]
+                "f_beta_used": threshold_result["metrics"]["beta_used"],
+                **({"outcomes": threshold_details(outcomes)} if outcomes else {}),
             }
         }
     
@@ -1280,39 +2442,32 @@ def predict_generator_with_cost(data: GeneratorCostInput):
     """
     Predict generator failure risk with robust cost-optimized threshold
     Uses ensemble of methods: cost-sensitive, Youden's J, F-beta, and PR-breakeven
+    Identical concurrent requests share one computation.
     """
-    if generator_model is None or generator_data is None:
+    key = ("generator", tuple(sorted(vars(data).items())))
+    return cost_flight.do(key, lambda: generator_cost_payload(data))
+
+def generator_cost_payload(data: GeneratorCostInput):
+    bundle = model_registry.get("generator")
+    if bundle is None or generator_data is None:
         raise HTTPException(status_code=503, detail="Generator model not loaded")
     
     try:
         # Create features for input
-        input_df = create_generator_features(
-            data.air_temp, data.core_temp, data.rpm, data.torque, data.wear
-        )
-        
-        # Get probability
-        probabilities = generator_model.predict_proba(input_df)[0]
-        risk_probability = float(probabilities[1])
-        
-        # Calculate optimal threshold using generator data (sample for performance)
-        sample_size = min(500, len(generator_data))
-        sample_df = generator_data.sample(n=sample_size, random_state=42)
-        
-        y_probs = []
-        for _, row in sample_df.iterrows():
-            feat_df = create_generator_features(
-                row['air_temp'], row['core_temp'], row['rpm'], row['torque'], row['wear']
-            )
-            probs = generator_model.predict_proba(feat_df)[0]
-            y_probs.append(probs[1])
+        reading = (data.air_temp, data.core_temp, data.rpm, data.torque, data.wear)
+        features = generator_row(*reading, out=row_buffers.get("generator"))
         
-        y_probs = np.array(y_probs)
-        # Create synthetic ground truth based on high probability threshold
-        y_true = (y_probs > 0.5).astype(int)
+        # Robust threshold optimization over the generator data sample scored
+        # when this model version was warmed (cached per cost pair); confirmed
+        # outcomes take over once enough were recorded
+        threshold_result = bundle.threshold(data.cost_fp, data.cost_fn, optimize_threshold)
+        outcomes = outcome_threshold("generator", bundle, data.cost_fp, data.cost_fn)
+        optimal_threshold = outcomes["threshold"] if outcomes else threshold_result["optimal_threshold"]
         
-        # Get robust threshold optimization result
-        threshold_result = optimize_threshold(y_true, y_probs, data.cost_fp, data.cost_fn, method="ensemble")
-        optimal_threshold = threshold_result["optimal_threshold"]
+        # Get probability (pre-screen or forest)
+        risk_probability, probability_source = two_tier_probability(
+            bundle, features, (optimal_threshold,), reading=reading
+        )
         
         # Make prediction using optimal threshold
         prediction = 1 if risk_probability >= optimal_threshold else 0
@@ -1330,16 +2485,19 @@ def predict_generator_with_cost(data: GeneratorCostInput):
             "prediction": int(prediction),
             "probability": round(risk_probability, 4),
             "risk_percent": round(risk_probability * 100, 2),
+            "probability_source": probability_source,
             "threshold": round(optimal_threshold, 4),
             "status": "High Risk" if prediction == 1 else "Normal",
             "strategy": strategy,
             "cost_fn": data.cost_fn,
             "cost_fp": data.cost_fp,
+            "threshold_source": "outcomes" if outcomes else "calibration",
             "optimization": {
                 "method_thresholds": threshold_result["methods"],
                 "confidence_interval": threshold_result["confidence_interval"],
                 "annual_savings_estimate": threshold_result["annual_savings_estimate"],
-                "f_beta_used": threshold_result["metrics"]["beta_used"]
+                "f_beta_used": threshold_result["metrics"]["beta_used"],
+                **({"outcomes": threshold_details(outcomes)} if outcomes else {}),
             }
         }
     
@@ -1347,13 +2505,65 @@ def predict_generator_with_cost(data: GeneratorCostInput):
         print(f"Generator cost prediction error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics")
+def get_metrics():
+    """Cache hit rates and request coalescing (single-flight) dedup ratios."""
+    return {
+        "response_cache": response_cache.metrics(),
+        "single_flight": {
+            "responses": response_cache.builds.metrics(),
+            "cost": cost_flight.metrics(),
+        },
+        "prediction_cache": prediction_cache.metrics(),
+        "risk_tables": risk_tables.metrics(),
+        "followup_calls": followup_client.metrics(),
+        "reading_store": reading_store.metrics() if reading_store is not None else {"enabled": False},
+        "outcomes": {
+            asset_type: {"version": c.version, "recorded": c.recorded, "seeded": c.seeded,
+                         "discarded": outcome_discards.get(asset_type)}
+            for asset_type, c in outcome_calibrations.items()
+        },
+        "prescreen": {
+            asset_type: bundle.prescreen.metrics()
+            for asset_type in MODEL_RELOADERS
+            if (bundle := model_registry.get(asset_type)) is not None and bundle.prescreen is not None
+        },
+    }
+
+# ============== MODEL VERSIONS ==============
+
+# asset type -> (load new version from disk, warm it, publish its pre-computed risks)
+MODEL_RELOADERS = {
+    "product": (load_product_bundle, warm_product_bundle, precompute_fleet_risks),
+    "turbine": (load_turbine_bundle, warm_turbine_bundle, precompute_turbine_risks),
+    "generator": (load_generator_bundle, warm_generator_bundle, precompute_generator_risks),
+}
+
+@app.get("/models")
+def get_model_versions():
+    """Active model version per asset type and the state of the last reload."""
+    return model_registry.versions()
+
+@app.post("/models/{asset_type}/reload", status_code=202)
+def reload_model(asset_type: str):
+    """
+    Load the asset type's model files again in the background, warm the new
+    version and swap it in without interrupting requests on the old one.
+    """
+    if asset_type not in MODEL_RELOADERS:
+        raise HTTPException(status_code=404, detail=f"Unknown asset type '{asset_type}'. Use one of {list(MODEL_RELOADERS)}.")
+    load, warm, publish = MODEL_RELOADERS[asset_type]
+    if not model_registry.reload(asset_type, load, warm, publish):
+        raise HTTPException(status_code=409, detail=f"A {asset_type} model reload is already running.")
+    return {"asset_type": asset_type, "status": "reloading"}
+
 @app.get("/")
 def health_check():
     return {
         "status": "online", 
-        "model_loaded": model is not None,
-        "turbine_model_loaded": turbine_model is not None,
-        "generator_model_loaded": generator_model is not None
+        "model_loaded": model_registry.get("product") is not None,
+        "turbine_model_loaded": model_registry.get("turbine") is not None,
+        "generator_model_loaded": model_registry.get("generator") is not None
     }
 
 if __name__ == "__main__":
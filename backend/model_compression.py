@@ -0,0 +1,218 @@
+"""
+Latency-budgeted compression of the serving forests.
+
+Builds smaller candidates from a full forest (tree subsets, depth-capped
+forests and distilled students), measures hold-out ROC AUC, minimum
+expected cost over thresholds and single-reading latency for each, and picks
+the fastest candidate whose AUC and cost stay within a tolerance of the full
+forest. The whole latency-vs-accuracy frontier is reported so a serving
+model can be chosen per asset type.
+"""
+import copy
+import pickle
+import time
+
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestClassifier, RandomForestRegressor
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold, cross_val_predict, train_test_split
+
+from model_registry import array_model
+
+TREE_SUBSETS = (10, 25, 50)
+DEPTH_CAPS = (6, 8, 12)
+LATENCY_REPEATS = 50
+
+
+class DistilledClassifier(ClassifierMixin, BaseEstimator):
+    """
+    Binary classifier wrapping a regressor trained on a teacher forest's
+    failure probabilities; exposes predict/predict_proba like the forests.
+    """
+
+    def __init__(self, regressor=None):
+        self.regressor = regressor
+
+    def fit(self, X, teacher_probs):
+        self.regressor.fit(X, teacher_probs)
+        self.classes_ = np.array([0, 1])
+        if hasattr(self.regressor, "feature_names_in_"):
+            self.feature_names_in_ = self.regressor.feature_names_in_
+        self.n_features_in_ = self.regressor.n_features_in_
+        return self
+
+    def predict_proba(self, X):
+        p = np.clip(self.regressor.predict(X), 0.0, 1.0)
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] >= 0.5).astype(int)
+
+
+def tree_subset(forest, n_trees):
+    """The first `n_trees` trees of a fitted forest as a forest of its own."""
+    subset = copy.copy(forest)
+    subset.estimators_ = forest.estimators_[:n_trees]
+    subset.n_estimators = n_trees
+    return subset
+
+
+def min_expected_cost(y_true, y_probs, cost_fp, cost_fn):
+    """Lowest total cost over all decision thresholds (the cost-curve minimum)."""
+    order = np.argsort(-y_probs, kind="stable")
+    y_sorted = np.asarray(y_true)[order]
+    # Flagging the top k readings: fn = positives not flagged, fp = negatives flagged
+    tp = np.concatenate([[0], np.cumsum(y_sorted)])
+    fp = np.arange(len(y_sorted) + 1) - tp
+    fn = tp[-1] - tp
+    return float(np.min(fp * cost_fp + fn * cost_fn))
+
+
+def single_row_latency_ms(model, X):
+    """
+    Median wall time of predict_proba on one reading, in milliseconds, fed
+    the way the API serves it: a (1, n) float64 array to a model without
+    feature names (see RowBuffers and array_model).
+    """
+    names = getattr(X, "columns", None)
+    if names is not None:
+        model = array_model(copy.deepcopy(model), list(names))
+    row = np.ascontiguousarray(np.asarray(X)[:1], dtype=np.float64)
+    model.predict_proba(row)
+    timings = []
+    for _ in range(LATENCY_REPEATS):
+        t = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - t)
+    return float(np.median(timings) * 1000)
+
+
+def node_count(model):
+    if hasattr(model, "estimators_"):
+        return int(sum(tree.tree_.node_count for tree in model.estimators_))
+    return None
+
+
+def candidate_models(forest, params, X_train, y_train, seed, n_jobs):
+    """(name, kind, settings, fitted model) for every compression candidate."""
+    yield "full", "full", {"n_estimators": forest.n_estimators}, forest
+
+    for n in TREE_SUBSETS:
+        if n < forest.n_estimators:
+            yield f"subset_{n}", "subset", {"n_estimators": n}, tree_subset(forest, n)
+
+    for depth in DEPTH_CAPS:
+        settings = dict(params, max_depth=depth)
+        if params.get("max_depth") is not None and params["max_depth"] <= depth:
+            continue
+        model = RandomForestClassifier(random_state=seed, n_jobs=n_jobs, **settings).fit(X_train, y_train)
+        yield f"depth_{depth}", "depth_cap", settings, model
+        half = dict(settings, n_estimators=max(10, settings.get("n_estimators", 100) // 4))
+        model = RandomForestClassifier(random_state=seed, n_jobs=n_jobs, **half).fit(X_train, y_train)
+        yield f"depth_{depth}_trees_{half['n_estimators']}", "depth_cap", half, model
+
+    # Students learn the teacher's out-of-fold probabilities, which carry the
+    # forest's ranking without its memorised training labels
+    teacher = RandomForestClassifier(random_state=seed, n_jobs=n_jobs, **params)
+    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=seed)
+    soft = cross_val_predict(teacher, X_train, y_train, cv=cv, method="predict_proba")[:, 1]
+    students = {
+        "distilled_gbm": ("distilled", {"student": "HistGradientBoostingRegressor", "max_iter": 100, "max_depth": 4},
+                          HistGradientBoostingRegressor(max_iter=100, max_depth=4, random_state=seed)),
+        "distilled_forest": ("distilled", {"student": "RandomForestRegressor", "n_estimators": 10, "max_depth": 8},
+                             RandomForestRegressor(n_estimators=10, max_depth=8, random_state=seed, n_jobs=n_jobs)),
+    }
+    for name, (kind, settings, regressor) in students.items():
+        yield name, kind, settings, DistilledClassifier(regressor).fit(X_train, soft)
+
+
+def single_threaded(model):
+    """Prediction on one reading is fastest without joblib's thread pool."""
+    for estimator in (model, getattr(model, "regressor", None)):
+        if estimator is not None and "n_jobs" in estimator.get_params():
+            estimator.set_params(n_jobs=None)
+    return model
+
+
+def compression_frontier(X, y, params, seed=42, n_jobs=-1, cost_fp=500, cost_fn=5000, holdout=0.25):
+    """Evaluate all candidates on a stratified hold-out split. Returns a list of result dicts."""
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=holdout, stratify=y, random_state=seed
+    )
+    forest = RandomForestClassifier(random_state=seed, n_jobs=n_jobs, **params).fit(X_train, y_train)
+
+    results = []
+    for name, kind, settings, model in candidate_models(forest, params, X_train, y_train, seed, n_jobs):
+        single_threaded(model)
+        probs = model.predict_proba(X_test)[:, 1]
+        results.append({
+            "name": name,
+            "kind": kind,
+            "settings": settings,
+            "auc": float(roc_auc_score(y_test, probs)),
+            "min_cost": min_expected_cost(y_test, probs, cost_fp, cost_fn),
+            "latency_ms": single_row_latency_ms(model, X_test),
+            "nodes": node_count(model),
+            "size_bytes": len(pickle.dumps(model)),
+        })
+    return results
+
+
+def select_candidate(results, auc_tolerance=0.005, cost_tolerance=0.05):
+    """
+    The fastest candidate with AUC >= full AUC - auc_tolerance and minimum
+    cost <= full cost * (1 + cost_tolerance). Marks every result "eligible".
+    """
+    full = next(r for r in results if r["name"] == "full")
+    for r in results:
+        r["eligible"] = (
+            r["auc"] >= full["auc"] - auc_tolerance
+            and r["min_cost"] <= full["min_cost"] * (1 + cost_tolerance)
+        )
+    return min((r for r in results if r["eligible"]), key=lambda r: (r["latency_ms"], r["size_bytes"]))
+
+
+def fit_selected(selected, X, y, params, seed=42, n_jobs=-1):
+    """Refit the selected configuration on all data for serving."""
+    kind, settings = selected["kind"], selected["settings"]
+    if kind in ("full", "subset", "depth_cap"):
+        model_params = dict(params, **settings) if kind == "depth_cap" else dict(params, n_estimators=settings["n_estimators"])
+        model = RandomForestClassifier(random_state=seed, n_jobs=n_jobs, **model_params).fit(X, y)
+    else:
+        teacher = RandomForestClassifier(random_state=seed, n_jobs=n_jobs, **params)
+        cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=seed)
+        soft = cross_val_predict(teacher, X, y, cv=cv, method="predict_proba")[:, 1]
+        student_params = {k: v for k, v in settings.items() if k != "student"}
+        if settings["student"] == "HistGradientBoostingRegressor":
+            regressor = HistGradientBoostingRegressor(random_state=seed, **student_params)
+        else:
+            regressor = RandomForestRegressor(random_state=seed, n_jobs=n_jobs, **student_params)
+        model = DistilledClassifier(regressor).fit(X, soft)
+    return single_threaded(model)
+
+
+def out_of_fold_probabilities(selected, X, y, params, folds=5, seed=42, n_jobs=-1):
+    """
+    Out-of-fold failure probabilities of the selected configuration: the
+    calibration sample for its cost thresholds, on its own probability scale.
+    """
+    y = np.asarray(y)
+    y_probs = np.zeros(len(y))
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    for train_idx, test_idx in cv.split(X, y):
+        model = fit_selected(selected, X.iloc[train_idx], y[train_idx], params, seed=seed, n_jobs=n_jobs)
+        y_probs[test_idx] = model.predict_proba(X.iloc[test_idx])[:, 1]
+    return y_probs
+
+
+def format_frontier(results):
+    """Text table of the frontier, fastest first."""
+    lines = [f"   {'candidate':<24}{'AUC':>8}{'min cost':>12}{'latency ms':>12}{'nodes':>9}{'KB':>9}  ok"]
+    for r in sorted(results, key=lambda r: r["latency_ms"]):
+        nodes = "-" if r["nodes"] is None else f"{r['nodes']:,}"
+        lines.append(
+            f"   {r['name']:<24}{r['auc']:>8.4f}{r['min_cost']:>12,.0f}{r['latency_ms']:>12.2f}"
+            f"{nodes:>9}{r['size_bytes'] / 1024:>9,.0f}  {'✓' if r.get('eligible') else ''}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,232 @@
+"""
+Versioned model registry with background reload.
+
+Each asset type has one active ModelBundle: the fitted model, its feature
+columns and calibration data, plus everything warmed for that version
+(pre-computed dataset risks, threshold sample, cost-optimized threshold
+cache). A reload loads and warms the new version on a background thread and
+then swaps the active reference in one assignment, so requests that already
+picked up the old bundle finish on it and later ones see the new one.
+"""
+import hashlib
+import os
+import threading
+import traceback
+from collections import OrderedDict
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+# Cost pairs kept per bundle in the optimized threshold cache
+THRESHOLD_CACHE_SIZE = 256
+
+
+def file_version(*paths):
+    """
+    Version tag for a set of artifact files: a hash of their contents, so
+    copying or redeploying unchanged files keeps the version.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for path in paths:
+        if path is None or not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def modified_at(*paths):
+    """Latest modification time of the existing files, ISO formatted."""
+    mtimes = [os.path.getmtime(path) for path in paths if path is not None and os.path.exists(path)]
+    return datetime.fromtimestamp(max(mtimes)).isoformat(timespec="seconds") if mtimes else None
+
+
+class ModelBundle:
+    """One loaded model version plus the data warmed for it."""
+
+    def __init__(self, asset_type, version, model, columns=None, calibration=None, source=None):
+        self.asset_type = asset_type
+        self.version = version
+        self.model = model
+        self.columns = columns
+        self.calibration = calibration
+        self.source = source
+        self.modified_at = modified_at(source)
+        self.loaded_at = datetime.now().isoformat(timespec="seconds")
+        self.risks = None             # failure probability per row of the asset's dataset
+        self.threshold_sample = None  # (y_true, y_probs) behind cost-optimized thresholds
+        self.prescreen = None         # first-tier scorer fitted to this version's risks
+        self.explainer = None         # TreeExplainer (per-feature contributions) for this version
+        self.failure_modes = None     # FailureModeModel scored alongside (products)
+        self.attributions = {}        # (asset_id, metric) -> contributions of the readings behind its risk
+        self.attributions_generation = None  # data generation the attributions were computed for
+        self.drift = None             # DriftMonitor of live readings against the dataset baseline
+        self.warmed = False           # set by the asset's warm-up once the above are filled
+        self._thresholds = OrderedDict()
+        self._lock = threading.Lock()
+
+    def threshold(self, cost_fp, cost_fn, optimize):
+        """
+        Cost-optimized threshold result for this version's threshold sample,
+        computed once per cost pair with `optimize(y_true, y_probs, cost_fp, cost_fn)`.
+        """
+        key = (float(cost_fp), float(cost_fn))
+        with self._lock:
+            if key in self._thresholds:
+                self._thresholds.move_to_end(key)
+                return self._thresholds[key]
+        y_true, y_probs = self.threshold_sample
+        result = optimize(y_true, y_probs, cost_fp, cost_fn)
+        with self._lock:
+            self._thresholds[key] = result
+            while len(self._thresholds) > THRESHOLD_CACHE_SIZE:
+                self._thresholds.popitem(last=False)
+        return result
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "source": self.source,
+            "modified_at": self.modified_at,
+            "columns": list(self.columns) if self.columns is not None else None,
+            "risks_precomputed": self.risks is not None,
+            "cached_thresholds": len(self._thresholds),
+            "failure_modes": self.failure_modes.version if self.failure_modes is not None else None,
+        }
+
+
+def array_model(model, features):
+    """
+    Check a fitted model's feature names against the serving column order
+    once, then drop them so the model takes plain NumPy arrays without
+    per-call name validation. Raises ValueError on a mismatch.
+    """
+    for estimator in (model, getattr(model, "regressor", None)):
+        names = getattr(estimator, "feature_names_in_", None)
+        if names is None:
+            continue
+        if list(names) != list(features):
+            raise ValueError(f"Model features {list(names)} do not match serving columns {list(features)}")
+        del estimator.feature_names_in_
+    n_features = getattr(model, "n_features_in_", len(features))
+    if n_features != len(features):
+        raise ValueError(f"Model expects {n_features} features, serving builds {len(features)}")
+    return model
+
+
+def paired_path(model_path, default_model_path, path):
+    """
+    The artifact at `path` that belongs to the model at `model_path`: a model
+    saved under the default name plus a suffix (model_compact.pkl for
+    model.pkl) pairs with the artifact carrying the same suffix
+    (calibration_data_compact.pkl) in the model's directory, so calibration
+    is never taken from another model's probabilities.
+    """
+    model_stem = os.path.splitext(os.path.basename(model_path))[0]
+    default_stem = os.path.splitext(os.path.basename(default_model_path))[0]
+    if model_stem == default_stem:
+        suffix = ""
+    elif model_stem.startswith(default_stem):
+        suffix = model_stem[len(default_stem):]
+    else:
+        suffix = f"_{model_stem}"
+    stem, ext = os.path.splitext(os.path.basename(path))
+    # Written next to the model by train_pipeline.py --out-dir
+    return os.path.join(os.path.dirname(model_path), f"{stem}{suffix}{ext}")
+
+
+def load_bundle(asset_type, model_path, columns_path=None, calibration_path=None, features=None):
+    """
+    Load a model version from disk. With `features` (serving column order)
+    the model is validated and switched to array input (array_model).
+    Raises FileNotFoundError if the model is missing.
+    """
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"{model_path} not found")
+    model = joblib.load(model_path)
+    if features is not None:
+        array_model(model, features)
+    columns = joblib.load(columns_path) if columns_path and os.path.exists(columns_path) else None
+    calibration = joblib.load(calibration_path) if calibration_path and os.path.exists(calibration_path) else None
+    version = file_version(model_path, columns_path, calibration_path)
+    return ModelBundle(asset_type, version, model, columns, calibration, source=model_path)
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._active = {}
+        self._reloads = {}
+        self._lock = threading.Lock()
+
+    def get(self, asset_type):
+        """The active bundle (or None). Callers keep the reference for the whole request."""
+        return self._active.get(asset_type)
+
+    def activate(self, bundle):
+        with self._lock:
+            previous = self._active.get(bundle.asset_type)
+            self._active[bundle.asset_type] = bundle
+        return previous
+
+    def reload(self, asset_type, load, warm=None, on_activate=None):
+        """
+        Load (`load()` -> bundle), warm (`warm(bundle)`) and activate a new
+        version on a background thread, then call `on_activate(bundle)`.
+        Returns False if a reload of this asset type is already running.
+        """
+        with self._lock:
+            status = self._reloads.get(asset_type)
+            if status is not None and status["state"] in ("loading", "warming"):
+                return False
+            status = self._reloads[asset_type] = {
+                "state": "loading", "started_at": datetime.now().isoformat(timespec="seconds"),
+                "version": None, "error": None,
+            }
+
+        def run():
+            try:
+                bundle = load()
+                status["version"] = bundle.version
+                status["state"] = "warming"
+                if warm is not None:
+                    warm(bundle)
+                self.activate(bundle)
+                if on_activate is not None:
+                    on_activate(bundle)
+                status["state"] = "active"
+            except Exception as e:
+                traceback.print_exc()
+                status["state"] = "failed"
+                status["error"] = str(e)
+            status["finished_at"] = datetime.now().isoformat(timespec="seconds")
+
+        threading.Thread(target=run, daemon=True, name=f"reload-{asset_type}").start()
+        return True
+
+    def versions(self):
+        with self._lock:
+            active = dict(self._active)
+            reloads = {asset_type: dict(status) for asset_type, status in self._reloads.items()}
+        return {
+            asset_type: {
+                "active": active[asset_type].describe() if asset_type in active else None,
+                "last_reload": reloads.get(asset_type),
+            }
+            for asset_type in sorted(set(active) | set(reloads))
+        }
+
+
+def load_precomputed_risks(bundle, path, data_path):
+    """
+    Per-row risks written by the training pipeline, or None unless they were
+    computed by this exact model version for the current dataset file.
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as saved:
+        if str(saved["model_version"]) != bundle.version or str(saved["data_version"]) != file_version(data_path):
+            return None
+        return saved["risks"]
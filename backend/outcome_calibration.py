@@ -0,0 +1,148 @@
+"""
+Threshold recalibration from confirmed outcomes.
+
+Each asset type keeps two fixed-bin histograms of model probabilities: one
+for readings that were confirmed failures and one for confirmed
+non-failures. Recording an outcome is one bin increment. The confusion
+counts of every candidate threshold (the bin edges) are suffix sums of the
+histograms, so the cost-optimal threshold is recomputed in O(bins) at any
+time without keeping the samples.
+
+Histograms belong to one model version (probabilities of another version
+are not comparable) and are saved as one small .npz file per asset type
+(OutcomeFile). Every server worker merges its outcomes into that file under
+an exclusive fcntl lock (load, add, save) and re-loads it when another worker
+replaced it, so all workers count every outcome. Without fcntl (Windows)
+updates are not serialized across processes.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEFAULT_BINS = 1000
+
+
+class OutcomeCalibration:
+    def __init__(self, version, bins=DEFAULT_BINS):
+        self.version = version
+        self.bins = bins
+        self.positives = np.zeros(bins, dtype=np.int64)
+        self.negatives = np.zeros(bins, dtype=np.int64)
+        self.seeded = 0    # samples taken over from the training calibration
+        self.recorded = 0  # outcomes recorded since
+        self._lock = threading.Lock()
+
+    def _bin(self, probabilities):
+        probabilities = np.asarray(probabilities, dtype=np.float64).reshape(-1)
+        return np.clip((probabilities * self.bins).astype(np.int64), 0, self.bins - 1)
+
+    def _add(self, probabilities, labels):
+        bins = self._bin(probabilities)
+        labels = np.asarray(labels).reshape(-1).astype(bool)
+        with self._lock:
+            self.positives += np.bincount(bins[labels], minlength=self.bins)
+            self.negatives += np.bincount(bins[~labels], minlength=self.bins)
+        return len(bins)
+
+    def seed(self, y_true, y_probs):
+        """Start from a labelled calibration sample (e.g. out-of-fold training probabilities)."""
+        self.seeded += self._add(y_probs, y_true)
+
+    def record(self, probabilities, labels):
+        """Add confirmed outcomes: the model's probability and whether the asset failed."""
+        n = self._add(probabilities, labels)
+        self.recorded += n
+        return n
+
+    def optimal_threshold(self, cost_fp, cost_fn):
+        """
+        Threshold minimising fp * cost_fp + fn * cost_fn over the bin edges
+        (alert when probability >= threshold), with its confusion counts.
+        """
+        with self._lock:
+            positives, negatives = self.positives.copy(), self.negatives.copy()
+        # Alerting at edge b flags bins b.. (b = bins: never alert)
+        tp = np.append(np.cumsum(positives[::-1])[::-1], 0)
+        fp = np.append(np.cumsum(negatives[::-1])[::-1], 0)
+        total_pos, total_neg = int(tp[0]), int(fp[0])
+        fn = total_pos - tp
+        cost = fp * float(cost_fp) + fn * float(cost_fn)
+        best = int(np.argmin(cost))
+        return {
+            "threshold": best / self.bins,
+            "expected_cost": float(cost[best]),
+            "tp": int(tp[best]),
+            "fp": int(fp[best]),
+            "fn": int(fn[best]),
+            "tn": int(total_neg - fp[best]),
+            "samples": total_pos + total_neg,
+            "positives": total_pos,
+            "recorded": self.recorded,
+            "seeded": self.seeded,
+        }
+
+    def save(self, path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with self._lock, open(tmp, "wb") as f:
+            np.savez(f, version=self.version, positives=self.positives, negatives=self.negatives,
+                     seeded=self.seeded, recorded=self.recorded)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Saved histograms (of whichever model version saved them), or None."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as saved:
+            calibration = cls(str(saved["version"]), bins=len(saved["positives"]))
+            calibration.positives = saved["positives"].astype(np.int64)
+            calibration.negatives = saved["negatives"].astype(np.int64)
+            calibration.seeded = int(saved["seeded"])
+            calibration.recorded = int(saved["recorded"])
+        return calibration
+
+
+class OutcomeFile:
+    """
+    One asset type's saved histograms, shared by all worker processes:
+    writers merge under an exclusive lock, readers re-load only when the file
+    was replaced since they last read it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._stamp = None
+
+    def _current_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def changed(self):
+        return self._current_stamp() != self._stamp
+
+    def read(self):
+        """The saved histograms, or None if there are none yet."""
+        self._stamp = self._current_stamp()
+        return OutcomeCalibration.load(self.path) if self._stamp is not None else None
+
+    def write(self, calibration):
+        calibration.save(self.path)
+        self._stamp = self._current_stamp()
+
+    @contextmanager
+    def locked(self):
+        """Exclusive across processes (and threads) for a read-merge-write."""
+        with open(f"{self.path}.lock", "a+") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
@@ -0,0 +1,61 @@
+"""
+Memo cache of forest probabilities for repeated sensor readings.
+
+PLC readings repeat heavily at their native resolution, so the forest's
+probability for a reading is cached under (asset type, model version,
+reading). With quantization enabled each value is first snapped to its
+asset's configured resolution (e.g. 0.1 K, 1 rpm), so readings that only
+differ below the sensor's precision share one entry (and the probability of
+whichever was scored first). Entries of replaced
+model versions are never hit again and age out of the LRU.
+"""
+import threading
+from collections import OrderedDict
+
+
+class PredictionCache:
+    def __init__(self, max_entries=4096, resolutions=None):
+        self.max_entries = max_entries
+        # asset type -> per-value step (None = used as is, e.g. the product Type)
+        self.resolutions = resolutions or {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, asset_type, version, reading):
+        steps = self.resolutions.get(asset_type)
+        if steps is None:
+            return asset_type, version, tuple(reading)
+        return asset_type, version, tuple(
+            value if step is None else round(value / step) for value, step in zip(reading, steps)
+        )
+
+    def get(self, key):
+        with self._lock:
+            probability = self._entries.get(key)
+            if probability is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return probability
+
+    def put(self, key, probability):
+        with self._lock:
+            self._entries[key] = probability
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def metrics(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "quantized": sorted(self.resolutions),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,118 @@
+"""
+Cheap first-tier scorer in front of the serving forests.
+
+A shallow regression tree is fitted to the forest's own failure
+probabilities. Each leaf remembers the range of forest probabilities and
+the bounding box of the readings it was fitted on. A new reading that lands
+inside its leaf's box, in a leaf whose probability range (widened by a
+margin) does not straddle any decision threshold, is answered with the
+leaf's mean probability without touching the forest. Everything else is
+escalated to the full forest. A sample of resolved readings is re-scored by
+the forest to track agreement.
+"""
+import threading
+
+import numpy as np
+from sklearn.tree import DecisionTreeRegressor
+
+# Every AUDIT_EVERY-th resolved reading is also scored by the forest
+AUDIT_EVERY = 50
+
+
+class PreScreen:
+    def __init__(self, tree, leaf_lo, leaf_hi, leaf_mean, box_lo, box_hi, margin):
+        t = tree.tree_
+        # Plain lists: walking a few levels in Python beats a sklearn call per reading
+        self._left = t.children_left.tolist()
+        self._right = t.children_right.tolist()
+        self._feature = t.feature.tolist()
+        self._threshold = t.threshold.tolist()
+        self.leaf_lo = leaf_lo
+        self.leaf_hi = leaf_hi
+        self.leaf_mean = leaf_mean
+        self.box_lo = box_lo
+        self.box_hi = box_hi
+        self.margin = margin
+        self.depth = tree.get_depth()
+        self.leaves = tree.get_n_leaves()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.resolved = 0
+        self.audited = 0
+        self.agreed = 0
+        self.audit_abs_error = 0.0
+
+    @classmethod
+    def fit(cls, X, probs, max_depth=8, min_samples_leaf=20, margin=0.02):
+        """Fit on readings `X` (model column order) and the forest's probabilities for them."""
+        X = np.asarray(X, dtype=np.float64)
+        probs = np.asarray(probs, dtype=np.float64)
+        tree = DecisionTreeRegressor(max_depth=max_depth, min_samples_leaf=min_samples_leaf, random_state=0)
+        tree.fit(X, probs)
+
+        leaf_of = tree.apply(X)
+        n_nodes = tree.tree_.node_count
+        leaf_lo = np.full(n_nodes, np.inf)
+        leaf_hi = np.full(n_nodes, -np.inf)
+        box_lo = np.full((n_nodes, X.shape[1]), np.inf)
+        box_hi = np.full((n_nodes, X.shape[1]), -np.inf)
+        np.minimum.at(leaf_lo, leaf_of, probs)
+        np.maximum.at(leaf_hi, leaf_of, probs)
+        np.minimum.at(box_lo, leaf_of, X)
+        np.maximum.at(box_hi, leaf_of, X)
+        counts = np.bincount(leaf_of, minlength=n_nodes)
+        leaf_mean = np.bincount(leaf_of, weights=probs, minlength=n_nodes) / np.maximum(counts, 1)
+        return cls(tree, leaf_lo.tolist(), leaf_hi.tolist(), leaf_mean.tolist(), box_lo, box_hi, margin)
+
+    def _leaf(self, x):
+        node = 0
+        left, right, feature, threshold = self._left, self._right, self._feature, self._threshold
+        while left[node] != -1:
+            node = left[node] if x[feature[node]] <= threshold[node] else right[node]
+        return node
+
+    def score(self, x, thresholds):
+        """
+        (probability, audit) for reading `x`: the leaf probability if the
+        pre-screen is confident about it relative to every threshold,
+        otherwise None (escalate), and whether this resolved reading is one
+        to audit against the forest.
+        """
+        leaf = self._leaf(x)
+        lo = self.leaf_lo[leaf] - self.margin
+        hi = self.leaf_hi[leaf] + self.margin
+        confident = (
+            all(t <= lo or t > hi for t in thresholds)
+            and bool(np.all(x >= self.box_lo[leaf])) and bool(np.all(x <= self.box_hi[leaf]))
+        )
+        audit = False
+        with self._lock:
+            self.calls += 1
+            if confident:
+                self.resolved += 1
+                audit = self.resolved % AUDIT_EVERY == 0
+        return (self.leaf_mean[leaf] if confident else None), audit
+
+    def record_audit(self, screened, forest, thresholds):
+        """Compare a resolved probability with the forest's for the same reading."""
+        agree = all((screened >= t) == (forest >= t) for t in thresholds)
+        with self._lock:
+            self.audited += 1
+            self.agreed += int(agree)
+            self.audit_abs_error += abs(screened - forest)
+
+    def metrics(self):
+        with self._lock:
+            escalated = self.calls - self.resolved
+            return {
+                "depth": int(self.depth),
+                "leaves": int(self.leaves),
+                "margin": self.margin,
+                "calls": self.calls,
+                "resolved": self.resolved,
+                "escalated": escalated,
+                "escalation_rate": round(escalated / self.calls, 4) if self.calls else 0.0,
+                "audited": self.audited,
+                "agreement": round(self.agreed / self.audited, 4) if self.audited else None,
+                "mean_abs_error": round(self.audit_abs_error / self.audited, 4) if self.audited else None,
+            }
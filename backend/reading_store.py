@@ -0,0 +1,196 @@
+"""
+Embedded time-series store for sensor readings and their scored risks.
+
+SQLite in WAL mode with one table per asset type, clustered on
+(asset_id, seq) (WITHOUT ROWID), so one asset's readings are stored
+contiguously and a range or latest-N query is a single index range scan.
+Inserts are batched into one transaction per call. WAL lets request threads
+and other worker processes read while a batch is being written. Each thread
+uses its own connection; writes in this process are serialized.
+
+Every row records its source: "dataset" rows are rewritten as a whole when
+the dataset changes (replace_dataset), "posted" rows (POST /readings) are
+kept and renumbered to follow the new dataset rows.
+"""
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+BUSY_TIMEOUT_MS = 30_000
+SOURCES = ("dataset", "posted")
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class ReadingStore:
+    def __init__(self, path, schemas):
+        """
+        `schemas` maps asset type -> numeric value columns stored per reading
+        (a "risk" column, the scored failure risk in %, is always added).
+        Columns missing from an existing table are added; older rows read NaN.
+        """
+        self.path = path
+        self.schemas = {asset_type: list(columns) + ["risk"] for asset_type, columns in schemas.items()}
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self.inserted = 0
+        conn = self._conn()
+        migrated = False
+        with self._write_lock, conn:
+            for asset_type, columns in self.schemas.items():
+                values = ", ".join(f"{_quote(c)} REAL" for c in columns)
+                table = _quote('readings_' + asset_type)
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    f"asset_id TEXT NOT NULL, seq INTEGER NOT NULL, source TEXT NOT NULL DEFAULT 'dataset', "
+                    f"{values}, PRIMARY KEY (asset_id, seq)) WITHOUT ROWID"
+                )
+                # Columns added to a schema after the table was created (NULL for older rows)
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                for column in columns:
+                    if column not in existing:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {_quote(column)} REAL")
+                if "source" not in existing:
+                    # Stores from before sources were recorded: their rows count as dataset rows
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN source TEXT NOT NULL DEFAULT 'dataset'")
+                    migrated = True
+            conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT)")
+            if migrated:
+                # ... and are rewritten from the dataset on the next sync
+                conn.execute("DELETE FROM store_meta WHERE key LIKE 'dataset:%'")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; fine for sensor history
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    def _table(self, asset_type):
+        if asset_type not in self.schemas:
+            raise KeyError(f"Unknown asset type: {asset_type}")
+        return _quote("readings_" + asset_type)
+
+    def _upsert(self, conn, asset_type, asset_ids, seqs, columns, source):
+        if source not in SOURCES:
+            raise ValueError(f"Unknown source '{source}'. Use one of {list(SOURCES)}.")
+        names = self.schemas[asset_type]
+        rows = zip(
+            (str(a) for a in asset_ids),
+            np.asarray(seqs, dtype=np.int64).tolist(),
+            *(np.asarray(columns[c], dtype=np.float64).tolist() for c in names),
+        )
+        sql = (f"INSERT OR REPLACE INTO {self._table(asset_type)} "
+               f"(asset_id, seq, source, {', '.join(map(_quote, names))}) "
+               f"VALUES (?, ?, '{source}', {', '.join('?' * len(names))})")
+        conn.executemany(sql, rows)
+        self.inserted += len(seqs)
+        return len(seqs)
+
+    def insert(self, asset_type, asset_ids, seqs, columns, source="posted"):
+        """
+        Bulk upsert readings in one transaction. `asset_ids` and `seqs` are
+        per-row sequences; `columns` maps each schema column (incl. "risk")
+        to a per-row array. Returns the number of rows written.
+        """
+        conn = self._conn()
+        with self._write_lock, conn:
+            return self._upsert(conn, asset_type, asset_ids, seqs, columns, source)
+
+    def replace_dataset(self, asset_type, asset_ids, seqs, columns, meta_key, meta_value):
+        """
+        Swap the asset type's dataset rows for new ones in one transaction:
+        old dataset rows are deleted, posted rows that would overlap the new
+        dataset are moved (in order) to follow each asset's last dataset
+        reading, and `meta_key` is set to `meta_value` (e.g. the dataset tag).
+        """
+        table = self._table(asset_type)
+        asset_ids = [str(a) for a in asset_ids]
+        seqs = np.asarray(seqs, dtype=np.int64)
+        last = {}
+        for asset_id, seq in zip(asset_ids, seqs.tolist()):
+            last[asset_id] = max(seq, last.get(asset_id, seq))
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.execute(f"DELETE FROM {table} WHERE source = 'dataset'")
+            for asset_id, first in conn.execute(
+                f"SELECT asset_id, MIN(seq) FROM {table} WHERE source = 'posted' GROUP BY asset_id"
+            ).fetchall():
+                shift = last.get(asset_id, -1) + 1 - first
+                if shift > 0:
+                    # Through negative seqs so no row collides with one not yet moved
+                    conn.execute(f"UPDATE {table} SET seq = -seq - 1 WHERE asset_id = ?", (asset_id,))
+                    conn.execute(f"UPDATE {table} SET seq = -seq - 1 + ? WHERE asset_id = ?", (shift, asset_id))
+            n = self._upsert(conn, asset_type, asset_ids, seqs, columns, "dataset")
+            conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)", (meta_key, str(meta_value)))
+        return n
+
+    def range(self, asset_type, asset_id, since=None, until=None, limit=None, source=None):
+        """
+        One asset's readings with since <= seq <= until (of one `source`
+        only if given), oldest first; with `limit` only the latest `limit` of
+        them. Returns {column: np.ndarray} including "seq".
+        """
+        names = self.schemas[asset_type]
+        where, params = ["asset_id = ?"], [str(asset_id)]
+        if source is not None:
+            where.append("source = ?")
+            params.append(source)
+        if since is not None:
+            where.append("seq >= ?")
+            params.append(int(since))
+        if until is not None:
+            where.append("seq <= ?")
+            params.append(int(until))
+        sql = f"SELECT seq, {', '.join(map(_quote, names))} FROM {self._table(asset_type)} WHERE {' AND '.join(where)}"
+        if limit is not None:
+            # Latest N via a backward scan of the (asset_id, seq) key
+            sql += " ORDER BY seq DESC LIMIT ?"
+            params.append(max(0, int(limit)))
+        else:
+            sql += " ORDER BY seq"
+        rows = self._conn().execute(sql, params).fetchall()
+        if limit is not None:
+            rows.reverse()
+        data = np.array(rows, dtype=np.float64).reshape(len(rows), len(names) + 1)
+        result = {"seq": data[:, 0].astype(np.int64)}
+        for j, name in enumerate(names, start=1):
+            result[name] = data[:, j]
+        return result
+
+    def latest(self, asset_type, asset_id, n):
+        """The latest `n` readings of one asset, oldest first."""
+        return self.range(asset_type, asset_id, limit=n)
+
+    def last_seq(self, asset_type, asset_id):
+        """Sequence number of an asset's newest reading, or None."""
+        row = self._conn().execute(
+            f"SELECT MAX(seq) FROM {self._table(asset_type)} WHERE asset_id = ?", (str(asset_id),)
+        ).fetchone()
+        return row[0]
+
+    def count(self, asset_type):
+        return self._conn().execute(f"SELECT COUNT(*) FROM {self._table(asset_type)}").fetchone()[0]
+
+    def get_meta(self, key):
+        row = self._conn().execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def metrics(self):
+        return {
+            "path": os.path.abspath(self.path),
+            "rows": {asset_type: self.count(asset_type) for asset_type in self.schemas},
+            "inserted": self.inserted,
+        }
@@ -0,0 +1,88 @@
+"""
+Pre-encoded JSON response cache with ETags.
+
+Polling endpoints (fleet status, histories) return the same payload until
+the underlying risks change. Entries keep the encoded JSON bytes, a gzipped
+copy and a content ETag, tagged with the data generation they were built
+from, so a repeat poll costs a dict lookup. An unchanged client copy is
+answered with 304 Not Modified. Concurrent misses for the same entry are
+coalesced so the payload is built once.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from single_flight import SingleFlight
+
+# Responses smaller than this are not worth compressing
+MIN_GZIP_BYTES = 1024
+
+
+class EncodedResponse:
+    __slots__ = ("generation", "body", "gzipped", "etag")
+
+    def __init__(self, generation, body):
+        self.generation = generation
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=6) if len(body) >= MIN_GZIP_BYTES else None
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+    def matches(self, if_none_match):
+        """True if an If-None-Match header value covers this response."""
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(tag.removeprefix("W/") == self.etag for tag in tags)
+
+
+def encode_json(payload):
+    """Encode like FastAPI's JSONResponse."""
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class ResponseCache:
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.builds = SingleFlight()
+
+    def get_or_build(self, key, generation, build):
+        """
+        Encoded response for `key` at data `generation`; `build()` produces the
+        payload on a miss or when the cached entry is from an older generation.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.generation == generation:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        return self.builds.do((key, generation), lambda: self._build(key, generation, build))
+
+    def _build(self, key, generation, build):
+        entry = EncodedResponse(generation, encode_json(build()))
+        with self._lock:
+            current = self._entries.get(key)
+            # A slower build for an older generation must not replace a newer entry
+            if current is None or current.generation <= generation:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def metrics(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
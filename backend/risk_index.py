@@ -0,0 +1,97 @@
+"""
+Maintained per-asset risk index.
+
+Keeps assets sorted by risk so "top K riskiest", "everything above X%" and
+percentile queries are answered from the sorted order in O(K + log N)
+instead of scanning and sorting the whole fleet on every request. Scores
+are updated incrementally as new risks arrive for individual assets.
+
+Assets without a score yet (NaN, e.g. no readings) sort after every scored
+asset, are never above a threshold and do not count towards percentiles.
+"""
+import math
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+_UNSCORED = math.inf  # sort key of NaN scores: after every real score
+
+
+def _key(asset_id, score):
+    # NaN compares false with everything and would break the sorted order
+    return (_UNSCORED if math.isnan(score) else -score, asset_id)
+
+
+def _score(neg):
+    return math.nan if neg == _UNSCORED else -neg
+
+
+class RiskIndex:
+    def __init__(self, ids=(), scores=()):
+        self._lock = threading.Lock()
+        self._scores = {}
+        # Sorted ascending by (-score, asset_id), i.e. riskiest first with
+        # ties broken by id so every entry has a unique, findable key (_key).
+        self._keys = []
+        self.rebuild(ids, scores)
+
+    def rebuild(self, ids, scores):
+        """Replace the whole index (O(N log N)); used for bulk loads."""
+        scores_by_id = {asset_id: float(score) for asset_id, score in zip(ids, scores)}
+        keys = sorted(_key(asset_id, score) for asset_id, score in scores_by_id.items())
+        with self._lock:
+            self._scores = scores_by_id
+            self._keys = keys
+
+    def update(self, asset_id, score):
+        """Insert or move one asset (O(log N) search plus a list shift)."""
+        score = float(score)
+        with self._lock:
+            old = self._scores.get(asset_id)
+            if old is not None:
+                if old == score or (math.isnan(old) and math.isnan(score)):
+                    return
+                del self._keys[bisect_left(self._keys, _key(asset_id, old))]
+            insort(self._keys, _key(asset_id, score))
+            self._scores[asset_id] = score
+
+    def remove(self, asset_id):
+        with self._lock:
+            old = self._scores.pop(asset_id, None)
+            if old is not None:
+                del self._keys[bisect_left(self._keys, _key(asset_id, old))]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get(self, asset_id):
+        return self._scores.get(asset_id)
+
+    def top(self, k):
+        """The `k` riskiest assets as (asset_id, score), riskiest first."""
+        with self._lock:
+            return [(asset_id, _score(neg)) for neg, asset_id in self._keys[:max(0, int(k))]]
+
+    def above(self, threshold, limit=None):
+        """
+        Assets with score >= threshold, riskiest first, plus the total count
+        (which may exceed `limit`).
+        """
+        with self._lock:
+            end = bisect_right(self._keys, -float(threshold), key=lambda key: key[0])
+            stop = end if limit is None else min(end, max(0, int(limit)))
+            return [(asset_id, _score(neg)) for neg, asset_id in self._keys[:stop]], end
+
+    def percentile(self, p):
+        """
+        Score at the p-th percentile (nearest rank) of the scored assets and
+        the asset holding it, or (None, None) if none is scored.
+        """
+        with self._lock:
+            n = bisect_left(self._keys, (_UNSCORED,))
+            if n == 0:
+                return None, None
+            p = min(max(float(p), 0.0), 100.0)
+            # Keys are descending, so the p-th percentile sits n-1-rank from the top
+            rank = int(round(p / 100 * (n - 1)))
+            neg, asset_id = self._keys[n - 1 - rank]
+            return asset_id, -neg
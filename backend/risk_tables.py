@@ -0,0 +1,189 @@
+"""
+Fleet risk tables shared across server worker processes.
+
+The per-row failure probabilities of each asset type's dataset are published
+once into a memory-mapped file (under /dev/shm when available) and every
+uvicorn worker maps the same pages read-only, so N workers score the fleet
+once and hold one copy. A table is keyed by model and data version and
+carries a generation counter that increases with every publish.
+
+One producer per asset type is elected with an exclusive fcntl lock: the
+worker holding it scores and publishes, the others block on the lock and then
+map the published table. Publishing writes a new file and renames it over
+the old one, so readers never see a partial table and keep their existing
+mapping until they re-open. Temporary files left by a producer that died
+mid-publish are removed by the next producer. Without fcntl (Windows) tables
+are not shared and every process scores for itself.
+
+Only the dataset risks are shared. Everything derived from them and from
+posted readings (fleet caches, rolling statistics, risk indexes, pre-screen,
+drift baselines) is built per worker, so readings ingested through one
+worker reach the others' statistics only on their next reload.
+"""
+import glob
+import json
+import os
+import struct
+import tempfile
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+MAGIC = b"PMRISK01"
+HEADER_BYTES = 4096          # magic, generation, rows, metadata JSON; data starts here
+_HEAD = struct.Struct("<8sQQI")
+
+
+def default_table_dir():
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "predictive-maintenance-risk-tables")
+
+
+class RiskTable:
+    """A mapped table: read-only `risks` plus the metadata it was published with."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, self.generation, self.rows, meta_len = _HEAD.unpack(f.read(_HEAD.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a risk table")
+            self.meta = json.loads(f.read(meta_len))
+            self.inode = os.fstat(f.fileno()).st_ino
+        self.risks = (np.memmap(path, dtype="<f8", mode="r", offset=HEADER_BYTES, shape=(self.rows,))
+                      if self.rows else np.empty(0))
+
+    def matches(self, model_version, data_version):
+        return self.meta.get("model_version") == model_version and self.meta.get("data_version") == data_version
+
+
+class SharedRiskTables:
+    def __init__(self, directory):
+        self.directory = directory
+        self.enabled = bool(directory) and fcntl is not None
+        self._tables = {}  # asset type -> RiskTable last mapped by this process
+        self._lock = threading.Lock()
+        if self.enabled:
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError as e:
+                print(f"⚠️ Risk tables not shared ({directory}: {e})")
+                self.enabled = False
+
+    def _path(self, asset_type, suffix="risks"):
+        return os.path.join(self.directory, f"{asset_type}.{suffix}")
+
+    def open(self, asset_type):
+        """The currently published table (re-mapped only if it was replaced), or None."""
+        if not self.enabled:
+            return None
+        path = self._path(asset_type)
+        try:
+            inode = os.stat(path).st_ino
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            table = self._tables.get(asset_type)
+            if table is None or table.inode != inode:
+                try:
+                    table = self._tables[asset_type] = RiskTable(path)
+                except (OSError, ValueError):
+                    return None
+            return table
+
+    def load(self, asset_type, model_version, data_version):
+        """Zero-copy risks published for this model and data version, or None."""
+        table = self.open(asset_type)
+        if table is None or not table.matches(model_version, data_version):
+            return None
+        return np.asarray(table.risks)
+
+    def claim(self, asset_type, block=False):
+        """
+        Try to become the producer for an asset type. Returns an open lock
+        file (close it to release) or None if another process holds it.
+        """
+        if not self.enabled:
+            return None
+        lock = open(self._path(asset_type, "lock"), "a+")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | (0 if block else fcntl.LOCK_NB))
+        except BlockingIOError:
+            lock.close()
+            return None
+        return lock
+
+    def wait(self, asset_type):
+        """Block until the current producer (if any) has finished."""
+        lock = self.claim(asset_type, block=True)
+        if lock is not None:
+            lock.close()
+
+    def remove_stale(self, asset_type):
+        """
+        Delete temporary tables of interrupted publishes (call while holding
+        the claim: no other process is writing one then).
+        """
+        removed = 0
+        for path in glob.glob(glob.escape(self._path(asset_type, "risks")) + ".*.tmp"):
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def publish(self, asset_type, model_version, data_version, risks):
+        """Write a new generation of the table (call while holding the claim)."""
+        self.remove_stale(asset_type)
+        current = self.open(asset_type)
+        generation = current.generation + 1 if current is not None else 1
+        risks = np.ascontiguousarray(risks, dtype="<f8")
+        meta = json.dumps({"model_version": model_version, "data_version": data_version}).encode()
+        if _HEAD.size + len(meta) > HEADER_BYTES:
+            raise ValueError("Risk table metadata too large")
+        tmp = self._path(asset_type, f"risks.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(_HEAD.pack(MAGIC, generation, len(risks), len(meta)) + meta)
+            f.seek(HEADER_BYTES)
+            f.write(risks.tobytes())
+        os.replace(tmp, self._path(asset_type))
+        return generation
+
+    def get_or_publish(self, asset_type, model_version, data_version, compute):
+        """
+        Risks for this model and data version: mapped from the shared table,
+        or computed by the elected producer (`compute()`) and published first.
+        """
+        risks = self.load(asset_type, model_version, data_version)
+        if risks is not None or not self.enabled:
+            return risks if risks is not None else compute()
+        lock = self.claim(asset_type, block=True)
+        try:
+            # Another worker may have published while this one waited
+            risks = self.load(asset_type, model_version, data_version)
+            if risks is None:
+                computed = compute()
+                try:
+                    self.publish(asset_type, model_version, data_version, computed)
+                except OSError as e:
+                    print(f"⚠️ Could not publish the {asset_type} risk table: {e}")
+                risks = self.load(asset_type, model_version, data_version)
+                if risks is None:
+                    risks = computed
+        finally:
+            lock.close()
+        return risks
+
+    def metrics(self):
+        if not self.enabled:
+            return {"enabled": False}
+        result = {"enabled": True, "directory": self.directory}
+        with self._lock:
+            for asset_type, table in self._tables.items():
+                result[asset_type] = {"generation": table.generation, "rows": table.rows, **table.meta}
+        return result
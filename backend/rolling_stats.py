@@ -0,0 +1,188 @@
+"""
+Rolling-window risk statistics per asset.
+
+Every asset of a type gets a ring buffer per configured window size. Each
+new reading updates the running sum, slope terms, max deque and EWMA in
+O(1), so the fleet endpoints can read mean/max/EWMA/slope for any configured
+window without touching the raw readings. State is stored as one array per
+statistic across all assets, so fleet-wide reads are vectorized.
+"""
+import threading
+from collections import deque
+
+import numpy as np
+
+ROLLING_STATS = ("mean", "max", "ewma", "slope", "latest")
+
+# Recompute running sums from the buffer every RESYNC_ROUNDS full windows to
+# stop floating point drift from the add/subtract updates.
+RESYNC_ROUNDS = 64
+
+
+class _WindowState:
+    """Ring buffers and running terms of one window size for all assets."""
+
+    def __init__(self, n_assets, size):
+        self.size = size
+        self.alpha = 2.0 / (size + 1)  # EWMA with a span equal to the window
+        self.buf = np.zeros((n_assets, size))
+        self.sum = np.zeros(n_assets)
+        # Sum of x*y with x the position inside the window (0 = oldest), so
+        # the slope terms stay small no matter how many readings were seen.
+        self.sum_xy = np.zeros(n_assets)
+        self.max = np.full(n_assets, np.nan)
+        self.ewma = np.full(n_assets, np.nan)
+        # Monotonic (reading number, value) deques giving the window max in O(1)
+        self.deques = [deque() for _ in range(n_assets)]
+
+    def push(self, i, t, value):
+        size = self.size
+        slot = t % size
+        if t >= size:
+            old = self.buf[i, slot]
+            # Drop the oldest reading (x = 0) and shift the rest down one place
+            self.sum[i] -= old
+            self.sum_xy[i] -= self.sum[i]
+            x = size - 1
+        else:
+            x = t
+        self.buf[i, slot] = value
+        self.sum[i] += value
+        self.sum_xy[i] += x * value
+
+        dq = self.deques[i]
+        while dq and dq[-1][1] <= value:
+            dq.pop()
+        dq.append((t, value))
+        while dq[0][0] <= t - size:
+            dq.popleft()
+        self.max[i] = dq[0][1]
+
+        ewma = self.ewma[i]
+        self.ewma[i] = value if np.isnan(ewma) else ewma + self.alpha * (value - ewma)
+
+        if (t + 1) % (size * RESYNC_ROUNDS) == 0:
+            self._resync(i, t + 1)
+
+    def _window_values(self, i, total):
+        """The asset's window contents, oldest first."""
+        n = min(total, self.size)
+        slots = np.arange(total - n, total) % self.size
+        return self.buf[i, slots]
+
+    def _resync(self, i, total):
+        values = self._window_values(i, total)
+        self.sum[i] = values.sum()
+        self.sum_xy[i] = np.dot(np.arange(len(values)), values)
+
+    def seed(self, i, values):
+        """Load an asset's history in one vectorized step (same state as pushing it)."""
+        total = len(values)
+        tail = values[-self.size:]
+        first = total - len(tail)
+        self.buf[i, np.arange(first, total) % self.size] = tail
+        self.sum[i] = tail.sum()
+        self.sum_xy[i] = np.dot(np.arange(len(tail)), tail)
+
+        # Readings strictly greater than everything after them form the max deque
+        later_max = np.append(np.maximum.accumulate(tail[::-1])[::-1][1:], -np.inf)
+        keep = np.nonzero(tail > later_max)[0]
+        self.deques[i] = deque(zip((first + keep).tolist(), tail[keep].tolist()))
+        self.max[i] = tail.max()
+
+        # Closed form of the EWMA recursion started at the first reading
+        decay = (1 - self.alpha) ** np.arange(total - 1, -1, -1)
+        weights = self.alpha * decay
+        weights[0] = decay[0]
+        self.ewma[i] = np.dot(weights, values)
+
+
+class RollingStats:
+    """Rolling risk statistics for every asset of one type."""
+
+    def __init__(self, asset_ids, windows):
+        self.ids = list(asset_ids)
+        self.windows = sorted(set(int(w) for w in windows))
+        self._positions = {asset_id: i for i, asset_id in enumerate(self.ids)}
+        n = len(self.ids)
+        self.total = np.zeros(n, dtype=np.int64)
+        self.lifetime_sum = np.zeros(n)
+        self.latest = np.full(n, np.nan)
+        self._windows = {w: _WindowState(n, w) for w in self.windows}
+        self._lock = threading.Lock()
+
+    def __contains__(self, asset_id):
+        return asset_id in self._positions
+
+    def seed(self, asset_id, values):
+        """Initialise an asset from its full risk history (oldest first)."""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        i = self._positions[asset_id]
+        with self._lock:
+            self.total[i] = len(values)
+            self.lifetime_sum[i] = values.sum()
+            self.latest[i] = values[-1]
+            for state in self._windows.values():
+                state.seed(i, values)
+
+    def push(self, asset_id, value):
+        """Add one new reading for an asset. O(1) per configured window."""
+        value = float(value)
+        i = self._positions[asset_id]
+        with self._lock:
+            t = int(self.total[i])
+            for state in self._windows.values():
+                state.push(i, t, value)
+            self.total[i] = t + 1
+            self.lifetime_sum[i] += value
+            self.latest[i] = value
+
+    def _window(self, window):
+        if window not in self._windows:
+            raise ValueError(f"Window {window} is not tracked. Available windows: {self.windows}")
+        return self._windows[window]
+
+    def fleet(self, stat="mean", window=None, positions=None):
+        """
+        Per-asset statistic in asset order (or for the given positions only).
+        With window=None the statistic covers each asset's whole history
+        (only "mean" and "latest" are available then).
+        """
+        if stat not in ROLLING_STATS:
+            raise ValueError(f"Unknown statistic '{stat}'. Use one of {list(ROLLING_STATS)}.")
+        sel = slice(None) if positions is None else positions
+        with self._lock:
+            if stat == "latest":
+                return self.latest[sel].copy()
+            total = self.total[sel]
+            if window is None:
+                if stat != "mean":
+                    raise ValueError(f"Statistic '{stat}' needs a window. Available windows: {self.windows}")
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    return self.lifetime_sum[sel] / total
+
+            state = self._window(window)
+            n = np.minimum(total, window).astype(np.float64)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                if stat == "mean":
+                    return state.sum[sel] / n
+                if stat == "max":
+                    return state.max[sel].copy()
+                if stat == "ewma":
+                    return state.ewma[sel].copy()
+                # Least-squares slope (risk change per reading) with x = 0..n-1
+                sum_x = n * (n - 1) / 2
+                sum_xx = (n - 1) * n * (2 * n - 1) / 6
+                denom = n * sum_xx - sum_x ** 2
+                slope = (n * state.sum_xy[sel] - sum_x * state.sum[sel]) / denom
+                return np.where(denom > 0, slope, 0.0)
+
+    def stats(self, asset_id, window=None):
+        """All statistics of one asset for one window as a dict."""
+        at = [self._positions[asset_id]]
+        stats = ("mean", "latest") if window is None else ("mean", "max", "ewma", "slope", "latest")
+        result = {stat: float(self.fleet(stat, window, at)[0]) for stat in stats}
+        result["count"] = int(self.total[at[0]])
+        return result
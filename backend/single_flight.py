@@ -0,0 +1,72 @@
+"""
+Single-flight request coalescing.
+
+When identical expensive calls (same normalized key) arrive while one is
+already running, the later callers wait for the running call and share its
+result instead of repeating the work. Nothing is cached once the call
+finishes; that is left to the caller (e.g. the response cache).
+"""
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.executions = 0
+
+    def do(self, key, fn):
+        """
+        Run `fn()` for `key`, or wait for the identical call already in flight
+        and return its result. Exceptions are re-raised in every waiter.
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def metrics(self):
+        with self._lock:
+            shared = self.calls - self.executions
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "shared": shared,
+                "in_flight": len(self._calls),
+                # Fraction of calls answered by another caller's computation
+                "dedup_ratio": round(shared / self.calls, 4) if self.calls else 0.0,
+            }
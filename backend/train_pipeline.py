@@ -0,0 +1,316 @@
+"""
+Training pipeline for all asset types (product, turbine, generator).
+
+Fits the serving RandomForests with parallel tree building, derives the
+calibration arrays from stratified K-fold out-of-fold probabilities (every
+row is scored by a model that never saw it) and writes everything the API
+loads: model, columns, calibration data and the pre-computed risks of the
+serving dataset, tagged with the model version so startup can skip scoring.
+
+Usage:
+    python train_pipeline.py --asset product
+    python train_pipeline.py --asset turbine --folds 10
+    python train_pipeline.py --asset all --out-dir artifacts
+    python train_pipeline.py --asset generator --data fleet_generators.parquet
+    python train_pipeline.py --asset turbine --compress --auc-tolerance 0.01
+"""
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, classification_report, roc_auc_score
+from sklearn.model_selection import StratifiedKFold, cross_val_predict
+
+from failure_modes import FAILURE_MODES, mode_probabilities
+from features import FEATURES, GENERATOR_FEATURES, feature_matrix
+from model_compression import compression_frontier, fit_selected, format_frontier, out_of_fold_probabilities, select_candidate
+from model_registry import file_version, paired_path
+
+# The generator model is trained on the AI4I machine readings under the
+# generator's sensor names
+GENERATOR_SOURCE_COLUMNS = {
+    "Air temperature": "air_temp",
+    "Process temperature": "core_temp",
+    "Rotational speed": "rpm",
+    "Torque": "torque",
+    "Tool wear": "wear",
+}
+
+# Training source, label, model settings and output artifacts per asset type.
+# The *_columns.pkl file records the model input columns (features.FEATURES).
+ASSET_SPECS = {
+    "product": {
+        "source": "generalized_dff.csv",
+        "target": "Machine failure",
+        "params": {"n_estimators": 100},
+        "model_path": "model.pkl",
+        "model_env": "MODEL_PATH",
+        "columns_path": "model_columns.pkl",
+        "calibration_path": "calibration_data.pkl",
+        "serving_data": "generalized_dff.csv",
+        "risks_path": "product_fleet_risks.npz",
+        "failure_modes": {
+            "targets": FAILURE_MODES,
+            "model_path": "failure_mode_model.pkl",
+            "calibration_path": "failure_mode_calibration.pkl",
+            "risks_path": "failure_mode_risks.npz",
+        },
+    },
+    "turbine": {
+        "source": "turbine_processed_data.csv",
+        "target": "Turbine_Failure",
+        "params": {"n_estimators": 100, "class_weight": "balanced"},
+        "model_path": "turbine_model.pkl",
+        "model_env": "TURBINE_MODEL_PATH",
+        "columns_path": "turbine_model_columns.pkl",
+        "calibration_path": "turbine_calibration_data.pkl",
+        "serving_data": "Turbine_test_data.csv",
+        "risks_path": "turbine_fleet_risks.npz",
+    },
+    "generator": {
+        "source": "generalized_dff.csv",
+        "target": "Machine failure",
+        "params": {"n_estimators": 150, "max_depth": 10},
+        "model_path": "generator_model.pkl",
+        "model_env": "GENERATOR_MODEL_PATH",
+        "columns_path": "generator_model_columns.pkl",
+        "calibration_path": "generator_calibration_data.pkl",
+        "serving_data": "generator_test_data.csv",
+        "risks_path": "generator_fleet_risks.npz",
+    },
+}
+
+
+def serving_paths(asset_type, model_path=None):
+    """
+    (model, columns, calibration) files the API serves for an asset type:
+    `model_path`, else the model named by the asset's env variable (as in
+    main.py), with the calibration paired to that model (paired_path).
+    """
+    spec = ASSET_SPECS[asset_type]
+    model_path = model_path or os.getenv(spec["model_env"], spec["model_path"])
+    return model_path, spec["columns_path"], paired_path(model_path, spec["model_path"], spec["calibration_path"])
+
+
+def read_table(path):
+    """Read a CSV or Parquet file (Parquet needs pyarrow)."""
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("❌ Parquet input requires pyarrow (pip install pyarrow).")
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def build_features(asset_type, df):
+    """Model input frame for a dataset, columns in training order (features.py pipeline)."""
+    if asset_type == "generator" and not set(GENERATOR_FEATURES).issubset(df.columns):
+        df = df.rename(columns=GENERATOR_SOURCE_COLUMNS)
+    # Named columns so the fitted models carry feature_names_in_
+    return pd.DataFrame(feature_matrix(asset_type, df), columns=FEATURES[asset_type], index=df.index)
+
+
+def compact_model_path(model_path):
+    """'turbine_model.pkl' -> 'turbine_model_compact.pkl' (also names its calibration file)."""
+    stem, ext = os.path.splitext(model_path)
+    return f"{stem}_compact{ext}"
+
+
+def compress(asset_type, X, y, out_dir=".", folds=5, seed=42, n_jobs=-1, auc_tolerance=0.005, cost_tolerance=0.05):
+    """
+    Evaluate compressed candidates of the asset's forest, print the frontier,
+    and save the selected model next to the full one with its own
+    out-of-fold calibration (<calibration>_compact.pkl) plus a JSON report.
+    """
+    spec = ASSET_SPECS[asset_type]
+    t = time.perf_counter()
+    print(f"⚙️ Compressing {asset_type} model (AUC tolerance {auc_tolerance}, cost tolerance {cost_tolerance:.0%})")
+    results = compression_frontier(X, y, spec["params"], seed=seed, n_jobs=n_jobs)
+    selected = select_candidate(results, auc_tolerance, cost_tolerance)
+    print(format_frontier(results))
+
+    compact_path = os.path.join(out_dir, compact_model_path(spec["model_path"]))
+    joblib.dump(fit_selected(selected, X, y, spec["params"], seed=seed, n_jobs=n_jobs), compact_path)
+    # Thresholds of the compact model are tuned on its own probabilities, not the full forest's
+    calibration_path = os.path.join(out_dir, compact_model_path(spec["calibration_path"]))
+    y_probs = out_of_fold_probabilities(selected, X, y, spec["params"], folds=folds, seed=seed, n_jobs=n_jobs)
+    joblib.dump({"y_true": y, "y_probs": y_probs}, calibration_path)
+    report_path = os.path.join(out_dir, f"{asset_type}_compression_report.json")
+    with open(report_path, "w") as f:
+        json.dump({
+            "asset_type": asset_type,
+            "auc_tolerance": auc_tolerance,
+            "cost_tolerance": cost_tolerance,
+            "selected": selected["name"],
+            "frontier": results,
+        }, f, indent=2)
+
+    full = next(r for r in results if r["name"] == "full")
+    print(f"✅ Selected {selected['name']}: {selected['latency_ms']:.2f} ms vs {full['latency_ms']:.2f} ms per reading, "
+          f"AUC {selected['auc']:.4f} vs {full['auc']:.4f} -> {compact_path} (calibration: {calibration_path})")
+    print(f"⏱️ Compression time: {time.perf_counter() - t:.1f}s (report: {report_path})")
+    return selected
+
+
+def train_failure_modes(asset_type, df, X, out_dir=".", folds=5, seed=42, n_jobs=-1, serving_data=None):
+    """
+    Fit one multi-output forest on the asset's failure-mode labels and write
+    it with its out-of-fold calibration and the serving dataset's per-mode
+    risks. Returns per-mode out-of-fold ROC AUC.
+    """
+    spec = ASSET_SPECS[asset_type]
+    modes_spec = spec["failure_modes"]
+    modes = modes_spec["targets"]
+    paths = {key: os.path.join(out_dir, modes_spec[key]) for key in ("model_path", "calibration_path", "risks_path")}
+    t = time.perf_counter()
+    print(f"⚙️ Training {asset_type} failure-mode model ({', '.join(modes)})")
+    y = df[modes].astype(int).to_numpy()
+
+    def make_model():
+        return RandomForestClassifier(random_state=seed, n_jobs=n_jobs, **spec["params"])
+
+    # Out-of-fold probabilities per mode, folds stratified on any failure
+    y_probs = np.zeros(y.shape)
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    for train_idx, test_idx in cv.split(X, y.max(axis=1)):
+        fold = make_model().fit(X.iloc[train_idx], y[train_idx])
+        y_probs[test_idx] = mode_probabilities(fold, X.iloc[test_idx])
+    aucs = {mode: (roc_auc_score(y[:, k], y_probs[:, k]) if 0 < y[:, k].sum() < len(y) else float("nan"))
+            for k, mode in enumerate(modes)}
+    print("   Out-of-fold ROC AUC: " + "  ".join(f"{mode} {auc:.4f}" for mode, auc in aucs.items()))
+
+    clf = make_model()
+    clf.fit(X, y)
+    clf.set_params(n_jobs=None)
+    joblib.dump({"model": clf, "modes": modes}, paths["model_path"])
+    joblib.dump({"y_true": y, "y_probs": y_probs}, paths["calibration_path"])
+
+    if serving_data and os.path.exists(serving_data):
+        np.savez(
+            paths["risks_path"],
+            risks=mode_probabilities(clf, build_features(asset_type, read_table(serving_data))),
+            model_version=file_version(paths["model_path"], paths["calibration_path"]),
+            data_version=file_version(serving_data),
+        )
+    print(f"✅ {asset_type} failure-mode model saved to {paths['model_path']} ({time.perf_counter() - t:.1f}s)")
+    return aucs
+
+
+def train(asset_type, data_path=None, out_dir=".", folds=5, seed=42, n_jobs=-1, serving_data=None,
+          compress_model=False, auc_tolerance=0.005, cost_tolerance=0.05, failure_modes=True):
+    """Train one asset type and write its artifacts to `out_dir`. Returns a report dict."""
+    spec = ASSET_SPECS[asset_type]
+    data_path = data_path or spec["source"]
+    serving_data = serving_data or spec["serving_data"]
+    paths = {key: os.path.join(out_dir, spec[key])
+             for key in ("model_path", "columns_path", "calibration_path", "risks_path")}
+    timings = {}
+    started = time.perf_counter()
+
+    print(f"⚙️ Training {asset_type} model from {data_path}")
+    df = read_table(data_path)
+    X = build_features(asset_type, df)
+    y = df[spec["target"]].astype(int).to_numpy()
+    timings["load_seconds"] = time.perf_counter() - started
+
+    def make_model():
+        return RandomForestClassifier(random_state=seed, n_jobs=n_jobs, **spec["params"])
+
+    # Out-of-fold probabilities for calibration: each row is predicted by the
+    # fold model that was trained without it
+    t = time.perf_counter()
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    y_probs = cross_val_predict(make_model(), X, y, cv=cv, method="predict_proba")[:, 1]
+    timings["cross_validation_seconds"] = time.perf_counter() - t
+
+    auc = roc_auc_score(y, y_probs) if len(np.unique(y)) > 1 else float("nan")
+    print(f"   Out-of-fold accuracy: {accuracy_score(y, y_probs >= 0.5):.4f}  ROC AUC: {auc:.4f}")
+    print(classification_report(y, (y_probs >= 0.5).astype(int), zero_division=0))
+
+    # Final model for production on all data
+    t = time.perf_counter()
+    clf = make_model()
+    clf.fit(X, y)
+    # Served one reading at a time, where joblib threads only add overhead
+    clf.set_params(n_jobs=None)
+    timings["fit_seconds"] = time.perf_counter() - t
+
+    os.makedirs(out_dir, exist_ok=True)
+    joblib.dump(clf, paths["model_path"])
+    joblib.dump(list(FEATURES[asset_type]), paths["columns_path"])
+    joblib.dump({"y_true": y, "y_probs": y_probs}, paths["calibration_path"])
+
+    # Risks of the serving dataset, tagged with the model and data versions
+    # so the API only reuses them for exactly this model and dataset
+    t = time.perf_counter()
+    risks = None
+    if os.path.exists(serving_data):
+        risks = clf.predict_proba(build_features(asset_type, read_table(serving_data)))[:, 1]
+        np.savez(
+            paths["risks_path"],
+            risks=risks,
+            model_version=file_version(paths["model_path"], paths["columns_path"], paths["calibration_path"]),
+            data_version=file_version(serving_data),
+        )
+    timings["fleet_risks_seconds"] = time.perf_counter() - t
+
+    mode_aucs = None
+    if failure_modes and "failure_modes" in spec and set(spec["failure_modes"]["targets"]).issubset(df.columns):
+        t = time.perf_counter()
+        mode_aucs = train_failure_modes(asset_type, df, X, out_dir, folds=folds, seed=seed, n_jobs=n_jobs,
+                                        serving_data=serving_data)
+        timings["failure_modes_seconds"] = time.perf_counter() - t
+
+    selected = None
+    if compress_model:
+        t = time.perf_counter()
+        selected = compress(asset_type, X, y, out_dir, folds=folds, seed=seed, n_jobs=n_jobs,
+                            auc_tolerance=auc_tolerance, cost_tolerance=cost_tolerance)["name"]
+        timings["compression_seconds"] = time.perf_counter() - t
+    timings["total_seconds"] = time.perf_counter() - started
+
+    print(f"✅ {asset_type} model saved to {paths['model_path']} ({len(df):,} rows, {folds}-fold calibration)")
+    if risks is not None:
+        print(f"✅ Fleet risks for {len(risks):,} rows of {serving_data} saved to {paths['risks_path']}")
+    print(f"⏱️ Training time: {timings['total_seconds']:.1f}s "
+          f"(cv {timings['cross_validation_seconds']:.1f}s, fit {timings['fit_seconds']:.1f}s)")
+    return {"asset_type": asset_type, "rows": len(df), "oof_auc": auc, "failure_mode_auc": mode_aucs,
+            "compressed": selected, "timings": timings}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the failure models served by the API.")
+    parser.add_argument("--asset", choices=sorted(ASSET_SPECS) + ["all"], required=True)
+    parser.add_argument("--data", help="Training data (.csv or .parquet); defaults to the asset's demo dataset")
+    parser.add_argument("--serving-data", help="Dataset to pre-compute fleet risks for")
+    parser.add_argument("--out-dir", default=".", help="Directory the artifacts are written to")
+    parser.add_argument("--folds", type=int, default=5, help="Stratified folds for out-of-fold calibration")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Parallel tree fitting jobs (-1 = all cores)")
+    parser.add_argument("--compress", action="store_true",
+                        help="Also select a smaller serving model (<model>_compact.pkl) within the tolerances")
+    parser.add_argument("--auc-tolerance", type=float, default=0.005, help="Allowed hold-out AUC loss")
+    parser.add_argument("--cost-tolerance", type=float, default=0.05,
+                        help="Allowed relative increase of the minimum expected cost")
+    parser.add_argument("--no-failure-modes", action="store_true",
+                        help="Skip the multi-output failure-mode model (products)")
+    args = parser.parse_args(argv)
+
+    assets = sorted(ASSET_SPECS) if args.asset == "all" else [args.asset]
+    if len(assets) > 1 and (args.data or args.serving_data):
+        parser.error("--data and --serving-data need a single --asset")
+    for asset_type in assets:
+        train(asset_type, data_path=args.data, out_dir=args.out_dir, folds=args.folds,
+              seed=args.seed, n_jobs=args.n_jobs, serving_data=args.serving_data,
+              compress_model=args.compress, auc_tolerance=args.auc_tolerance, cost_tolerance=args.cost_tolerance,
+              failure_modes=not args.no_failure_modes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Per-prediction feature contributions for the serving forests.
+
+Saabas path attribution: a tree's failure probability is its root value plus
+the change in node value along the decision path, and each change is
+credited to the feature split on at the parent node. The per-node deltas are
+accumulated once per model version into a contribution vector per leaf, so
+explaining a batch is the forest's leaf lookup (apply, the same traversal as
+inference) followed by a gather and sum over trees:
+
+    probability = bias + contributions.sum(axis=1)
+
+Supports random forest classifiers and distilled students wrapping a random
+forest regressor; other models have no explainer (tree_explainer returns None).
+"""
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+
+def _node_values(tree, class_index):
+    """Class-1 probability (classifier) or prediction (regressor) of every node."""
+    value = tree.value[:, 0, :]
+    if class_index is None:
+        return value[:, 0].astype(np.float64)
+    return value[:, class_index] / value.sum(axis=1)
+
+
+class TreeExplainer:
+    def __init__(self, forest, feature_names, class_index=None):
+        self.forest = forest
+        self.features = list(feature_names)
+        if forest.n_features_in_ != len(self.features):
+            raise ValueError(f"Model has {forest.n_features_in_} features, got {len(self.features)} names")
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        self.offsets = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+        n_trees = len(trees)
+
+        # All trees' nodes in one array (ids shifted by the tree offset)
+        values = np.concatenate([_node_values(tree, class_index) for tree in trees]) / n_trees
+        left = np.concatenate([np.where(t.children_left >= 0, t.children_left + o, -1) for t, o in zip(trees, self.offsets)])
+        right = np.concatenate([np.where(t.children_right >= 0, t.children_right + o, -1) for t, o in zip(trees, self.offsets)])
+        feature = np.concatenate([tree.feature for tree in trees])
+        self.bias = float(values[self.offsets].sum())
+
+        # Path contributions per node, filled level by level from the roots
+        self.paths = np.zeros((len(values), len(self.features)))
+        level = self.offsets
+        while len(level):
+            level = level[left[level] >= 0]
+            for children in (left[level], right[level]):
+                self.paths[children] = self.paths[level]
+                self.paths[children, feature[level]] += values[children] - values[level]
+            level = np.concatenate([left[level], right[level]])
+
+    def contributions(self, X):
+        """(n, n_features) contribution of each feature to each row's probability."""
+        leaves = self.forest.apply(X) + self.offsets
+        result = np.zeros((len(leaves), len(self.features)))
+        for t in range(leaves.shape[1]):
+            result += self.paths[leaves[:, t]]
+        return result
+
+    def explain(self, contributions, top=None):
+        """One row of contributions as [{feature, contribution}] by decreasing magnitude."""
+        order = np.argsort(-np.abs(contributions), kind="stable")[:top]
+        return [{"feature": self.features[j], "contribution": float(contributions[j])} for j in order]
+
+
+def tree_explainer(model, feature_names):
+    """TreeExplainer for a serving model, or None if the model is not a supported forest."""
+    if isinstance(model, RandomForestClassifier):
+        classes = list(model.classes_)
+        return TreeExplainer(model, feature_names, class_index=classes.index(1)) if 1 in classes else None
+    if isinstance(getattr(model, "regressor", None), RandomForestRegressor):
+        return TreeExplainer(model.regressor, feature_names)
+    return None
@@ -0,0 +1,88 @@
+"""
+Check that training, batch serving and single-reading serving build
+identical features for every asset type.
+
+- train_pipeline.build_features (training) vs features.feature_matrix (startup
+  scoring) vs features.feature_row (request path), bit for bit, on every row
+- all of them vs the original pandas formulas
+- FEATURES order vs the feature names of the saved models
+
+Usage:
+    python verify_features.py
+"""
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from features import FEATURES, INPUTS, feature_matrix, feature_row
+from train_pipeline import ASSET_SPECS, GENERATOR_SOURCE_COLUMNS, build_features
+
+
+def reference_features(asset_type, df):
+    """The pandas feature engineering the API and train_model.py used before features.py."""
+    if asset_type == "product":
+        out = df[["Air temperature", "Process temperature", "Rotational speed", "Torque", "Tool wear"]].astype(float)
+        for t in ("H", "L", "M"):
+            out[f"Type_{t}"] = (df["Type"] == t).astype(float)
+        out["Temp_Diff"] = out["Process temperature"] - out["Air temperature"]
+        out["Power"] = out["Torque"] * out["Rotational speed"]
+        out["Tool_Stress"] = out["Tool wear"] * out["Torque"]
+    elif asset_type == "turbine":
+        out = df[["AT", "V", "AP", "RH"]].astype(float)
+        out["Temp_Press_Ratio"] = out["AT"] / (out["AP"] / 1000)
+        out["Voltage_Temp"] = out["V"] * out["AT"]
+        out["Humidity_Factor"] = (out["RH"] / 100) * out["V"]
+        out["Power_Est"] = out["V"] * out["AT"] * (out["AP"] / 1000)
+    else:
+        out = df[["air_temp", "core_temp", "rpm", "torque", "wear"]].astype(float)
+    return out[FEATURES[asset_type]].to_numpy()
+
+
+failures = 0
+
+
+def check(label, ok):
+    global failures
+    print(f"   {'✅' if ok else '❌'} {label}")
+    failures += not ok
+
+
+print("=" * 60)
+print("FEATURE PIPELINE VERIFICATION")
+print("=" * 60)
+
+for asset_type, spec in ASSET_SPECS.items():
+    print(f"\n{asset_type}:")
+    path = spec["source"]
+    if not os.path.exists(path):
+        print(f"   ⚠️ {path} not found, skipped")
+        continue
+    df = pd.read_csv(path)
+
+    training = build_features(asset_type, df)
+    check(f"training columns == FEATURES ({len(training.columns)})", list(training.columns) == FEATURES[asset_type])
+    X_train = training.to_numpy()
+
+    # The generator trains on renamed source columns; serve the renamed frame
+    raw = df if set(INPUTS[asset_type]).issubset(df.columns) else df.rename(columns=GENERATOR_SOURCE_COLUMNS)
+    X_batch = feature_matrix(asset_type, raw)
+    check(f"batch == training on {len(df):,} rows", np.array_equal(X_batch, X_train))
+
+    rows = raw[INPUTS[asset_type]].itertuples(index=False, name=None)
+    X_rows = np.vstack([feature_row(asset_type, *values) for values in rows])
+    check("single-reading == batch on every row", np.array_equal(X_rows, X_batch))
+
+    check("== original pandas formulas", np.array_equal(X_batch, reference_features(asset_type, raw)))
+
+    if os.path.exists(spec["model_path"]):
+        names = getattr(joblib.load(spec["model_path"]), "feature_names_in_", None)
+        if names is not None:
+            check(f"FEATURES order == {spec['model_path']} feature names", list(names) == FEATURES[asset_type])
+
+print("\n" + "=" * 60)
+print("ALL CHECKS PASSED" if not failures else f"{failures} CHECK(S) FAILED")
+print("=" * 60)
+sys.exit(1 if failures else 0)
@@ -0,0 +1,130 @@
+"""
+Check the follow-up call client against a local stub of the CallMeBot
+endpoint: connection reuse, bounded concurrency, retry with backoff on
+5xx, and per-destination rate limiting.
+
+Usage:
+    python verify_followup_client.py
+"""
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from followup_client import FollowupClient
+
+
+class StubState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = []             # (user, monotonic time)
+        self.client_ports = set()   # one per TCP connection
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_first = 0         # answer this many requests with 503
+        self.delay = 0.0
+
+
+state = StubState()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        with state.lock:
+            state.client_ports.add(self.client_address[1])
+            state.in_flight += 1
+            state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            fail = state.fail_first > 0
+            state.fail_first -= fail
+        time.sleep(state.delay)
+        with state.lock:
+            state.in_flight -= 1
+            if not fail:
+                state.calls.append((query.get("user", [None])[0], time.monotonic()))
+        body = b"busy" if fail else b"ok"
+        self.send_response(503 if fail else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def reset(fail_first=0, delay=0.0):
+    with state.lock:
+        state.calls.clear()
+        state.client_ports.clear()
+        state.in_flight = state.max_in_flight = 0
+        state.fail_first, state.delay = fail_first, delay
+
+
+def check(name, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {name}{f' ({detail})' if detail else ''}")
+    return ok
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+url = f"http://127.0.0.1:{server.server_address[1]}/start.php"
+print(f"🔬 Stub CallMeBot endpoint at {url}")
+results = []
+
+# Keep-alive: sequential calls reuse one pooled connection
+client = FollowupClient(url, max_concurrency=4, min_interval=0)
+reset()
+for i in range(10):
+    client.schedule({"user": f"@user{i}", "text": "t"}).result(timeout=10)
+results.append(check("Sequential calls reuse one connection", len(state.client_ports) == 1,
+                     f"{len(state.client_ports)} connection(s) for 10 calls"))
+
+# Bounded concurrency: a burst never exceeds the semaphore
+reset(delay=0.1)
+futures = [client.schedule({"user": f"@user{i}", "text": "t"}) for i in range(20)]
+sent = sum(f.result(timeout=30) for f in futures)
+results.append(check("Burst limited to 4 concurrent calls", sent == 20 and state.max_in_flight <= 4,
+                     f"sent {sent}/20, max in flight {state.max_in_flight}"))
+client.close()
+
+# Retry with backoff: two 503s, then success
+client = FollowupClient(url, retries=3, backoff=0.05, min_interval=0)
+reset(fail_first=2)
+ok = client.schedule({"user": "@retry", "text": "t"}).result(timeout=10)
+results.append(check("Retried through two 503s", ok and client.counts["retries"] == 2,
+                     f"retries {client.counts['retries']}"))
+
+reset(fail_first=10)
+ok = client.schedule({"user": "@retry", "text": "t"}).result(timeout=10)
+results.append(check("Gives up after the retry budget", not ok and client.counts["failed"] == 1))
+client.close()
+
+# Per-destination rate limit: same user spaced, other users not delayed
+client = FollowupClient(url, min_interval=0.5, max_wait=1.2)
+reset()
+futures = [client.schedule({"user": "@same", "text": "t"}, destination="@same") for _ in range(4)]
+futures.append(client.schedule({"user": "@other", "text": "t"}, destination="@other"))
+outcomes = [f.result(timeout=10) for f in futures]
+same = sorted(t for user, t in state.calls if user == "@same")
+gaps = [b - a for a, b in zip(same, same[1:])]
+results.append(check("Same destination spaced by min_interval", len(same) == 3 and min(gaps) >= 0.45,
+                     f"gaps {[round(g, 2) for g in gaps]}"))
+results.append(check("Calls beyond max_wait dropped", outcomes[:4].count(False) == 1
+                     and client.counts["rate_limited"] == 1))
+results.append(check("Other destinations not delayed", outcomes[4] and any(u == "@other" for u, _ in state.calls)))
+client.close()
+
+# Without max_wait spaced calls wait for their slot instead of being dropped
+client = FollowupClient(url, min_interval=0.2)
+reset()
+outcomes = [f.result(timeout=10) for f in
+            [client.schedule({"user": "@same", "text": "t"}, destination="@same") for _ in range(4)]]
+results.append(check("No max_wait: nothing dropped", all(outcomes) and client.metrics()["rate_limited"] == 0
+                     and len(state.calls) == 4))
+client.close()
+
+server.shutdown()
+print()
+print("✅ All follow-up client checks passed." if all(results) else "❌ Some follow-up client checks failed.")
@@ -0,0 +1,51 @@
+"""
+Check process-pool dataset scoring against inline scoring: same
+probabilities from the pool (forced with a low row threshold), one output
+per asset type, and inline scoring once other threads are running (a fork
+is only taken while the process is single-threaded).
+
+Usage:
+    python verify_parallel_scoring.py
+"""
+import threading
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from parallel_scoring import pool_context, score_datasets
+
+
+def check(name, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {name}{f' ({detail})' if detail else ''}")
+    return ok
+
+
+rng = np.random.default_rng(0)
+jobs = {}
+for asset_type, n_rows, n_features in (("product", 12_000, 5), ("turbine", 5_000, 4)):
+    X = rng.normal(size=(n_rows, n_features))
+    y = (X[:, 0] + 0.5 * rng.normal(size=n_rows) > 1).astype(int)
+    jobs[asset_type] = (RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(X, y), X)
+expected = {asset_type: model.predict_proba(X)[:, 1] for asset_type, (model, X) in jobs.items()}
+results = []
+
+results.append(check("Pool available while single-threaded", pool_context() is not None))
+pooled = score_datasets(jobs, workers=2, chunk_rows=2_000, min_parallel_rows=1_000)
+results.append(check("Pool scores match inline", set(pooled) == set(jobs)
+                     and all(np.allclose(pooled[a], expected[a]) for a in jobs)))
+
+# With another thread running the pool must not fork
+stop = threading.Event()
+thread = threading.Thread(target=stop.wait, daemon=True)
+thread.start()
+results.append(check("No pool while other threads run", pool_context() is None))
+inline = score_datasets(jobs, workers=2, chunk_rows=2_000, min_parallel_rows=1_000)
+results.append(check("Inline fallback scores match", all(np.allclose(inline[a], expected[a]) for a in jobs)))
+stop.set()
+thread.join()
+
+empty = score_datasets({"generator": (jobs["turbine"][0], np.empty((0, 4)))}, workers=2, min_parallel_rows=0)
+results.append(check("Empty dataset scores to an empty array", len(empty["generator"]) == 0))
+
+print()
+print("✅ All parallel scoring checks passed." if all(results) else "❌ Some parallel scoring checks failed.")
@@ -0,0 +1,307 @@
+"""
+Check the stateful serving modules against brute-force recomputation:
+
+- rolling_stats: O(1) window updates and vectorized seeding vs the raw window
+- risk_index: top-K / threshold / percentile vs a full sort, incl. NaN scores
+- downsample: LTTB and min/max bucketing keep the shape-defining points
+- response_cache / single_flight: generations, ETags, coalesced builds
+- reading_store: ranges, latest-N, metadata and schema growth
+- risk_tables: published generations, version matching, stale temp files
+- outcome_calibration: cost-optimal threshold and the cross-process merge
+- drift_monitor: stable vs shifted live data, feature-only updates
+
+Usage:
+    python verify_state.py
+"""
+import math
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from downsample import lttb_indices, minmax_indices
+from drift_monitor import DriftMonitor
+from outcome_calibration import OutcomeCalibration, OutcomeFile
+from reading_store import ReadingStore
+from response_cache import MIN_GZIP_BYTES, ResponseCache
+from risk_index import RiskIndex
+from risk_tables import SharedRiskTables
+from rolling_stats import RESYNC_ROUNDS, RollingStats
+from single_flight import SingleFlight
+
+
+def check(name, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {name}{f' ({detail})' if detail else ''}")
+    return ok
+
+
+def reference_stats(values, window):
+    """Window statistics recomputed from the raw readings."""
+    tail = np.asarray(values[-window:], dtype=np.float64)
+    alpha = 2.0 / (window + 1)
+    ewma = values[0]
+    for v in values[1:]:
+        ewma += alpha * (v - ewma)
+    slope = np.polyfit(np.arange(len(tail)), tail, 1)[0] if len(tail) > 1 else 0.0
+    return {"mean": tail.mean(), "max": tail.max(), "ewma": ewma, "slope": slope, "latest": values[-1]}
+
+
+def merge_outcomes(path, worker, n):
+    """One server worker recording `n` outcomes into the shared file."""
+    rng = np.random.default_rng(worker)
+    outcome_file = OutcomeFile(path)
+    for _ in range(n):
+        with outcome_file.locked():
+            calibration = outcome_file.read() or OutcomeCalibration("v1", bins=100)
+            calibration.record(rng.uniform(size=1), rng.uniform(size=1) < 0.3)
+            outcome_file.write(calibration)
+
+
+results = []
+rng = np.random.default_rng(7)
+
+# --- rolling_stats ---
+print("📈 rolling_stats")
+windows = (5, 20)
+n_readings = 20 * RESYNC_ROUNDS + 13  # past one resync of the larger window
+history = {asset_id: rng.uniform(0, 100, size=n_readings) for asset_id in ("A", "B")}
+pushed = RollingStats(history, windows)
+for i in range(n_readings):
+    for asset_id, values in history.items():
+        pushed.push(asset_id, values[i])
+seeded = RollingStats(history, windows)
+for asset_id, values in history.items():
+    seeded.seed(asset_id, values)
+
+worst = 0.0
+for window in windows:
+    for asset_id, values in history.items():
+        expected = reference_stats(values, window)
+        for stats in (pushed.stats(asset_id, window), seeded.stats(asset_id, window)):
+            worst = max(worst, max(abs(stats[k] - expected[k]) for k in expected))
+results.append(check("Pushed and seeded windows match the raw readings", worst < 1e-6, f"max error {worst:.2e}"))
+
+partial = RollingStats(["A", "B"], windows)
+partial.seed("A", [10.0, 20.0])
+means = partial.fleet("mean", 20)
+results.append(check("Short histories average what they have; empty ones are NaN",
+                     means[0] == 15.0 and math.isnan(means[1])))
+
+# --- risk_index ---
+print("\n🗂️ risk_index")
+ids = [f"A{i}" for i in range(200)]
+scores = {asset_id: float(s) for asset_id, s in zip(ids, rng.uniform(0, 100, size=len(ids)))}
+index = RiskIndex(scores, scores.values())
+for _ in range(500):
+    asset_id = ids[int(rng.integers(len(ids)))]
+    scores[asset_id] = float(rng.choice([rng.uniform(0, 100), 50.0]))  # ties on 50.0 included
+    index.update(asset_id, scores[asset_id])
+ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+results.append(check("Top-K after random updates matches a full sort", index.top(10) == ranked[:10]))
+above, total = index.above(60, limit=5)
+expected_above = [item for item in ranked if item[1] >= 60]
+results.append(check("Above threshold: riskiest first with the full count",
+                     above == expected_above[:5] and total == len(expected_above)))
+values = sorted(scores.values())
+results.append(check("Percentiles at nearest rank",
+                     all(index.percentile(p)[1] == values[int(round(p / 100 * (len(values) - 1)))]
+                         for p in (0, 25, 50, 90, 100))))
+
+nan_index = RiskIndex(["a", "b", "c", "d"], [0.5, math.nan, 0.9, 0.1])
+nan_index.update("c", 0.2)  # must move "c", not another entry
+nan_index.update("b", math.nan)
+top = nan_index.top(4)
+results.append(check("NaN scores sort last and do not disturb updates",
+                     [a for a, _ in top] == ["a", "c", "d", "b"] and math.isnan(top[-1][1])
+                     and len(nan_index) == 4))
+results.append(check("NaN scores are never above a threshold and skip percentiles",
+                     nan_index.above(0)[1] == 3 and nan_index.percentile(0) == ("d", 0.1)))
+nan_index.update("b", 0.7)
+nan_index.remove("a")
+results.append(check("A scored NaN asset moves into place; removal hits the right entry",
+                     nan_index.top(4) == [("b", 0.7), ("c", 0.2), ("d", 0.1)]))
+
+# --- downsample ---
+print("\n📉 downsample")
+x = np.arange(5000, dtype=np.float64)
+y = np.sin(x / 200) * 10 + rng.normal(0, 0.5, size=len(x))
+y[3210] = 80.0  # a spike the graph must show
+lttb = lttb_indices(x, y, 300)
+minmax = minmax_indices(y, 300)
+results.append(check("LTTB keeps first, last and the spike in order",
+                     len(lttb) == 300 and lttb[0] == 0 and lttb[-1] == len(y) - 1
+                     and 3210 in lttb and bool(np.all(np.diff(lttb) > 0))))
+results.append(check("Min/max keeps the global extremes",
+                     int(np.argmax(y)) in minmax and int(np.argmin(y)) in minmax and len(minmax) <= 300))
+results.append(check("Short series are returned whole", len(lttb_indices(x[:50], y[:50], 300)) == 50))
+
+# --- response_cache / single_flight ---
+print("\n📦 response_cache / single_flight")
+cache = ResponseCache(max_entries=2)
+builds = []
+payload = {"fleet": list(range(400))}
+first = cache.get_or_build("fleet", 1, lambda: builds.append(1) or payload)
+again = cache.get_or_build("fleet", 1, lambda: builds.append(1) or payload)
+newer = cache.get_or_build("fleet", 2, lambda: builds.append(2) or {"fleet": []})
+results.append(check("Entries are rebuilt only for a new generation", builds == [1, 2] and first is again))
+results.append(check("ETag and gzip on large bodies only",
+                     first.matches(first.etag) and first.matches(f"W/{first.etag}, \"x\"")
+                     and not first.matches('"other"') and first.gzipped is not None
+                     and len(newer.body) < MIN_GZIP_BYTES and newer.gzipped is None))
+cache.get_or_build("fleet", 1, lambda: payload)  # a slow build of an older generation
+results.append(check("An older generation never replaces a newer entry",
+                     cache.get_or_build("fleet", 2, lambda: None) is newer))
+
+flight = SingleFlight()
+started = threading.Event()
+
+
+def slow_build():
+    started.set()
+    time.sleep(0.2)
+    return object()
+
+
+with ThreadPoolExecutor(max_workers=8) as pool:
+    leader = pool.submit(flight.do, "history", slow_build)
+    started.wait()
+    followers = [pool.submit(flight.do, "history", slow_build) for _ in range(7)]
+    shared = {id(f.result()) for f in [leader] + followers}
+results.append(check("Concurrent identical calls run once", len(shared) == 1 and flight.metrics()["executions"] == 1))
+
+
+def failing():
+    started.set()
+    time.sleep(0.1)
+    raise ValueError("boom")
+
+
+started.clear()
+errors = []
+with ThreadPoolExecutor(max_workers=4) as pool:
+    leader = pool.submit(flight.do, "cost", failing)
+    started.wait()
+    followers = [pool.submit(flight.do, "cost", failing) for _ in range(3)]
+    for future in [leader] + followers:
+        try:
+            future.result()
+        except ValueError as e:
+            errors.append(str(e))
+results.append(check("Errors reach every waiter", errors == ["boom"] * 4 and flight.metrics()["in_flight"] == 0))
+
+with tempfile.TemporaryDirectory() as tmp:
+    # --- reading_store ---
+    print("\n🗄️ reading_store")
+    path = os.path.join(tmp, "readings.db")
+    store = ReadingStore(path, {"turbine": ["AT", "V"]})
+    seqs = np.arange(100)
+    store.insert("turbine", ["T1"] * 100, seqs, {"AT": seqs * 0.5, "V": seqs * 2.0, "risk": seqs % 7})
+    store.insert("turbine", ["T2"] * 3, [0, 1, 2], {"AT": [1, 2, 3], "V": [4, 5, 6], "risk": [0, 0, 0]})
+    window = store.range("turbine", "T1", since=10, until=19)
+    latest = store.latest("turbine", "T1", 5)
+    results.append(check("Range and latest-N come back oldest first",
+                         window["seq"].tolist() == list(range(10, 20)) and window["AT"][0] == 5.0
+                         and latest["seq"].tolist() == [95, 96, 97, 98, 99]))
+    store.insert("turbine", ["T1"], [99], {"AT": [-1.0], "V": [0.0], "risk": [50.0]})
+    results.append(check("Re-inserting a sequence number replaces the reading",
+                         store.count("turbine") == 103 and store.latest("turbine", "T1", 1)["AT"][0] == -1.0
+                         and store.last_seq("turbine", "T2") == 2 and store.last_seq("turbine", "T9") is None))
+    store.set_meta("dataset:turbine", "abc")
+    grown = ReadingStore(path, {"turbine": ["AT", "V", "RH"]})
+    old_rows = grown.latest("turbine", "T2", 3)
+    results.append(check("Schema growth keeps rows and metadata, new columns read NaN",
+                         grown.count("turbine") == 103 and bool(np.isnan(old_rows["RH"]).all())
+                         and grown.get_meta("dataset:turbine") == "abc"))
+    swapped = ReadingStore(os.path.join(tmp, "swap.db"), {"turbine": ["AT"]})
+    swapped.replace_dataset("turbine", ["T1"] * 5, range(5), {"AT": np.zeros(5), "risk": np.zeros(5)},
+                            "dataset:turbine", "v1")
+    swapped.insert("turbine", ["T1"] * 2, [5, 6], {"AT": [50.0, 60.0], "risk": [1.0, 2.0]})
+    swapped.replace_dataset("turbine", ["T1"] * 10, range(10), {"AT": np.ones(10), "risk": np.zeros(10)},
+                            "dataset:turbine", "v2")
+    posted = swapped.range("turbine", "T1", source="posted")
+    results.append(check("A new dataset replaces the old rows; posted rows move behind it",
+                         swapped.count("turbine") == 12 and posted["seq"].tolist() == [10, 11]
+                         and posted["AT"].tolist() == [50.0, 60.0] and swapped.get_meta("dataset:turbine") == "v2"))
+
+    # --- risk_tables ---
+    print("\n🧮 risk_tables")
+    tables = SharedRiskTables(os.path.join(tmp, "tables"))
+    if tables.enabled:
+        stale = os.path.join(tables.directory, "turbine.risks.999999.tmp")
+        with open(stale, "wb") as f:
+            f.write(b"partial")
+        computed = []
+        risks = tables.get_or_publish("turbine", "m1", "d1", lambda: computed.append(1) or np.arange(5.0))
+        again = tables.get_or_publish("turbine", "m1", "d1", lambda: computed.append(1) or np.arange(5.0))
+        results.append(check("Published once, then mapped", computed == [1] and np.array_equal(risks, again)
+                             and not again.flags.writeable))
+        results.append(check("Stale temporary tables are removed on publish", not os.path.exists(stale)))
+        other = SharedRiskTables(tables.directory)  # another worker
+        results.append(check("Other versions do not match", other.load("turbine", "m2", "d1") is None
+                             and other.load("turbine", "m1", "d2") is None))
+        lock = tables.claim("turbine")
+        generation = tables.publish("turbine", "m2", "d1", np.ones(3))
+        lock.close()
+        results.append(check("A new publish is picked up with the next generation",
+                             generation == 2 and np.array_equal(other.load("turbine", "m2", "d1"), np.ones(3))))
+    else:
+        print("⚠️ Shared risk tables unavailable here (no fcntl); skipped.")
+
+    # --- outcome_calibration ---
+    print("\n🎯 outcome_calibration")
+    labels = rng.uniform(size=3000) < 0.2
+    probabilities = np.clip(np.where(labels, rng.normal(0.7, 0.15, 3000), rng.normal(0.3, 0.15, 3000)), 0, 0.999)
+    calibration = OutcomeCalibration("v1", bins=100)
+    calibration.seed(labels[:2000], probabilities[:2000])
+    calibration.record(probabilities[2000:], labels[2000:])
+    best = calibration.optimal_threshold(500, 5000)
+    bins = np.floor(probabilities * 100).astype(int)
+    costs = [((bins >= b) & ~labels).sum() * 500 + ((bins < b) & labels).sum() * 5000 for b in range(101)]
+    results.append(check("Cost-optimal threshold matches brute force",
+                         best["expected_cost"] == min(costs) and best["threshold"] == int(np.argmin(costs)) / 100
+                         and best["samples"] == 3000 and best["recorded"] == 1000,
+                         f"threshold {best['threshold']}"))
+
+    path = os.path.join(tmp, "turbine.npz")
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(merge_outcomes, [path] * 4, range(4), [50] * 4))
+    merged = OutcomeFile(path).read()
+    results.append(check("Four workers' outcomes all land in the shared file",
+                         merged.recorded == 200 and int(merged.positives.sum() + merged.negatives.sum()) == 200))
+
+# --- drift_monitor ---
+print("\n🌊 drift_monitor")
+baseline = rng.normal(size=(20_000, 3))
+monitor = DriftMonitor.fit(["a", "b", "probability"], baseline)
+monitor.update(rng.normal(size=(5_000, 2)), rng.normal(size=5_000))
+stable = monitor.report(min_samples=100)
+monitor.reset()
+monitor.update(rng.normal(size=(5_000, 2)) + [1.0, 0.0], rng.normal(size=5_000))
+shifted = monitor.report(min_samples=100)
+results.append(check("Same distribution is stable, a shifted feature is significant",
+                     all(c["status"] == "stable" for c in stable["columns"].values())
+                     and shifted["columns"]["a"]["status"] == "significant"
+                     and shifted["columns"]["b"]["status"] == "stable",
+                     f"PSI a {shifted['columns']['a']['psi']}"))
+
+single, batch = DriftMonitor.fit(["a", "b", "probability"], baseline), DriftMonitor.fit(["a", "b", "probability"], baseline)
+rows = rng.normal(size=(50, 2))
+probs = rng.normal(size=50)
+for row, p in zip(rows, probs):
+    single.update(row[None], (p,))
+batch.update(rows, probs)
+results.append(check("One-reading updates count like a batch", np.array_equal(single.live, batch.live)))
+single.update(rows[:1])
+batch.update(rows[:10])
+columns = batch.report()["columns"]
+results.append(check("Feature-only updates leave the probability column alone",
+                     single.report()["columns"]["probability"]["samples"] == 50
+                     and columns["a"]["samples"] == 60 and columns["probability"]["samples"] == 50))
+results.append(check("Too few readings give no status", single.report(min_samples=100)["columns"]["a"]["status"]
+                     == "insufficient_data"))
+
+print()
+print("✅ All state checks passed." if all(results) else "❌ Some state checks failed.")